@@ -0,0 +1,244 @@
+"""
+api/ai_validation.py — Shape checks + local repair for Groq payloads.
+
+Every validator takes one raw item from the model and returns either a
+cleaned item in the exact shape the views rely on, or None when the item is
+beyond repair. Callers drop the Nones and top up only the missing count.
+Regexes and lookup tables are built once at import time so validating a
+full batch costs microseconds.
+"""
+
+import re
+
+
+# ── Precompiled patterns / lookups ────────────────────────────────────────────
+
+_LETTER_ANSWER  = re.compile(r"^\s*(?:option\s*)?\(?([A-Da-d])\)?\s*[.):]?\s*$")
+_INDEX_ANSWER   = re.compile(r"^\s*(?:option\s*)?\(?([0-3])\)?\s*$")
+_OPTION_LABEL   = re.compile(r"^\(?(?:([A-Ha-h])\s*([.):])|([0-9])([.)]))\s+")   # "A) ", "(b). ", "1. " — never "2 : 3"
+_LEADING_INT    = re.compile(r"\d+")
+_WHITESPACE     = re.compile(r"\s+")
+_NON_WORD       = re.compile(r"[^a-z\-]+")
+
+_LETTER_INDEX   = {"a": 0, "b": 1, "c": 2, "d": 3}
+_DIFFICULTIES   = {"easy": "Easy", "medium": "Medium", "hard": "Hard"}
+_FREQUENCIES    = {"high": "High", "medium": "Medium", "low": "Low"}
+_QUESTION_TYPES = {"conceptual", "numerical", "code-output", "scenario", "comparison"}
+_ROUND_TYPES    = {"oa": "OA", "technical": "Technical", "hr": "HR", "behavioral": "Behavioral", "system": "System"}
+_RESOURCE_TYPES = {"practice": "Practice", "book": "Book", "guide": "Guide", "pyq": "PYQ", "video": "Video"}
+_LESSON_TYPES   = {"theory", "practice"}
+
+
+def _text(value) -> str:
+    return _WHITESPACE.sub(" ", value).strip() if isinstance(value, str) else ""
+
+
+def _choice(value, table: dict, default: str) -> str:
+    key = _text(value).lower()
+    if key in table:
+        return table[key]
+    # "Medium-Hard", "Easy | Medium" → first recognised word
+    for word in _NON_WORD.split(key):
+        if word in table:
+            return table[word]
+    return default
+
+
+def _str_list(value) -> list:
+    if not isinstance(value, list):
+        return []
+    return [t for t in (_text(v) for v in value) if t]
+
+
+# ── MCQ ───────────────────────────────────────────────────────────────────────
+
+def _strip_labels(options: list) -> list:
+    """
+    Drop "A) " / "1. " style labels, but only when every option carries the
+    same kind of label in sequence (A, B, C… or 0/1, 2, 3…) — a lone "2) …"
+    or "1 : 2" is option text, not a label.
+    """
+    matches = [_OPTION_LABEL.match(o) for o in options]
+    if not options or not all(matches):
+        return options
+    if all(m.group(1) for m in matches):
+        labels, seps = [m.group(1).lower() for m in matches], {m.group(2) for m in matches}
+        in_order = labels == list("abcdefgh"[:len(labels)])
+    elif all(m.group(3) for m in matches):
+        labels, seps = [int(m.group(3)) for m in matches], {m.group(4) for m in matches}
+        in_order = labels == list(range(labels[0], labels[0] + len(labels))) and labels[0] in (0, 1)
+    else:
+        return options
+    if not in_order or len(seps) != 1:
+        return options
+    return [o[m.end():] for o, m in zip(options, matches)]
+
+
+def _mcq_answer(raw, options: list):
+    if isinstance(raw, bool):
+        return None
+    if isinstance(raw, int):
+        return raw if 0 <= raw < 4 else None
+    if isinstance(raw, float) and raw.is_integer():
+        return _mcq_answer(int(raw), options)
+    if not isinstance(raw, str):
+        return None
+
+    m = _INDEX_ANSWER.match(raw)
+    if m:
+        return int(m.group(1))
+    m = _LETTER_ANSWER.match(raw)
+    if m:
+        return _LETTER_INDEX[m.group(1).lower()]
+
+    # Model echoed the option text instead of its index
+    wanted = _text(raw).lower()
+    for i, opt in enumerate(options):
+        if opt.lower() == wanted:
+            return i
+    return None
+
+
+def validate_mcq(item, difficulty: str):
+    """Return a clean MCQ dict (4 options, answer 0–3) or None."""
+    if not isinstance(item, dict):
+        return None
+
+    question = _text(item.get("question"))
+    if not question:
+        return None
+
+    options = item.get("options")
+    if isinstance(options, dict):   # {"A": "...", "B": "..."}
+        options = [options[k] for k in sorted(options)]
+    if not isinstance(options, list):
+        return None
+    options = _strip_labels([_text(o) for o in options])
+    if len(options) < 4 or not all(options[:4]):
+        return None
+
+    answer = _mcq_answer(item.get("answer"), options)
+    if answer is None or answer >= 4:   # matched a 5th+ option by text — dropping it would orphan the answer
+        return None
+    options = options[:4]   # extra distractors are safe to drop now that answer < 4
+    if len({o.lower() for o in options}) < 4:
+        return None
+
+    qtype = _text(item.get("type")).lower()
+    return {
+        "question":    question,
+        "options":     options,
+        "answer":      answer,
+        "explanation": _text(item.get("explanation")),
+        "tag":         _text(item.get("tag")),
+        "difficulty":  _choice(item.get("difficulty"), _DIFFICULTIES, difficulty),
+        "type":        qtype if qtype in _QUESTION_TYPES else "conceptual",
+    }
+
+
+# ── Study lessons ─────────────────────────────────────────────────────────────
+
+def validate_lesson(item):
+    """Return {title, type, content} or None when there is no usable content."""
+    if not isinstance(item, dict):
+        return None
+
+    content = item.get("content")
+    if isinstance(content, list):   # bullet list instead of prose
+        content = "\n".join(_text(c) for c in content if _text(c))
+    elif not isinstance(content, str):
+        content = ""
+    content = content.strip()
+
+    title = _text(item.get("title"))
+    if not content or not title:
+        return None
+
+    ltype = _text(item.get("type")).lower()
+    return {
+        "title":   title,
+        "type":    ltype if ltype in _LESSON_TYPES else ("practice" if "practice" in ltype else "theory"),
+        "content": content,
+    }
+
+
+# ── Company guide ─────────────────────────────────────────────────────────────
+
+def validate_pyq(item):
+    if isinstance(item, str):
+        item = {"q": item}
+    if not isinstance(item, dict):
+        return None
+    q = _text(item.get("q") or item.get("question"))
+    if not q:
+        return None
+    return {
+        "q":          q,
+        "tag":        _text(item.get("tag")) or "General",
+        "difficulty": _choice(item.get("difficulty"), _DIFFICULTIES, "Medium"),
+        "freq":       _choice(item.get("freq"), _FREQUENCIES, "Medium"),
+    }
+
+
+def _validate_round(item):
+    if not isinstance(item, dict):
+        return None
+    name = _text(item.get("name"))
+    if not name:
+        return None
+    return {
+        "name":     name,
+        "type":     _choice(item.get("type"), _ROUND_TYPES, "Technical"),
+        "duration": _text(item.get("duration")),
+        "desc":     _text(item.get("desc") or item.get("description")),
+    }
+
+
+def _validate_resource(item):
+    if isinstance(item, str):
+        item = {"title": item}
+    if not isinstance(item, dict) or not _text(item.get("title")):
+        return None
+    return {
+        "title": _text(item["title"]),
+        "type":  _choice(item.get("type"), _RESOURCE_TYPES, "Guide"),
+    }
+
+
+def _rounds_count(raw, fallback: int) -> int:
+    if isinstance(raw, bool):
+        return fallback
+    if isinstance(raw, (int, float)):
+        return int(raw) if raw > 0 else fallback
+    m = _LEADING_INT.search(raw) if isinstance(raw, str) else None
+    return int(m.group()) if m else fallback
+
+
+def validate_company_guide(guide, company_name: str) -> dict:
+    """
+    Repair a company guide into the schema the frontend renders.
+    Raises ValueError only when nothing useful came back (no rounds, no PYQs).
+    """
+    if not isinstance(guide, dict):
+        raise ValueError("Expected a JSON object for the company guide")
+
+    rounds = [r for r in map(_validate_round, guide.get("rounds_detail_list") or []) if r]
+    pyqs   = [p for p in map(validate_pyq, guide.get("pyqs") or []) if p]
+    package = guide.get("package")
+
+    if not rounds and not pyqs:
+        raise ValueError("Company guide has neither rounds nor PYQs")
+
+    return {
+        "name":               _text(guide.get("name")) or company_name,
+        "tagline":            _text(guide.get("tagline")),
+        "about":              _text(guide.get("about")),
+        "package":            _text("" if package is None else str(package)),
+        "difficulty":         _choice(guide.get("difficulty"), _DIFFICULTIES, "Medium"),
+        "rounds":             _rounds_count(guide.get("rounds"), len(rounds)),
+        "roles":              _str_list(guide.get("roles")),
+        "rounds_detail_list": rounds,
+        "pyqs":               pyqs,
+        "tips":               _str_list(guide.get("tips")),
+        "resources":          [r for r in map(_validate_resource, guide.get("resources") or []) if r],
+    }
@@ -0,0 +1,208 @@
+"""
+api/author_fanout.py — Propagate a renamed user's author_name / author_initials.
+
+Posts and comments embed the author's name and initials. When a profile's
+name changes, a background job walks that author's posts and comments
+(indexed author_uid queries; a collection group query for comments) and
+rewrites the two fields in batched writes under a rate limit. Each page of
+rewrites commits in one transaction together with its checkpoint, after
+re-reading the job's id, so a superseded run can never write the old name.
+The same transaction re-reads the page's documents and skips any deleted
+since the scan, so a concurrent delete never fails the page.
+
+One job document per user, author_fanout/{uid}, holds the target values,
+the current phase and a checkpoint (last document path), and doubles as the
+progress report. A crashed or redeployed worker's job is picked up from the
+checkpoint by `manage.py run_author_fanout`. Renaming again mid-run replaces
+the job; the old run notices the new job_id at its next checkpoint and stops.
+"""
+
+import logging
+import threading
+import time
+import uuid
+
+from django.conf import settings
+from google.cloud import firestore as gfs
+
+from api import search
+from api.firebase import db, Collections
+from api.utils import RateLimiter
+
+
+logger = logging.getLogger(__name__)
+
+LEASE_SECONDS = 120
+PAGE          = 400   # rewrites + the checkpoint per transaction (Firestore limit 500 writes)
+FIELDS        = ["author_name", "author_initials"]
+PHASES        = ("posts", "comments")
+
+
+def _query(phase: str, uid: str):
+    source = db.collection(Collections.POSTS) if phase == "posts" else db.collection_group("comments")
+    return source.where("author_uid", "==", uid).select(FIELDS).order_by("__name__")
+
+
+def _count(query):
+    try:
+        return query.count().get()[0][0].value
+    except Exception as e:
+        logger.info("fan-out count unavailable: %s", e)
+        return None
+
+
+@gfs.transactional
+def _claim(transaction, ref, owner: str, job_id: str = None):
+    """Take the job's lease. Returns the job dict, or None if it is not ours to run."""
+    job = ref.get(transaction=transaction).to_dict()
+    if not job or job.get("status") == "done":
+        return None
+    if job_id and job.get("job_id") != job_id:
+        return None
+    if job.get("lease_owner") not in (None, owner) and job.get("lease_until", 0) > time.time():
+        return None
+    transaction.update(ref, {"lease_owner": owner, "lease_until": time.time() + LEASE_SECONDS,
+                             "status": "running"})
+    return job
+
+
+@gfs.transactional
+def _commit_page(transaction, ref, job_id: str, progress: dict, doc_refs: list, target: dict):
+    """
+    Rewrite `doc_refs` that still exist and save `progress` atomically — only
+    while `job_id` is still the job. Returns the refs rewritten, or None when
+    a newer job replaced this one.
+    """
+    current = ref.get(field_paths=["job_id"], transaction=transaction).to_dict() or {}
+    if current.get("job_id") != job_id:
+        return None
+    live = []
+    if doc_refs:
+        live = [s.reference for s in db.get_all(doc_refs, field_paths=[], transaction=transaction) if s.exists]
+    for doc_ref in live:
+        transaction.update(doc_ref, target)
+    gone = len(doc_refs) - len(live)
+    transaction.set(ref, {**progress, "updated": progress["updated"] - gone}, merge=True)
+    return live
+
+
+class AuthorFanout:
+    def __init__(self):
+        self.owner = uuid.uuid4().hex[:12]
+
+    @staticmethod
+    def job_ref(uid: str):
+        return db.collection(Collections.AUTHOR_FANOUT).document(uid)
+
+    def start(self, uid: str, name: str, initials: str) -> str:
+        """Record a new job (replacing any older one) and run it in a background thread."""
+        job_id = uuid.uuid4().hex[:12]
+        self.job_ref(uid).set({
+            "job_id":      job_id,
+            "uid":         uid,
+            "name":        name,
+            "initials":    initials,
+            "status":      "pending",
+            "phase":       PHASES[0],
+            "cursor":      None,
+            "scanned":     0,
+            "updated":     0,
+            "total":       None,
+            "started_at":  time.time(),
+            "lease_owner": None,
+            "lease_until": 0,
+        })
+        threading.Thread(target=self._run_safely, args=(uid, job_id), daemon=True,
+                         name=f"author-fanout-{uid}").start()
+        return job_id
+
+    def _run_safely(self, uid, job_id):
+        try:
+            self.run(uid, job_id)
+        except Exception:
+            logger.exception("author fan-out crashed for %s", uid)
+
+    def run(self, uid: str, job_id: str = None, rate: float = None) -> dict:
+        """Run (or resume from its checkpoint) the job for `uid`. Blocks."""
+        ref = self.job_ref(uid)
+        job = _claim(db.transaction(), ref, self.owner, job_id)
+        if job is None:
+            return self.status(uid)
+        job["status"] = "running"
+
+        limiter = RateLimiter(rate or getattr(settings, "AUTHOR_FANOUT_RATE", 50), burst=PAGE)
+        target  = {"author_name": job["name"], "author_initials": job["initials"]}
+        if job.get("total") is None:
+            counts = [_count(_query(p, uid)) for p in PHASES]
+            job["total"] = None if None in counts else sum(counts)
+
+        for phase in PHASES[PHASES.index(job["phase"]):]:
+            if phase != job["phase"]:
+                job.update(phase=phase, cursor=None)
+            if not self._run_phase(ref, job, phase, uid, target, limiter):
+                logger.info("author fan-out for %s superseded by a newer job", uid)
+                return self.status(uid)
+
+        job.update(status="done", cursor=None, finished_at=time.time(), eta_seconds=0)
+        self._checkpoint(ref, job, final=True)
+        return self.status(uid)
+
+    def _run_phase(self, ref, job, phase, uid, target, limiter) -> bool:
+        query   = _query(phase, uid)
+        started = time.time()
+        done_at_start = job["scanned"]
+        while True:
+            page = query
+            if job["cursor"]:
+                page = page.start_after({"__name__": db.document(job["cursor"])})
+            snaps = list(page.limit(PAGE).stream())
+            if not snaps:
+                return True
+
+            stale = [s for s in snaps if any((s.to_dict() or {}).get(f) != v for f, v in target.items())]
+            if stale:
+                limiter.acquire(len(stale))
+
+            job["scanned"] += len(snaps)
+            job["updated"] += len(stale)
+            job["cursor"]   = snaps[-1].reference.path
+            if job.get("total"):
+                rate = (job["scanned"] - done_at_start) / max(time.time() - started, 1e-6)
+                job["eta_seconds"] = round(max(job["total"] - job["scanned"], 0) / rate) if rate else None
+            rewritten = self._checkpoint(ref, job, doc_refs=[s.reference for s in stale], target=target)
+            if rewritten is None:
+                return False
+            job["updated"] -= len(stale) - len(rewritten)   # deleted since the scan
+            if rewritten and phase == "posts":
+                search.rename_author([doc_ref.id for doc_ref in rewritten], target["author_name"])
+            if len(snaps) < PAGE:
+                return True
+
+    def _checkpoint(self, ref, job, final: bool = False, doc_refs=(), target=None):
+        """Persist progress (and this page's rewrites); None when a newer job replaced this one."""
+        lease    = (None, 0) if final else (self.owner, time.time() + LEASE_SECONDS)
+        progress = {**job, "lease_owner": lease[0], "lease_until": lease[1]}
+        return _commit_page(db.transaction(), ref, job["job_id"], progress, list(doc_refs), target)
+
+    def status(self, uid: str) -> dict:
+        data = self.job_ref(uid).get().to_dict()
+        if not data:
+            return {"status": "none"}
+        if data.get("status") == "running" and data.get("lease_until", 0) < time.time():
+            data["status"] = "stalled"   # owner died; run_author_fanout resumes it
+        for key in ("lease_owner", "lease_until", "cursor"):
+            data.pop(key, None)
+        return data
+
+    def unfinished(self) -> list:
+        """uids whose job is pending/running/stalled."""
+        docs = (
+            db.collection(Collections.AUTHOR_FANOUT)
+            .where("status", "in", ["pending", "running"])
+            .select([])
+            .stream()
+        )
+        return [doc.id for doc in docs]
+
+
+fanout = AuthorFanout()
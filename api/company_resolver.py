@@ -0,0 +1,176 @@
+"""
+api/company_resolver.py — Map free-form company names to one canonical cache key.
+
+"amazon", "amazon-india", "amazon.com" and "Amazon SDE" must all land on the
+same company_cache document. Resolution order:
+  1. exact slug in the alias table / known ids / existing cache keys
+  2. the alias table / known ids after stripping noise (domains, legal
+     suffixes, geography, role words) — never arbitrary cache keys, so
+     "HCL Tech" and "HCL Software" don't both collapse onto a cached "hcl"
+  3. fuzzy match on trigrams, confirmed by edit distance
+Anything unmatched keeps its full slug, so genuinely new companies still work.
+"""
+
+import re
+import threading
+import time
+from collections import defaultdict
+
+
+_NON_ALNUM = re.compile(r"[^a-z0-9]+")
+_URL_BITS  = re.compile(r"^(?:https?://)?(?:www\.)?|\.(?:com|in|co\.in|io|org|net|ai)(?:/.*)?$")
+
+# Legal suffixes, geography and role words. Words like "tech", "group" or
+# "software" are left alone: they are part of names ("Tech Mahindra", "Tata Group").
+_NOISE = frozenset({
+    "india", "indian", "global", "inc", "ltd", "limited", "pvt", "private", "llc", "llp",
+    "corp", "corporation", "co", "company",
+    "sde", "sde1", "sde2", "sde3", "swe", "intern", "internship", "interview",
+    "interviews", "questions", "careers", "jobs", "hiring", "placement", "placements",
+    "fresher", "freshers", "off", "campus", "oncampus", "offcampus", "guide",
+})
+
+# Hand-maintained aliases → canonical id (normalised slugs on the left).
+ALIASES = {
+    "alphabet":                  "google",
+    "google-llc":                "google",
+    "aws":                       "amazon",
+    "amazon-web-services":       "amazon",
+    "msft":                      "microsoft",
+    "ms":                        "microsoft",
+    "facebook":                  "meta",
+    "fb":                        "meta",
+    "meta-platforms":            "meta",
+    "tata-consultancy":          "tcs",
+    "tata-consultancy-services": "tcs",
+    "tcs-nqt":                   "tcs",
+    "infy":                      "infosys",
+    "goldman-sachs":             "goldman",
+    "gs":                        "goldman",
+    "de-shaw":                   "deshaw",
+    "d-e-shaw":                  "deshaw",
+    "phone-pe":                  "phonepe",
+    "pay-tm":                    "paytm",
+    "cap-gemini":                "capgemini",
+    "flip-kart":                 "flipkart",
+}
+
+FUZZY_MIN_SIMILARITY = 0.6    # trigram Dice coefficient
+CACHE_KEYS_TTL       = 600    # seconds between re-listing company_cache ids
+
+
+def slugify(raw: str) -> str:
+    raw = _URL_BITS.sub("", raw.lower().strip())
+    return _NON_ALNUM.sub("-", raw).strip("-")
+
+
+def strip_noise(slug: str) -> str:
+    kept = [t for t in slug.split("-") if t and t not in _NOISE]
+    return "-".join(kept)
+
+
+def _trigrams(s: str) -> set:
+    s = f"  {s.replace('-', ' ')} "
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def _edit_distance(a: str, b: str, limit: int) -> int:
+    """Levenshtein distance, giving up (returning limit + 1) once it exceeds `limit`."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        cur = [i]
+        for j, cb in enumerate(b, start=1):
+            cur.append(min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb)))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+class CompanyResolver:
+    """
+    `known` is a list of {"id", "name"} dicts (placement_views.POPULAR);
+    `load_cache_keys` returns the ids currently in company_cache.
+    """
+
+    def __init__(self, known: list, load_cache_keys=None):
+        self._lock            = threading.Lock()
+        self._load_cache_keys = load_cache_keys
+        self._keys_loaded_at  = None
+
+        self._exact = {}      # slug → canonical id (known companies + aliases)
+        self._keys  = set()   # company_cache ids, matched only by their exact slug
+        for c in known:
+            for form in (c["id"], slugify(c["name"]), slugify(c["name"]).replace("-", "")):
+                self._exact[form] = c["id"]
+        self._exact.update(ALIASES)
+
+        self._trigram_index = defaultdict(set)   # trigram → canonical ids
+        for cid in set(self._exact.values()):
+            self._index(cid)
+
+    def _index(self, cid: str):
+        for tri in _trigrams(cid):
+            self._trigram_index[tri].add(cid)
+
+    def add(self, company_id: str):
+        """Register a newly cached company so later near-misses resolve to it."""
+        with self._lock:
+            if company_id not in self._exact and company_id not in self._keys:
+                self._keys.add(company_id)
+                self._index(company_id)
+
+    def _refresh_cache_keys(self):
+        if not self._load_cache_keys:
+            return
+        if self._keys_loaded_at is not None and time.monotonic() - self._keys_loaded_at < CACHE_KEYS_TTL:
+            return
+        self._keys_loaded_at = time.monotonic()
+        try:
+            keys = list(self._load_cache_keys())
+        except Exception:
+            return
+        for key in keys:
+            self.add(key)
+
+    def _fuzzy(self, slug: str):
+        grams = _trigrams(slug)
+        with self._lock:
+            candidates = set()
+            for tri in grams:
+                candidates |= self._trigram_index.get(tri, set())
+
+        best, best_score = None, 0.0
+        for cid in candidates:
+            other = _trigrams(cid)
+            score = 2 * len(grams & other) / (len(grams) + len(other))
+            if score > best_score:
+                best, best_score = cid, score
+
+        if best is None or best_score < FUZZY_MIN_SIMILARITY:
+            return None
+        limit = max(1, len(slug) // 4)
+        if _edit_distance(slug.replace("-", ""), best.replace("-", ""), limit) > limit:
+            return None
+        return best
+
+    def resolve(self, raw: str) -> str:
+        slug = slugify(raw)
+        if not slug:
+            return slug
+        self._refresh_cache_keys()
+
+        for form in (slug, slug.replace("-", "")):
+            if form in self._exact:
+                return self._exact[form]
+            if form in self._keys:
+                return form
+
+        stripped = strip_noise(slug) or slug
+        for form in (stripped, stripped.replace("-", "")):
+            if form in self._exact:
+                return self._exact[form]
+
+        return self._fuzzy(stripped) or slug
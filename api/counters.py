@@ -0,0 +1,216 @@
+"""
+api/counters.py — Sharded counters for hot documents.
+
+Firestore sustains roughly one write per second per document, so counters on
+a trending post (or a busy user's stats) are spread over N shard documents:
+
+    posts/{post_id}/counter_shards/{0..N-1}                   {"like_count": 3, "comment_count": 7}
+    posts/{pid}/comments/{cid}/counter_shards/{0..N-1}        {"like_count": 1, "upvote_count": 2}
+    users/{uid}/counter_shards/{0..N-1}                       {"stats": {"posts": 1, "comments": 4}}
+
+An increment hits one random shard. The exact value of a counter is the
+parent's base field plus the sum of the shards; only single-document reads
+that need it (post detail, the toggle response, rescoring) pay for the shard
+read, cached in-process for CACHE_TTL seconds. List views, profiles and the
+dashboard read the base fields, which `manage.py compact_counters --loop`
+keeps current by folding shard sums back in on a schedule.
+
+Only ever raise COUNTER_SHARDS — shards above the configured count are not
+read until they have been compacted.
+"""
+
+import random
+import threading
+import time
+
+from django.conf import settings
+from google.cloud import firestore as gfs
+
+from api.firebase import db
+
+
+SHARDS     = "counter_shards"
+NUM_SHARDS = getattr(settings, "COUNTER_SHARDS", 8)
+CACHE_TTL  = getattr(settings, "COUNTER_CACHE_TTL", 5)
+
+POST_COUNTERS    = ("like_count", "comment_count")
+COMMENT_COUNTERS = ("like_count", "upvote_count")
+
+_cache_lock = threading.Lock()
+_cache: dict = {}   # parent path → (expires_at, {dotted field: delta})
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+
+def _shard_refs(target_ref) -> list:
+    shards = target_ref.collection(SHARDS)
+    return [shards.document(str(i)) for i in range(NUM_SHARDS)]
+
+
+def _nest(deltas: dict) -> dict:
+    """{"stats.posts": 1} → {"stats": {"posts": Increment(1)}} for set(merge=True)."""
+    out = {}
+    for field, n in deltas.items():
+        *parents, leaf = field.split(".")
+        node = out
+        for p in parents:
+            node = node.setdefault(p, {})
+        node[leaf] = gfs.Increment(n)
+    return out
+
+
+def _flatten(data: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in data.items():
+        path = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{path}."))
+        elif isinstance(value, (int, float)):
+            flat[path] = value
+    return flat
+
+
+def _sum(snapshots) -> dict:
+    totals = {}
+    for snap in snapshots:
+        if snap.exists:
+            for field, n in _flatten(snap.to_dict() or {}).items():
+                totals[field] = totals.get(field, 0) + n
+    return totals
+
+
+def _get_path(doc: dict, field: str):
+    node = doc
+    for part in field.split("."):
+        if not isinstance(node, dict):
+            return 0
+        node = node.get(part, 0)
+    return node if isinstance(node, (int, float)) else 0
+
+
+def _set_path(doc: dict, field: str, value):
+    *parents, leaf = field.split(".")
+    node = doc
+    for p in parents:
+        node = node.setdefault(p, {})
+    node[leaf] = value
+
+
+# ── Writes ────────────────────────────────────────────────────────────────────
+
+def increment(target_ref, deltas: dict, writer=None):
+    """
+    Add `deltas` ({field: n}, dotted paths allowed) to one random shard.
+    Pass a transaction or batch as `writer` to include it in that commit.
+    """
+    shard = target_ref.collection(SHARDS).document(str(random.randrange(NUM_SHARDS)))
+    data  = _nest(deltas)
+    if writer is None:
+        shard.set(data, merge=True)
+    else:
+        writer.set(shard, data, merge=True)
+    invalidate(target_ref)
+
+
+def invalidate(target_ref):
+    with _cache_lock:
+        _cache.pop(target_ref.path, None)
+
+
+# ── Reads ─────────────────────────────────────────────────────────────────────
+
+def _cached(path: str):
+    with _cache_lock:
+        entry = _cache.get(path)
+    if entry and entry[0] > time.monotonic():
+        return entry[1]
+    return None
+
+
+def _store(path: str, totals: dict):
+    with _cache_lock:
+        _cache[path] = (time.monotonic() + CACHE_TTL, totals)
+
+
+def deltas(target_ref) -> dict:
+    """Summed shard values for one document, {dotted field: delta}."""
+    totals = _cached(target_ref.path)
+    if totals is None:
+        totals = _sum(db.get_all(_shard_refs(target_ref)))
+        _store(target_ref.path, totals)
+    return totals
+
+
+def deltas_many(target_refs: list) -> dict:
+    """Like deltas() for many documents in one batched read. Keyed by ref path."""
+    out, missing = {}, []
+    for ref in target_refs:
+        totals = _cached(ref.path)
+        if totals is None:
+            missing.append(ref)
+        else:
+            out[ref.path] = totals
+
+    if missing:
+        by_parent = {ref.path: [] for ref in missing}
+        refs = [shard for ref in missing for shard in _shard_refs(ref)]
+        for snap in db.get_all(refs):
+            by_parent[snap.reference.parent.parent.path].append(snap)
+        for path, snaps in by_parent.items():
+            out[path] = _sum(snaps)
+            _store(path, out[path])
+    return out
+
+
+def value(target_ref, field: str, base=0):
+    """Current value of one counter: the base field plus the shard sum."""
+    return max((base or 0) + deltas(target_ref).get(field, 0), 0)
+
+
+def apply(target_ref, doc: dict, fields) -> dict:
+    """Fold shard sums for `fields` into `doc` (a dict read from target_ref) in place."""
+    if doc:
+        _merge(doc, deltas(target_ref), fields)
+    return doc
+
+
+def apply_many(pairs: list, fields) -> list:
+    """apply() for [(ref, doc), ...] with a single batched shard read."""
+    totals = deltas_many([ref for ref, _ in pairs])
+    for ref, doc in pairs:
+        _merge(doc, totals.get(ref.path, {}), fields)
+    return [doc for _, doc in pairs]
+
+
+def _merge(doc: dict, totals: dict, fields):
+    for field in fields:
+        if field in totals:
+            _set_path(doc, field, max(_get_path(doc, field) + totals[field], 0))
+
+
+# ── Compaction ────────────────────────────────────────────────────────────────
+
+@gfs.transactional
+def _compact(transaction, target_ref, shard_refs: list) -> dict:
+    snaps  = list(db.get_all(shard_refs, transaction=transaction))
+    totals = {f: n for f, n in _sum(snaps).items() if n}
+    target = target_ref.get(field_paths=[], transaction=transaction)
+    if not target.exists:
+        for snap in snaps:
+            if snap.exists:
+                transaction.delete(snap.reference)
+        return {}
+
+    if totals:
+        transaction.update(target_ref, {f: gfs.Increment(n) for f, n in totals.items()})
+    for snap in snaps:
+        if snap.exists:
+            transaction.delete(snap.reference)
+    return totals
+
+
+def compact(target_ref, shard_refs: list = None) -> dict:
+    """Move shard sums into the parent's base fields. Returns what was moved."""
+    totals = _compact(db.transaction(), target_ref, shard_refs or _shard_refs(target_ref))
+    invalidate(target_ref)
+    return totals
@@ -7,10 +7,16 @@ Initialises Firebase Admin SDK safely for:
 
 import os
 import json
+import zlib
 import firebase_admin
 from firebase_admin import credentials, firestore, auth
 from django.conf import settings
 
+try:
+    import zstandard
+except ImportError:   # optional — zlib is always available
+    zstandard = None
+
 
 def _init_firebase():
     if firebase_admin._apps:
@@ -60,6 +66,7 @@ _init_firebase()
 db = firestore.client()
 firebase_auth = auth
 SERVER_TS = firestore.SERVER_TIMESTAMP
+DELETE_FIELD = firestore.DELETE_FIELD
 
 
 class Collections:
@@ -68,16 +75,71 @@ class Collections:
     ACTIVE_SESSIONS = "active_sessions"
     POSTS = "posts"
     COMPANY_CACHE = "company_cache"
+    COMPANY_CACHE_META = "company_cache_meta"
+    AUTHOR_FANOUT = "author_fanout"
+    POST_TAGS = "post_tags"
     # ── Study module collections ──────────────────────────────────
     STUDY_MODULES = "study_modules"
     STUDY_LESSONS = "study_lessons"
     USER_PROGRESS = "user_progress"
 
 
+# ── Compressed storage codec ──────────────────────────────────
+# Large AI-generated fields are packed on write into one bytes field:
+#     _packed = <1-byte codec tag> + compress(json({field: value, ...}))
+# and unpacked transparently by doc_to_dict / query_to_list. Documents
+# written before the codec existed have no _packed field and read as-is.
+
+PACKED_FIELD = "_packed"
+_CODEC_ZLIB  = b"\x01"
+_CODEC_ZSTD  = b"\x02"
+
+
+def _compress(raw: bytes, codec: str = None) -> bytes:
+    codec = codec or getattr(settings, "FIRESTORE_COMPRESSION_CODEC", "zstd")
+    if codec == "zstd" and zstandard is not None:
+        return _CODEC_ZSTD + zstandard.ZstdCompressor(level=6).compress(raw)
+    return _CODEC_ZLIB + zlib.compress(raw, 6)
+
+
+def _decompress(blob: bytes) -> bytes:
+    tag, body = blob[:1], blob[1:]
+    if tag == _CODEC_ZLIB:
+        return zlib.decompress(body)
+    if tag == _CODEC_ZSTD:
+        if zstandard is None:
+            raise RuntimeError("Document was packed with zstd but 'zstandard' is not installed")
+        return zstandard.ZstdDecompressor().decompress(body)
+    raise ValueError(f"Unknown storage codec tag {tag!r}")
+
+
+def pack_fields(data: dict, fields, codec: str = None) -> dict:
+    """
+    Move `fields` of `data` into the compressed _packed field when their JSON
+    is at least FIRESTORE_COMPRESSION_MIN_BYTES. Returns `data` (modified).
+    """
+    if not getattr(settings, "FIRESTORE_COMPRESSION", False):
+        return data
+    present = {f: data[f] for f in fields if f in data}
+    raw = json.dumps(present, ensure_ascii=False, separators=(",", ":")).encode()
+    if len(raw) < getattr(settings, "FIRESTORE_COMPRESSION_MIN_BYTES", 2048):
+        return data
+    for f in present:
+        del data[f]
+    data[PACKED_FIELD] = _compress(raw, codec)
+    return data
+
+
+def unpack_fields(data):
+    if data and PACKED_FIELD in data:
+        data.update(json.loads(_decompress(data.pop(PACKED_FIELD))))
+    return data
+
+
 def doc_to_dict(doc):
     if not doc.exists:
         return None
-    data = doc.to_dict()
+    data = unpack_fields(doc.to_dict())
     data["id"] = doc.id
     return data
 
@@ -1,14 +1,151 @@
 import json
+import logging
 import re
 import random
+import threading
 import time
-from groq import Groq
+from collections import deque
+from groq import Groq, RateLimitError, APITimeoutError, APIConnectionError, InternalServerError
 from django.conf import settings
 
+from api.ai_validation import validate_mcq, validate_lesson, validate_pyq, validate_company_guide
+from api.prompts import company_guide_template
+
+
+logger = logging.getLogger(__name__)
 
 client = Groq(api_key=settings.GROQ_API_KEY)
 
-MODEL = "llama-3.3-70b-versatile"
+MODEL      = "llama-3.3-70b-versatile"
+FAST_MODEL = "llama-3.1-8b-instant"
+
+
+# ─────────────────────────────────────────
+# Model routing  (per-task model, token cap, timeout + fallback chain)
+# ─────────────────────────────────────────
+# Each task maps to an ordered list of routes. The first route is preferred;
+# the rest are only tried when the previous one is rate-limited, times out or
+# the provider errors. Override any task via settings.GROQ_MODEL_ROUTES, e.g.
+#   GROQ_MODEL_ROUTES = {"mcq": [{"model": "...", "max_tokens": 4000, "timeout": 30}]}
+
+DEFAULT_ROUTES = {
+    "classification": [
+        {"model": FAST_MODEL, "max_tokens": 4,    "timeout": 5},
+        {"model": MODEL,      "max_tokens": 4,    "timeout": 10},
+    ],
+    "mcq": [
+        {"model": MODEL,      "max_tokens": 6000, "timeout": 45},
+        {"model": FAST_MODEL, "max_tokens": 6000, "timeout": 30},
+    ],
+    "lesson": [
+        {"model": MODEL,      "max_tokens": 8000, "timeout": 60},
+        {"model": FAST_MODEL, "max_tokens": 8000, "timeout": 45},
+    ],
+    "company_guide": [
+        {"model": MODEL,      "max_tokens": 6000, "timeout": 60},
+        {"model": FAST_MODEL, "max_tokens": 6000, "timeout": 45},
+    ],
+}
+
+# Errors that mean "try the next model" rather than "the request is bad".
+_FALLBACK_ERRORS = (RateLimitError, APITimeoutError, APIConnectionError, InternalServerError)
+
+
+def get_routes(task: str) -> list:
+    overrides = getattr(settings, "GROQ_MODEL_ROUTES", None) or {}
+    routes = overrides.get(task) or DEFAULT_ROUTES.get(task)
+    if not routes:
+        raise ValueError(f"No model route configured for task '{task}'")
+    return routes
+
+
+def worst_case_seconds(task: str, calls: int = 1) -> int:
+    """Longest `calls` completions of `task` can take walking the whole fallback chain."""
+    return calls * sum(route.get("timeout") or 60 for route in get_routes(task))
+
+
+# ── Latency tracking ─────────────────────────────────────────
+# Per (task, model) rolling window, kept in-process and logged on every call.
+
+_LATENCY_WINDOW = 200
+_latency_lock   = threading.Lock()
+_latency: dict  = {}
+
+
+def _record_latency(task: str, model: str, elapsed_ms: float, ok: bool):
+    with _latency_lock:
+        entry = _latency.setdefault((task, model), {
+            "calls": 0, "failures": 0, "samples": deque(maxlen=_LATENCY_WINDOW),
+        })
+        entry["calls"] += 1
+        if ok:
+            entry["samples"].append(elapsed_ms)
+        else:
+            entry["failures"] += 1
+        summary = _summarise(entry)
+
+    logger.info(
+        "groq task=%s model=%s ok=%s ms=%.0f p50=%s p95=%s failures=%d/%d",
+        task, model, ok, elapsed_ms, summary["p50_ms"], summary["p95_ms"],
+        entry["failures"], entry["calls"],
+    )
+
+
+def _summarise(entry: dict) -> dict:
+    samples = sorted(entry["samples"])
+    if samples:
+        p50 = round(samples[len(samples) // 2])
+        p95 = round(samples[min(len(samples) - 1, int(len(samples) * 0.95))])
+    else:
+        p50 = p95 = None
+    return {"calls": entry["calls"], "failures": entry["failures"], "p50_ms": p50, "p95_ms": p95}
+
+
+def latency_report() -> dict:
+    """Return {task: {model: {calls, failures, p50_ms, p95_ms}}} for this process."""
+    with _latency_lock:
+        report: dict = {}
+        for (task, model), entry in _latency.items():
+            report.setdefault(task, {})[model] = _summarise(entry)
+        return report
+
+
+def chat_completion(task: str, messages: list, max_tokens: int = None, **params):
+    """
+    Run a chat completion for `task`, walking its fallback chain.
+    `max_tokens` (e.g. a prompt template's output cap) can only lower the
+    route's own cap. Returns the raw Groq response (content + usage).
+    """
+    last_error = None
+
+    for route in get_routes(task):
+        cap = route.get("max_tokens")
+        if max_tokens:
+            cap = min(cap, max_tokens) if cap else max_tokens
+
+        started = time.perf_counter()
+        try:
+            response = client.chat.completions.create(
+                model=route["model"],
+                messages=messages,
+                max_tokens=cap,
+                timeout=route.get("timeout"),
+                **params,
+            )
+        except _FALLBACK_ERRORS as e:
+            _record_latency(task, route["model"], (time.perf_counter() - started) * 1000, ok=False)
+            last_error = e
+            continue
+
+        _record_latency(task, route["model"], (time.perf_counter() - started) * 1000, ok=True)
+        return response
+
+    raise last_error
+
+
+def _complete(task: str, prompt: str, **params) -> str:
+    response = chat_completion(task, [{"role": "user", "content": prompt}], **params)
+    return response.choices[0].message.content
 
 
 def _clean_json(raw: str) -> str:
@@ -17,106 +154,90 @@ def _clean_json(raw: str) -> str:
     return raw.strip()
 
 
+def _parse_list(raw: str, label: str) -> list:
+    """Parse a JSON array, also accepting {"<anything>": [...]} wrappers."""
+    try:
+        parsed = json.loads(raw)
+    except Exception as e:
+        raise ValueError(f"Groq bad JSON ({label}): {e}\nRaw: {raw[:400]}")
+
+    if isinstance(parsed, dict):
+        lists = [v for v in parsed.values() if isinstance(v, list)]
+        if len(lists) == 1:
+            parsed = lists[0]
+    if not isinstance(parsed, list):
+        raise ValueError(f"Expected list of {label}")
+    return parsed
+
+
+def _top_up(label: str, request_more):
+    """
+    Run a follow-up request for missing items. A failed top-up is not fatal:
+    the caller still has the valid items from the first response.
+    """
+    try:
+        return request_more()
+    except (ValueError, *_FALLBACK_ERRORS) as e:
+        logger.warning("groq top-up failed for %s: %s", label, e)
+        return []
+
+
 # ─────────────────────────────────────────
 # Company Guide  (fully AI-generated, company-specific)
 # ─────────────────────────────────────────
 
-def generate_company_guide(company_name: str) -> dict:
-    seed = f"{int(time.time() * 1000) % 99999}_{random.randint(1000, 9999)}"
+MIN_GUIDE_PYQS = 8   # below this, a small follow-up request tops up the PYQs
 
-    prompt = f"""
-You are a senior placement expert with verified knowledge of {company_name}'s actual hiring process.
-Session seed: {seed}
-
-Generate a DETAILED, 100% COMPANY-SPECIFIC interview preparation guide for: {company_name}
-
-════════════════════════════════════════
-ABSOLUTE RULES — every single one is mandatory:
-════════════════════════════════════════
-
-1. PYQS MUST BE REAL, COMPANY-SPECIFIC questions:
-   - These must be questions that have ACTUALLY been asked at {company_name} interviews,
-     sourced from verified platforms like GeeksForGeeks, LeetCode Discuss, Glassdoor,
-     AmbitionBox, or InterviewBit.
-   - Do NOT generate generic DSA questions like "Reverse a linked list" or "Two Sum"
-     unless they are specifically and frequently documented for {company_name}.
-   - For product/FAANG companies (Google, Amazon, Meta, Microsoft, Adobe, Oracle, Goldman Sachs, D.E. Shaw):
-     * Include their specific algorithmic problems with exact problem descriptions
-     * Include system design questions they actually ask (e.g. "Design Google Search", "Design Amazon's recommendation system")
-     * Include behavioral/LP questions unique to their culture
-   - For service companies (TCS, Infosys, Wipro, Capgemini, Accenture, Deloitte):
-     * Include their specific OA test questions (NQT patterns, AMCAT, Cocubes)
-     * Include the specific pseudocode/output-tracing questions they use
-     * Include their specific aptitude question patterns
-   - For fintech/startup companies (Swiggy, Zomato, Paytm, PhonePe):
-     * Include their specific system design questions (e.g. "Design Swiggy's delivery tracking")
-     * Include their product-specific questions
-   - Generate at least 8-10 PYQs with different tags
-
-2. ROUNDS must reflect {company_name}'s ACTUAL interview process:
-   - Use the real round names (e.g. "TCS NQT", "Amazon Bar Raiser", "Google Onsite", "Infosys HackWithInfy")
-   - Use real platform names (HackerRank for Amazon OA, Codility for Microsoft, etc.)
-   - Use real durations and formats
-   - Include the correct number of rounds
-
-3. TIPS must be {company_name}-SPECIFIC:
-   - Mention their actual evaluation criteria
-   - Mention their specific culture/values (Amazon Leadership Principles, Google Googleyness, etc.)
-   - Mention their specific interview quirks or known patterns
-
-4. TAGLINE must be witty and specific to {company_name}, not generic.
-
-5. Every field must be accurate and non-generic. If you are uncertain about a detail,
-   use the most commonly reported version from interview experience databases.
-
-════════════════════════════════════════
-Return ONLY valid JSON matching this exact schema (no extra text, no markdown):
-════════════════════════════════════════
-
-{{
-  "name": "{company_name}",
-  "tagline": "<witty, {company_name}-specific tagline>",
-  "about": "<2–3 sentences specific to {company_name}'s interview culture and what they look for>",
-  "package": "<realistic salary range in LPA for India fresher/SDE-1>",
-  "difficulty": "Easy | Medium | Hard",
-  "rounds": <integer — actual number of rounds>,
-  "roles": ["<actual roles {company_name} hires for>"],
-  "rounds_detail_list": [
-    {{
-      "name": "<actual round name>",
-      "type": "OA | Technical | HR | Behavioral | System",
-      "duration": "<real duration>",
-      "desc": "<specific description of what happens in this round at {company_name}>"
-    }}
-  ],
-  "pyqs": [
-    {{
-      "q": "<actual question asked at {company_name} — specific, not generic>",
-      "tag": "<topic tag>",
-      "difficulty": "Easy | Medium | Hard",
-      "freq": "High | Medium | Low"
-    }}
-  ],
-  "tips": ["<company-specific tip>"],
-  "resources": [
-    {{ "title": "<resource name>", "type": "Practice | Book | Guide | PYQ | Video" }}
-  ]
-}}
-"""
 
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
+def generate_company_guide(company_name: str, template: str = None) -> dict:
+    seed = f"{int(time.time() * 1000) % 99999}_{random.randint(1000, 9999)}"
+
+    tpl      = company_guide_template(template)
+    response = chat_completion(
+        "company_guide",
+        tpl.render(company_name=company_name, seed=seed),
+        max_tokens=tpl.max_tokens,
         temperature=0.5,   # Lower temp for factual accuracy
     )
+    content = response.choices[0].message.content
 
-    raw = _clean_json(response.choices[0].message.content)
+    raw = _clean_json(content)
 
     try:
-        return json.loads(raw)
+        parsed = json.loads(raw)
     except Exception as e:
         raise ValueError(f"Groq invalid JSON: {e}\nRaw: {raw[:400]}")
 
+    guide = tpl.enforce_limits(validate_company_guide(parsed, company_name))
+
+    missing = MIN_GUIDE_PYQS - len(guide["pyqs"])
+    if missing > 0:
+        extra = _top_up("pyqs", lambda: _request_pyqs(company_name, missing, guide["pyqs"]))
+        guide["pyqs"].extend(extra[:missing])
+
+    return guide
+
+
+def _request_pyqs(company_name: str, count: int, existing: list) -> list:
+    asked = "\n".join(f"- {p['q'][:100]}" for p in existing)
+    prompt = f"""
+List {count} more REAL interview questions actually asked at {company_name}
+(GeeksForGeeks / LeetCode Discuss / Glassdoor reports). Do not repeat:
+{asked or "- (none yet)"}
+
+Return ONLY a JSON array:
+[{{"q": "...", "tag": "<topic>", "difficulty": "Easy | Medium | Hard", "freq": "High | Medium | Low"}}]
+"""
+    content = _complete("company_guide", prompt, temperature=0.5)
+    seen = {p["q"].lower() for p in existing}
+    pyqs = []
+    for item in _parse_list(_clean_json(content), "pyqs"):
+        pyq = validate_pyq(item)
+        if pyq and pyq["q"].lower() not in seen:
+            seen.add(pyq["q"].lower())
+            pyqs.append(pyq)
+    return pyqs
+
 
 # ─────────────────────────────────────────
 # Topic subtopics map — forces variety in MCQ generation
@@ -218,7 +339,7 @@ _QUESTION_ANGLES = [
 # MCQ Generation  (anti-repeat)
 # ─────────────────────────────────────────
 
-def generate_mcq_questions(topic: str, difficulty: str, count: int = 10) -> list:
+def _mcq_prompt(topic: str, difficulty: str, count: int, avoid: list = ()) -> str:
     subtopics = _TOPIC_SUBTOPICS.get(topic, [topic])
     chosen_subtopics = random.sample(subtopics, min(count, len(subtopics)))
     while len(chosen_subtopics) < count:
@@ -231,8 +352,13 @@ def generate_mcq_questions(topic: str, difficulty: str, count: int = 10) -> list
         f"  Q{i+1}: subtopic='{chosen_subtopics[i]}', angle='{chosen_angles[i]}'"
         for i in range(count)
     )
+    avoid_block = ""
+    if avoid:
+        avoid_block = "\nDo NOT repeat or paraphrase these existing questions:\n" + "\n".join(
+            f"  - {q[:100]}" for q in avoid
+        ) + "\n"
 
-    prompt = f"""
+    return f"""
 You are a strict MCQ generator. Session seed: {seed_token}
 
 Generate exactly {count} UNIQUE multiple-choice questions for:
@@ -251,7 +377,7 @@ STRICT RULES — you MUST follow all of them:
 
 Per-question assignments (strictly follow):
 {directives}
-
+{avoid_block}
 JSON schema (return an array of exactly {count} objects):
 [
   {{
@@ -266,32 +392,43 @@ JSON schema (return an array of exactly {count} objects):
 ]
 """
 
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
+
+def _request_mcqs(topic: str, difficulty: str, count: int, avoid: list = ()) -> list:
+    content = _complete(
+        "mcq",
+        _mcq_prompt(topic, difficulty, count, avoid),
         temperature=0.95,
         seed=random.randint(1, 2**31 - 1),
     )
+    return _parse_list(_clean_json(content), "questions")
 
-    raw = _clean_json(response.choices[0].message.content)
-
-    try:
-        questions = json.loads(raw)
-    except Exception as e:
-        raise ValueError(f"Groq bad JSON: {e}\nRaw: {raw[:400]}")
-
-    if not isinstance(questions, list):
-        raise ValueError("Expected list of questions")
 
+def generate_mcq_questions(topic: str, difficulty: str, count: int = 10) -> list:
     seen_questions: set[str] = set()
     unique = []
-    for q in questions:
-        key = q.get("question", "").strip().lower()[:80]
-        if key not in seen_questions:
-            seen_questions.add(key)
-            unique.append(q)
 
-    return unique
+    def accept(items):
+        for item in items:
+            q = validate_mcq(item, difficulty)
+            if not q:
+                continue
+            key = q["question"].lower()[:80]
+            if key not in seen_questions:
+                seen_questions.add(key)
+                unique.append(q)
+
+    accept(_request_mcqs(topic, difficulty, count))
+
+    # Only ask for what was dropped — never regenerate the whole set.
+    missing = count - len(unique)
+    if missing > 0:
+        avoid = [q["question"] for q in unique]
+        accept(_top_up("questions", lambda: _request_mcqs(topic, difficulty, missing, avoid)))
+
+    if not unique:
+        raise ValueError("Groq returned no valid questions")
+
+    return unique[:count]
 
 # ─────────────────────────────────────────
 # 🔎 AI Technical Subject Validation
@@ -313,13 +450,7 @@ YES
 NO
 """
 
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0,
-    )
-
-    answer = response.choices[0].message.content.strip().upper()
+    answer = _complete("classification", prompt, temperature=0).strip().upper()
     return "YES" in answer
 
 
@@ -368,29 +499,38 @@ Return JSON array like:
 ]
 """
 
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7,
-    )
+    content = _complete("lesson", prompt, temperature=0.7)
+    lessons = [l for l in map(validate_lesson, _parse_list(_clean_json(content), "lessons")) if l]
+    lessons = lessons[:lesson_count]
 
-    raw = _clean_json(response.choices[0].message.content)
+    # Top up only the missing tail of the module, continuing where we stopped.
+    missing = lesson_count - len(lessons)
+    if missing > 0:
+        lessons.extend(_top_up(
+            "lessons",
+            lambda: _request_more_lessons(subject_name, module_title, lesson_count, lessons, missing),
+        )[:missing])
 
-    try:
-        lessons = json.loads(raw)
-    except Exception as e:
-        raise ValueError(f"Groq bad JSON (Study Module): {e}\nRaw: {raw[:400]}")
-
-    if not isinstance(lessons, list):
-        raise ValueError("Expected list of lessons")
-
-    cleaned = []
-    for idx, lesson in enumerate(lessons[:lesson_count], start=1):
-        cleaned.append({
-            "title": lesson.get("title", f"Lesson {idx}"),
-            "type": lesson.get("type", "theory"),
-            "content": lesson.get("content", ""),
-            "order": idx,
-        })
+    if not lessons:
+        raise ValueError("Groq returned no usable lessons")
+
+    return [{**lesson, "order": idx} for idx, lesson in enumerate(lessons, start=1)]
+
+
+def _request_more_lessons(subject_name: str, module_title: str, lesson_count: int,
+                          existing: list, missing: int) -> list:
+    covered = "\n".join(f"  {i}. {l['title']}" for i, l in enumerate(existing, start=1))
+    prompt = f"""
+You are a senior software engineering educator continuing a {lesson_count}-lesson module.
 
-    return cleaned
\ No newline at end of file
+Subject: {subject_name}
+Module: {module_title}
+Lessons already written:
+{covered or "  (none)"}
+
+Write the next {missing} lesson(s), continuing the basic → advanced progression.
+The final 30–40% of the module should be practice/interview-focused.
+Return ONLY a JSON array of {{"title": "...", "type": "theory" or "practice", "content": "..."}}.
+"""
+    content = _complete("lesson", prompt, temperature=0.7)
+    return [l for l in map(validate_lesson, _parse_list(_clean_json(content), "lessons")) if l]
@@ -0,0 +1,95 @@
+"""
+api/guide_cache.py — In-process LRU in front of the company_cache collection.
+
+Hot guides are kept as ready-to-send JSON response bodies, so a hit costs a
+dict lookup instead of a Firestore read + deserialise + re-serialise.
+
+Entries are versioned per company: each remembers the guide's `_cached_at`
+stamp, and an entry older than VALIDATE_SECONDS is re-checked against that
+one company's document with a single-field read before it is served. A
+regeneration, refresh or delete on any worker therefore reaches every other
+worker within VALIDATE_SECONDS, without a shared version document and
+without dropping the other companies' entries. CURRENT_CACHE_VERSION is part
+of every entry, so a deploy that bumps it never serves an old body either.
+"""
+
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework.utils.encoders import JSONEncoder
+
+from api.firebase import db, Collections
+
+
+logger = logging.getLogger(__name__)
+
+STAMP_FIELD      = "_cached_at"
+VALIDATE_SECONDS = getattr(settings, "COMPANY_GUIDE_LRU_VALIDATE", 5)
+
+
+class GuideCache:
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl         = ttl
+        self._entries    = OrderedDict()   # company_id → [expires_at, cache_version, stamp, checked_at, body]
+        self._lock       = threading.Lock()
+
+    def _still_current(self, company_id: str, stamp) -> bool:
+        """Light read of one company: is the stored guide still the one we cached?"""
+        try:
+            snap = db.collection(Collections.COMPANY_CACHE).document(company_id).get(field_paths=[STAMP_FIELD])
+        except Exception as e:
+            logger.warning("guide cache validation failed for %s: %s", company_id, e)
+            return True   # keep serving the cached body rather than fail the request
+        return snap.exists and (snap.to_dict() or {}).get(STAMP_FIELD) == stamp
+
+    def get(self, company_id: str, cache_version: int):
+        """Return the cached response body (bytes) or None."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(company_id)
+            if not entry:
+                return None
+            expires_at, version, stamp, checked_at, body = entry
+            if expires_at < now or version != cache_version:
+                del self._entries[company_id]
+                return None
+            self._entries.move_to_end(company_id)
+
+        if now - checked_at >= VALIDATE_SECONDS:
+            if not self._still_current(company_id, stamp):
+                self.invalidate(company_id)
+                return None
+            with self._lock:
+                if self._entries.get(company_id) is entry:
+                    entry[3] = time.monotonic()
+        return body
+
+    def put(self, company_id: str, cache_version: int, payload: dict, stamp) -> bytes:
+        """Cache a response body; `stamp` is the stored guide's _cached_at."""
+        body = json.dumps(payload, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":")).encode()
+        now  = time.monotonic()
+        with self._lock:
+            self._entries[company_id] = [now + self.ttl, cache_version, stamp, now, body]
+            self._entries.move_to_end(company_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return body
+
+    def invalidate(self, company_id: str = None):
+        """Drop one guide (or all) from this worker; others notice on their next validation."""
+        with self._lock:
+            if company_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(company_id, None)
+
+
+guide_cache = GuideCache(
+    max_entries=getattr(settings, "COMPANY_GUIDE_LRU_SIZE", 64),
+    ttl=getattr(settings, "COMPANY_GUIDE_LRU_TTL", 600),
+)
@@ -0,0 +1,203 @@
+"""
+api/guide_migrator.py — Rolling regeneration of stale company guides.
+
+After CURRENT_CACHE_VERSION is bumped, stale guides keep being served while
+this migrator regenerates them in the background at a controlled rate,
+most-visited companies first. Only one worker process migrates at a time
+(a lease in company_cache_meta/migration); progress and ETA are written to
+the same document so any worker can report them.
+"""
+
+import logging
+import threading
+import time
+import uuid
+from collections import Counter
+
+from django.conf import settings
+from google.api_core.exceptions import NotFound
+from google.cloud import firestore as gfs
+
+from api.firebase import db, Collections
+from api.groq_ai import worst_case_seconds
+from api.utils import RateLimiter
+
+
+logger = logging.getLogger(__name__)
+
+LEASE_MARGIN       = 30     # seconds of slack on top of one guide's worst case
+RESTART_COOLDOWN   = 60     # stale hits re-check the lease at most this often
+MIGRATION_DOC      = "migration"
+
+
+# ── Access popularity ─────────────────────────────────────────────────────────
+# Hits are counted in-process and flushed as Increments, so a hot guide costs
+# one extra write per ACCESS_FLUSH_EVERY hits rather than one per read.
+
+ACCESS_FLUSH_EVERY   = 50
+ACCESS_FLUSH_SECONDS = 60
+
+_access_lock       = threading.Lock()
+_access_counts     = Counter()
+_access_last_flush = time.monotonic()
+
+
+def record_access(company_id: str):
+    global _access_last_flush
+    with _access_lock:
+        _access_counts[company_id] += 1
+        due = (
+            sum(_access_counts.values()) >= ACCESS_FLUSH_EVERY
+            or time.monotonic() - _access_last_flush >= ACCESS_FLUSH_SECONDS
+        )
+        if not due:
+            return
+        pending = dict(_access_counts)
+        _access_counts.clear()
+        _access_last_flush = time.monotonic()
+
+    # update() (not set) so a guide deleted meanwhile is not resurrected as a stub
+    refs  = {cid: db.collection(Collections.COMPANY_CACHE).document(cid) for cid in pending}
+    batch = db.batch()
+    for cid, hits in pending.items():
+        batch.update(refs[cid], {"access_count": gfs.Increment(hits)})
+    try:
+        batch.commit()
+    except NotFound:
+        for cid, hits in pending.items():
+            try:
+                refs[cid].update({"access_count": gfs.Increment(hits)})
+            except NotFound:
+                pass
+    except Exception as e:
+        logger.warning("access count flush failed: %s", e)
+
+
+def _pending_access(company_id: str) -> int:
+    with _access_lock:
+        return _access_counts.get(company_id, 0)
+
+
+# ── Migrator ──────────────────────────────────────────────────────────────────
+
+def lease_seconds(rate: float) -> float:
+    """
+    How long one renewal must hold: the wait for the next rate-limit slot plus
+    a guide generated over the whole fallback chain twice (main call + PYQ top-up).
+    """
+    return 1 / rate + worst_case_seconds("company_guide", calls=2) + LEASE_MARGIN
+
+
+@gfs.transactional
+def _take_lease(transaction, ref, owner: str, seconds: float) -> bool:
+    data = (ref.get(transaction=transaction).to_dict() or {})
+    if data.get("lease_owner") not in (None, owner) and data.get("lease_until", 0) > time.time():
+        return False
+    transaction.set(ref, {"lease_owner": owner, "lease_until": time.time() + seconds}, merge=True)
+    return True
+
+
+class GuideMigrator:
+    def __init__(self):
+        self.owner         = uuid.uuid4().hex[:12]
+        self._lock         = threading.Lock()
+        self._thread       = None
+        self._last_started = 0.0
+
+    @property
+    def _meta_ref(self):
+        return db.collection(Collections.COMPANY_CACHE_META).document(MIGRATION_DOC)
+
+    def is_running(self) -> bool:
+        return bool(self._thread and self._thread.is_alive())
+
+    def start(self, rate: float = None, force: bool = False) -> bool:
+        """
+        Start a background migration in this process. Returns False if one is
+        already running here, or (unless `force`) one was started recently.
+        """
+        with self._lock:
+            if self.is_running():
+                return False
+            if not force and time.monotonic() - self._last_started < RESTART_COOLDOWN:
+                return False
+            self._last_started = time.monotonic()
+            self._thread = threading.Thread(target=self._run_safely, args=(rate,), daemon=True,
+                                            name="guide-migrator")
+            self._thread.start()
+            return True
+
+    def _run_safely(self, rate):
+        try:
+            self.run(rate)
+        except Exception:
+            logger.exception("guide migration crashed")
+
+    def stale_ids(self) -> list:
+        """Stale company ids, most accessed first."""
+        from api.views.placement_views import CURRENT_CACHE_VERSION
+
+        docs = db.collection(Collections.COMPANY_CACHE).select(["cache_version", "access_count"]).stream()
+        stale = []
+        for doc in docs:
+            data = doc.to_dict() or {}
+            if data.get("cache_version", 0) < CURRENT_CACHE_VERSION:
+                stale.append((data.get("access_count", 0) + _pending_access(doc.id), doc.id))
+        stale.sort(reverse=True)
+        return [cid for _, cid in stale]
+
+    def run(self, rate: float = None) -> dict:
+        """Migrate every stale guide. Blocks; returns the final progress dict."""
+        from api.views.placement_views import CURRENT_CACHE_VERSION, generate_and_cache_guide
+
+        rate  = rate or getattr(settings, "COMPANY_GUIDE_MIGRATION_RATE", 0.2)
+        lease = lease_seconds(rate)
+        if not _take_lease(db.transaction(), self._meta_ref, self.owner, lease):
+            logger.info("guide migration already running in another worker")
+            return self.status()
+
+        limiter  = RateLimiter(rate)
+        pending  = self.stale_ids()
+        started  = time.time()
+        progress = {
+            "running":        True,
+            "target_version": CURRENT_CACHE_VERSION,
+            "total":          len(pending),
+            "done":           0,
+            "failed":         0,
+            "current":        None,
+            "started_at":     started,
+            "eta_seconds":    None,
+        }
+        self._meta_ref.set({**progress, "lease_until": time.time() + lease}, merge=True)   # after the stale scan
+
+        for company_id in pending:
+            limiter.acquire()
+            progress["current"] = company_id
+            try:
+                generate_and_cache_guide(company_id)
+                progress["done"] += 1
+            except Exception as e:
+                progress["failed"] += 1
+                logger.warning("guide migration failed for %s: %s", company_id, e)
+
+            finished = progress["done"] + progress["failed"]
+            per_item = (time.time() - started) / finished
+            progress["eta_seconds"] = round(per_item * (progress["total"] - finished))
+            self._meta_ref.set({**progress, "lease_owner": self.owner,
+                                "lease_until": time.time() + lease}, merge=True)
+
+        progress.update({"running": False, "current": None, "eta_seconds": 0, "finished_at": time.time()})
+        self._meta_ref.set({**progress, "lease_owner": None, "lease_until": 0}, merge=True)
+        return progress
+
+    def status(self) -> dict:
+        data = self._meta_ref.get().to_dict() or {}
+        data.pop("lease_owner", None)
+        if data.get("running") and data.pop("lease_until", 0) < time.time():
+            data["running"] = False   # owner died without finishing
+        data.pop("lease_until", None)
+        return data
+
+
+migrator = GuideMigrator()
@@ -0,0 +1,150 @@
+"""
+api/idempotency.py — Idempotency-Key support for expensive POST handlers.
+
+    class GenerateTestView(APIView):
+        @idempotent()
+        def post(self, request): ...
+
+The first response for (uid, view, key) is stored in Django's cache for a
+short TTL and replayed for any repeat with the same key. A repeat that
+arrives while the original is still running waits for it instead of
+executing again — in-process via an Event, across workers via a cache lock.
+If the original fails (5xx or an exception) the lock is released and a
+waiting repeat runs the handler itself. Reusing a key with a different body
+is rejected with 422.
+"""
+
+import functools
+import hashlib
+import json
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+from api.utils import get_uid
+
+
+HEADER        = "Idempotency-Key"
+POLL_INTERVAL = 0.25
+LOCK_MARGIN   = 10   # seconds of slack on top of the handler's worst case
+
+_inflight_lock = threading.Lock()
+_inflight: dict = {}   # cache key → threading.Event
+
+
+def _fingerprint(request) -> str:
+    try:
+        body = json.dumps(request.data, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        body = repr(request.data)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+def _replay(stored: dict) -> Response:
+    return Response(stored["data"], status=stored["status"], headers={"Idempotent-Replayed": "true"})
+
+
+def _wait_for(cache_key: str, lock_key: str, deadline: float):
+    """
+    Poll for another worker's result. Returns it, or None when the deadline
+    passes or the lock is released without a result (the leader failed).
+    """
+    while time.monotonic() < deadline:
+        stored = cache.get(cache_key)
+        if stored is not None:
+            return stored
+        if cache.get(lock_key) is None:
+            return cache.get(cache_key)
+        time.sleep(POLL_INTERVAL)
+    return None
+
+
+def _in_progress() -> Response:
+    return Response({"error": True, "detail": "Original request is still in progress."}, status=409)
+
+
+def idempotent(ttl: int = None, wait_timeout: int = None, lock_seconds=None):
+    """
+    `lock_seconds` is the handler's worst-case run time (a number, or a
+    callable evaluated per request, e.g. from the Groq fallback chain's
+    timeouts). The cross-worker lock lives that long, so it cannot expire
+    under a slow leader and let a repeat run the handler twice. Settings are
+    read per request.
+    """
+    def decorator(handler):
+        @functools.wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            key = request.headers.get(HEADER, "").strip()
+            if not key:
+                return handler(view, request, *args, **kwargs)
+            if len(key) > 255:
+                return Response({"error": True, "detail": f"{HEADER} is too long."}, status=400)
+
+            store_for = ttl or getattr(settings, "IDEMPOTENCY_TTL_SECONDS", 600)
+            wait_for  = wait_timeout or getattr(settings, "IDEMPOTENCY_WAIT_SECONDS", 60)
+            lock_for  = lock_seconds() if callable(lock_seconds) else lock_seconds
+            lock_for  = int(lock_for or getattr(settings, "IDEMPOTENCY_LOCK_SECONDS", 60)) + LOCK_MARGIN
+            deadline  = time.monotonic() + wait_for
+
+            digest      = hashlib.sha256(f"{get_uid(request)}:{handler.__qualname__}:{key}".encode()).hexdigest()
+            cache_key   = f"idem:{digest}"
+            lock_key    = f"idem-lock:{digest}"
+            fingerprint = _fingerprint(request)
+
+            def respond(stored):
+                if stored["fingerprint"] != fingerprint:
+                    return Response(
+                        {"error": True, "detail": f"{HEADER} was already used with a different request body."},
+                        status=422,
+                    )
+                return _replay(stored)
+
+            # Loops only when a leader finished without storing a result
+            # (5xx or exception): the next waiter then runs the handler itself.
+            while True:
+                stored = cache.get(cache_key)
+                if stored is not None:
+                    return respond(stored)
+                if time.monotonic() >= deadline:
+                    return _in_progress()
+
+                # Same process: followers block on the leader's Event.
+                with _inflight_lock:
+                    event  = _inflight.get(cache_key)
+                    leader = event is None
+                    if leader:
+                        event = _inflight[cache_key] = threading.Event()
+
+                if not leader:
+                    event.wait(max(deadline - time.monotonic(), 0))
+                    continue
+
+                try:
+                    # Other workers: only one may hold the lock; the rest poll for the result.
+                    if cache.add(lock_key, 1, timeout=lock_for):
+                        try:
+                            response = handler(view, request, *args, **kwargs)
+                            # 5xx are transient — let the client retry with the same key
+                            if response.status_code < 500:
+                                cache.set(cache_key, {
+                                    "status":      response.status_code,
+                                    "data":        response.data,
+                                    "fingerprint": fingerprint,
+                                }, timeout=store_for)
+                            return response
+                        finally:
+                            cache.delete(lock_key)
+                finally:
+                    with _inflight_lock:
+                        _inflight.pop(cache_key, None)
+                    event.set()
+
+                stored = _wait_for(cache_key, lock_key, deadline)
+                if stored is not None:
+                    return respond(stored)
+
+        return wrapper
+    return decorator
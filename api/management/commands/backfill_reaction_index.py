@@ -0,0 +1,77 @@
+"""
+api/management/commands/backfill_reaction_index.py
+
+Copy the legacy `likes` / `upvotes` UID arrays on posts and comments into
+posts/{post_id}/reaction_index/{uid}, so liked_by_me / upvoted_by_me stay
+correct for reactions made before the index existed. Idempotent (merge +
+ArrayUnion), so it can be re-run safely.
+
+    python manage.py backfill_reaction_index --dry-run
+    python manage.py backfill_reaction_index --rate 200
+
+Once it has run and liked_by_me / upvoted_by_me check out, set
+REACTION_INDEX_BACKFILLED=True so views stop reading the legacy arrays.
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+from google.cloud import firestore as gfs
+
+from api.firebase import db, Collections
+from api.reactions import COMMENT_INDEX_FIELDS, FIELDS, LIKE, UPVOTE, index_ref
+from api.utils import RateLimiter, positive_float
+
+
+MAX_BATCH = 500   # Firestore limit per write batch
+
+
+class Command(BaseCommand):
+    help = "Build reaction_index documents from legacy likes/upvotes arrays."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rate", type=positive_float, default=100, help="Max index writes per second.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count the index writes.")
+
+    def handle(self, *args, **opts):
+        started = time.perf_counter()
+        limiter = RateLimiter(opts["rate"], burst=MAX_BATCH)
+        posts   = writes = 0
+
+        for post in db.collection(Collections.POSTS).select([FIELDS[LIKE][0]]).stream():
+            post_ref = post.reference
+            updates  = {}   # uid → merge payload for that user's index doc
+
+            for uid in (post.to_dict() or {}).get(FIELDS[LIKE][0]) or []:
+                updates.setdefault(uid, {})["post_liked"] = True
+
+            comments = post_ref.collection("comments").select([FIELDS[LIKE][0], FIELDS[UPVOTE][0]])
+            reacted  = {}   # (uid, index field) → [comment ids]
+            for comment in comments.stream():
+                data = comment.to_dict() or {}
+                for kind, index_field in COMMENT_INDEX_FIELDS.items():
+                    for uid in data.get(FIELDS[kind][0]) or []:
+                        reacted.setdefault((uid, index_field), []).append(comment.id)
+            for (uid, index_field), ids in reacted.items():
+                updates.setdefault(uid, {})[index_field] = gfs.ArrayUnion(ids)
+
+            posts  += 1
+            writes += len(updates)
+            if updates and not opts["dry_run"]:
+                self._write(post_ref, updates, limiter)
+
+        verb = "would write" if opts["dry_run"] else "wrote"
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {posts} posts, {verb} {writes} index documents in {time.perf_counter() - started:.1f}s"
+        ))
+
+    @staticmethod
+    def _write(post_ref, updates: dict, limiter: RateLimiter):
+        items = list(updates.items())
+        for start in range(0, len(items), MAX_BATCH):
+            chunk = items[start:start + MAX_BATCH]
+            limiter.acquire(len(chunk))
+            batch = db.batch()
+            for uid, payload in chunk:
+                batch.set(index_ref(post_ref, uid), payload, merge=True)
+            batch.commit()
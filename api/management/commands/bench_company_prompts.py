@@ -0,0 +1,88 @@
+"""
+api/management/commands/bench_company_prompts.py
+
+Compare company-guide prompt templates on latency and token usage:
+
+    python manage.py bench_company_prompts
+    python manage.py bench_company_prompts --companies Google TCS --runs 3
+    python manage.py bench_company_prompts --estimate-only     # no API calls
+"""
+
+import json
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.ai_validation import validate_company_guide
+from api.prompts import COMPANY_GUIDE_TEMPLATES, estimate_tokens
+
+
+class Command(BaseCommand):
+    help = "Benchmark latency and tokens of the company guide prompt templates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--companies", nargs="+", default=["Google", "Amazon", "TCS"])
+        parser.add_argument("--templates", nargs="+", default=list(COMPANY_GUIDE_TEMPLATES),
+                            choices=list(COMPANY_GUIDE_TEMPLATES))
+        parser.add_argument("--runs", type=int, default=1, help="Runs per company per template.")
+        parser.add_argument("--estimate-only", action="store_true",
+                            help="Only report estimated prompt tokens; do not call Groq.")
+
+    def handle(self, *args, **opts):
+        rows = []
+        for name in opts["templates"]:
+            tpl = COMPANY_GUIDE_TEMPLATES[name]
+            est = tpl.estimate(tpl.render(company_name=opts["companies"][0], seed="00000_0000"))
+            static = estimate_tokens(tpl.system)
+
+            if opts["estimate_only"]:
+                rows.append((name, est, static, None))
+                continue
+
+            samples = [self._run(tpl, company) for company in opts["companies"] for _ in range(opts["runs"])]
+            rows.append((name, est, static, samples))
+
+        self._report(rows)
+
+    def _run(self, tpl, company: str) -> dict:
+        from api.groq_ai import chat_completion, _clean_json
+
+        messages = tpl.render(company_name=company, seed=f"{int(time.time()) % 99999}_bench")
+        started  = time.perf_counter()
+        response = chat_completion("company_guide", messages, max_tokens=tpl.max_tokens, temperature=0.5)
+        elapsed  = (time.perf_counter() - started) * 1000
+
+        usage = getattr(response, "usage", None)
+        try:
+            guide = validate_company_guide(json.loads(_clean_json(response.choices[0].message.content)), company)
+            valid, pyqs = True, len(guide["pyqs"])
+        except ValueError:
+            valid, pyqs = False, 0
+
+        return {
+            "ms":         elapsed,
+            "prompt":     getattr(usage, "prompt_tokens", 0) or 0,
+            "completion": getattr(usage, "completion_tokens", 0) or 0,
+            "valid":      valid,
+            "pyqs":       pyqs,
+        }
+
+    def _report(self, rows):
+        self.stdout.write(
+            f"{'template':<10} {'est_prompt':>10} {'static':>7} {'p50_ms':>8} {'max_ms':>8} "
+            f"{'prompt':>7} {'compl':>7} {'valid':>6} {'pyqs':>5}"
+        )
+        for name, est, static, samples in rows:
+            if not samples:
+                self.stdout.write(f"{name:<10} {est:>10} {static:>7}")
+                continue
+            ms = [s["ms"] for s in samples]
+            self.stdout.write(
+                f"{name:<10} {est:>10} {static:>7} "
+                f"{statistics.median(ms):>8.0f} {max(ms):>8.0f} "
+                f"{statistics.mean(s['prompt'] for s in samples):>7.0f} "
+                f"{statistics.mean(s['completion'] for s in samples):>7.0f} "
+                f"{sum(s['valid'] for s in samples):>3}/{len(samples):<2} "
+                f"{statistics.mean(s['pyqs'] for s in samples):>5.1f}"
+            )
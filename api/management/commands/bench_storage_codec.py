@@ -0,0 +1,99 @@
+"""
+api/management/commands/bench_storage_codec.py
+
+Size and latency impact of the compressed storage codec on real documents:
+
+    python manage.py bench_storage_codec                       # company_cache, study_lessons, active_sessions
+    python manage.py bench_storage_codec --collection company_cache --limit 50
+    python manage.py bench_storage_codec --synthetic            # no Firestore access
+"""
+
+import json
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.firebase import _compress, _decompress, unpack_fields, zstandard
+
+
+_FIELDS = {
+    "company_cache":   ("about", "rounds_detail_list", "pyqs", "tips", "resources", "roles"),
+    "study_lessons":   ("content",),
+    "active_sessions": ("questions",),
+}
+
+
+def _synthetic_docs(n: int) -> list:
+    words = ("array graph heap round interview system design latency cache tree "
+             "amazon google hashing window pointer string dynamic recursion").split()
+    sentence = lambda k: " ".join(random.choice(words) for _ in range(k)).capitalize() + "."
+    return [{
+        "about": sentence(60),
+        "pyqs": [{"q": sentence(25), "tag": "DSA", "difficulty": "Medium", "freq": "High"} for _ in range(10)],
+        "rounds_detail_list": [{"name": f"Round {i}", "type": "Technical", "duration": "60 min",
+                                "desc": sentence(40)} for i in range(5)],
+        "tips": [sentence(20) for _ in range(6)],
+    } for _ in range(n)]
+
+
+class Command(BaseCommand):
+    help = "Benchmark compressed-field size and encode/decode latency per codec."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--collection", choices=list(_FIELDS), action="append")
+        parser.add_argument("--limit", type=int, default=20, help="Documents sampled per collection.")
+        parser.add_argument("--synthetic", action="store_true", help="Use generated guide-shaped docs.")
+
+    def handle(self, *args, **opts):
+        codecs = ["zlib"] + (["zstd"] if zstandard is not None else [])
+        if opts["synthetic"]:
+            samples = {"synthetic": [self._payload(d, _FIELDS["company_cache"]) for d in _synthetic_docs(opts["limit"])]}
+        else:
+            samples = {c: self._load(c, opts["limit"]) for c in (opts["collection"] or list(_FIELDS))}
+
+        self.stdout.write(f"{'collection':<16} {'codec':<5} {'docs':>5} {'raw_B':>8} {'packed_B':>9} "
+                          f"{'ratio':>6} {'enc_us':>8} {'dec_us':>8}")
+        for name, payloads in samples.items():
+            if not payloads:
+                self.stdout.write(f"{name:<16} (no documents)")
+                continue
+            for codec in codecs:
+                self._row(name, codec, payloads)
+        if "zstd" not in codecs:
+            self.stdout.write("zstandard not installed — only zlib measured.")
+
+    def _load(self, collection: str, limit: int) -> list:
+        from api.firebase import db
+
+        fields = _FIELDS[collection]
+        return [
+            self._payload(unpack_fields(doc.to_dict() or {}), fields)
+            for doc in db.collection(collection).limit(limit).stream()
+        ]
+
+    @staticmethod
+    def _payload(data: dict, fields) -> bytes:
+        present = {f: data[f] for f in fields if f in data}
+        return json.dumps(present, ensure_ascii=False, separators=(",", ":"), default=str).encode()
+
+    def _row(self, name: str, codec: str, payloads: list):
+        raw_sizes, packed_sizes, enc_us, dec_us = [], [], [], []
+        for raw in payloads:
+            t0 = time.perf_counter()
+            blob = _compress(raw, codec)
+            t1 = time.perf_counter()
+            _decompress(blob)
+            t2 = time.perf_counter()
+            raw_sizes.append(len(raw))
+            packed_sizes.append(len(blob))
+            enc_us.append((t1 - t0) * 1e6)
+            dec_us.append((t2 - t1) * 1e6)
+
+        raw_total, packed_total = sum(raw_sizes), sum(packed_sizes)
+        self.stdout.write(
+            f"{name:<16} {codec:<5} {len(payloads):>5} {raw_total // len(payloads):>8} "
+            f"{packed_total // len(payloads):>9} {raw_total / max(packed_total, 1):>6.2f} "
+            f"{statistics.median(enc_us):>8.0f} {statistics.median(dec_us):>8.0f}"
+        )
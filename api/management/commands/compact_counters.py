@@ -0,0 +1,66 @@
+"""
+api/management/commands/compact_counters.py
+
+Fold sharded counter values back into the base fields on their parent
+documents and delete the shards. Safe to run at any time — each document is
+compacted in its own transaction. Run it on a schedule: list views read the
+base fields only (see api/counters.py).
+
+    python manage.py compact_counters --dry-run
+    python manage.py compact_counters --rate 20
+    python manage.py compact_counters --loop --interval 300
+"""
+
+import time
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+
+from api import counters
+from api.firebase import db
+from api.utils import RateLimiter, positive_float
+
+
+class Command(BaseCommand):
+    help = "Move counter_shards sums into the parent documents' counter fields."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rate", type=positive_float, default=10, help="Max documents compacted per second.")
+        parser.add_argument("--dry-run", action="store_true", help="Only report pending shard sums.")
+        parser.add_argument("--loop", action="store_true", help="Keep compacting every --interval seconds.")
+        parser.add_argument("--interval", type=int, default=300)
+
+    def handle(self, *args, **opts):
+        while True:
+            self._compact_once(opts)
+            if not opts["loop"]:
+                return
+            time.sleep(opts["interval"])
+
+    def _compact_once(self, opts):
+        started = time.perf_counter()
+        shards  = defaultdict(list)
+        for snap in db.collection_group(counters.SHARDS).select([]).stream():
+            shards[snap.reference.parent.parent.path].append(snap.reference)
+
+        limiter = RateLimiter(opts["rate"])
+        moved   = 0
+        for path, refs in shards.items():
+            target = db.document(path)
+            if opts["dry_run"]:
+                totals = counters._sum(db.get_all(refs))
+            else:
+                limiter.acquire()
+                try:
+                    totals = counters.compact(target, refs)
+                except Exception as e:
+                    self.stderr.write(f"{path:<60} failed: {e}")
+                    continue
+            moved += 1
+            if totals:
+                self.stdout.write(f"{path:<60} {totals}")
+
+        verb = "would compact" if opts["dry_run"] else "compacted"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {moved} document(s) in {time.perf_counter() - started:.1f}s"
+        ))
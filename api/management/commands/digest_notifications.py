@@ -0,0 +1,151 @@
+"""
+api/management/commands/digest_notifications.py
+
+Roll notifications older than --days into one digest per user per ISO week
+("12 likes, 3 comments and 2 test updates"), deleting the originals. Keeps
+each user's notification list and the collection itself bounded; the unread
+counter (api/notifications.py) is adjusted so the badge stays right.
+
+    python manage.py digest_notifications --dry-run
+    python manage.py digest_notifications --days 14
+    python manage.py digest_notifications --loop --interval 86400
+"""
+
+import time
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+
+from django.core.management.base import BaseCommand
+from google.cloud import firestore as gfs
+
+from api.firebase import db
+from api.notifications import NOTIFICATIONS, state_ref, is_read
+from api.utils import RateLimiter, positive_float
+
+
+PAGE = 150   # deletes + a digest and a counter write per user must fit one 500-write batch
+
+# type → (singular, plural) for digest messages
+LABELS = {
+    "like":        ("like", "likes"),
+    "comment":     ("comment", "comments"),
+    "test":        ("test update", "test updates"),
+    "profile":     ("profile update", "profile updates"),
+    "achievement": ("achievement", "achievements"),
+}
+DEFAULT_LABEL = ("notification", "notifications")
+
+
+def _week(created: datetime) -> str:
+    year, week, _ = created.isocalendar()
+    return f"{year}-W{week:02d}"
+
+
+def _message(counts: dict) -> str:
+    parts = []
+    for ntype, n in sorted(counts.items(), key=lambda kv: -kv[1]):
+        singular, plural = LABELS.get(ntype, DEFAULT_LABEL)
+        parts.append(f"{n} {singular if n == 1 else plural}")
+    if len(parts) > 1:
+        return ", ".join(parts[:-1]) + " and " + parts[-1]
+    return parts[0] if parts else ""
+
+
+class Command(BaseCommand):
+    help = "Roll old notifications into weekly per-user digests."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=7, help="Digest notifications older than N days.")
+        parser.add_argument("--rate", type=positive_float, default=200, help="Max writes per second.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be digested.")
+        parser.add_argument("--loop", action="store_true", help="Repeat every --interval seconds.")
+        parser.add_argument("--interval", type=int, default=86400)
+
+    def handle(self, *args, **opts):
+        limiter = RateLimiter(opts["rate"], burst=500)
+        while True:
+            self._digest_once(opts, limiter)
+            if not opts["loop"]:
+                return
+            time.sleep(opts["interval"])
+
+    def _digest_once(self, opts, limiter):
+        started    = time.perf_counter()
+        cutoff     = datetime.now(timezone.utc) - timedelta(days=opts["days"])
+        query      = db.collection(NOTIFICATIONS).where("created_at", "<", cutoff).order_by("created_at")
+        watermarks = {}   # uid → (read_watermark, counter initialised)
+        cursor     = None
+        rolled = digests = 0
+        while True:
+            page  = query.start_after(cursor) if cursor else query
+            snaps = list(page.limit(PAGE).stream())
+            if not snaps:
+                break
+            cursor = snaps[-1]
+
+            groups = defaultdict(list)   # (uid, week) → [snap, ...]
+            for snap in snaps:
+                data = snap.to_dict() or {}
+                if data.get("type") != "digest" and data.get("uid") and data.get("created_at"):
+                    groups[(data["uid"], _week(data["created_at"]))].append(snap)
+            for uid, _ in groups:
+                if uid not in watermarks:
+                    state = state_ref(uid).get().to_dict() or {}
+                    watermarks[uid] = (state.get("read_watermark"), bool(state.get("counted")))
+
+            rolled  += sum(len(g) for g in groups.values())
+            digests += len(groups)
+            if groups and not opts["dry_run"]:
+                self._write(groups, watermarks, limiter)
+            if len(snaps) < PAGE:
+                break
+
+        verb = "would roll" if opts["dry_run"] else "rolled"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {rolled} notifications into {digests} digests in {time.perf_counter() - started:.1f}s"
+        ))
+
+    @staticmethod
+    def _write(groups, watermarks, limiter):
+        refs     = {key: db.collection(NOTIFICATIONS).document(f"digest_{key[0]}_{key[1]}") for key in groups}
+        existing = {snap.reference.path: snap.to_dict() for snap in db.get_all(list(refs.values())) if snap.exists}
+
+        batch  = db.batch()
+        writes = 0
+        unread = defaultdict(int)   # uid → counter delta
+        for key, snaps in groups.items():
+            uid, week    = key
+            watermark, _ = watermarks[uid]
+            digest  = existing.get(refs[key].path) or {}
+            counts  = dict(digest.get("counts", {}))
+            latest  = digest.get("created_at")
+            pending = 0   # unread notifications being folded in
+            for snap in snaps:
+                data  = snap.to_dict()
+                ntype = data.get("type", "general")
+                counts[ntype] = counts.get(ntype, 0) + data.get("count", 1)
+                if not is_read(data, watermark):
+                    pending += 1
+                if latest is None or data["created_at"] > latest:
+                    latest = data["created_at"]
+                batch.delete(snap.reference)
+
+            was_unread = bool(digest) and not is_read(digest, watermark)
+            batch.set(refs[key], {
+                "uid":        uid,
+                "type":       "digest",
+                "title":      f"Your week ({week})",
+                "message":    _message(counts),
+                "counts":     counts,
+                "read":       not (pending or was_unread),
+                "created_at": latest,
+            })
+            unread[uid] += (1 if pending and not was_unread else 0) - pending
+            writes += len(snaps) + 1
+
+        for uid, delta in unread.items():
+            if delta and watermarks[uid][1]:
+                batch.set(state_ref(uid), {"unread": gfs.Increment(delta)}, merge=True)
+                writes += 1
+        limiter.acquire(writes)
+        batch.commit()
@@ -0,0 +1,35 @@
+"""
+api/management/commands/migrate_company_guides.py
+
+Regenerate every guide below CURRENT_CACHE_VERSION in the foreground (for
+cron / deploy hooks). Same code path and lease as the in-process migrator,
+so it never runs concurrently with a worker's background migration.
+
+    python manage.py migrate_company_guides --rate 0.5
+    python manage.py migrate_company_guides --status
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.guide_migrator import migrator
+from api.utils import positive_float
+
+
+class Command(BaseCommand):
+    help = "Regenerate stale company guides, most-visited first, at a controlled rate."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rate", type=positive_float, default=None, help="Guides regenerated per second.")
+        parser.add_argument("--status", action="store_true", help="Only print migration progress.")
+
+    def handle(self, *args, **opts):
+        if opts["status"]:
+            self.stdout.write(str(migrator.status()))
+            return
+
+        pending = migrator.stale_ids()
+        self.stdout.write(f"{len(pending)} stale guide(s): {', '.join(pending) or '-'}")
+        result = migrator.run(opts["rate"])
+        self.stdout.write(self.style.SUCCESS(
+            f"done={result.get('done', 0)} failed={result.get('failed', 0)} running={result.get('running')}"
+        ))
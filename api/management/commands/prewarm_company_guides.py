@@ -0,0 +1,74 @@
+"""
+api/management/commands/prewarm_company_guides.py
+
+Pre-generate company guides so no user ever hits a cold (or stale) guide.
+Run during deploys, especially after bumping CURRENT_CACHE_VERSION:
+
+    python manage.py prewarm_company_guides                   # all POPULAR companies
+    python manage.py prewarm_company_guides google tcs        # specific ids (or names/aliases)
+    python manage.py prewarm_company_guides --workers 4 --rate 0.5
+
+Resumable: guides already at CURRENT_CACHE_VERSION are skipped, so an
+interrupted run simply picks up where it stopped when re-run.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api.firebase import db, Collections
+from api.utils import RateLimiter, positive_float
+from api.views.placement_views import POPULAR, is_fresh, generate_and_cache_guide, resolver
+
+
+class Command(BaseCommand):
+    help = "Pre-generate company guides for popular (or given) companies."
+
+    def add_arguments(self, parser):
+        parser.add_argument("company_ids", nargs="*", help="Company ids (default: all POPULAR).")
+        parser.add_argument("--workers", type=int, default=3, help="Concurrent generations.")
+        parser.add_argument("--rate", type=positive_float, default=0.5,
+                            help="Max Groq generations started per second across all workers.")
+        parser.add_argument("--force", action="store_true", help="Regenerate even fresh guides.")
+
+    def handle(self, *args, **opts):
+        # Same cache keys the guide view uses ("amazon-india" → "amazon"), de-duplicated in order
+        company_ids = list(dict.fromkeys(resolver.resolve(c) for c in opts["company_ids"]))
+        if "" in company_ids:
+            raise CommandError("Company ids must contain letters or digits.")
+        company_ids = company_ids or [c["id"] for c in POPULAR]
+        limiter     = RateLimiter(opts["rate"])
+        started     = time.perf_counter()
+        counts      = {"generated": 0, "skipped": 0, "failed": 0}
+
+        def warm(company_id: str):
+            t0 = time.perf_counter()
+            if not opts["force"]:
+                ref = db.collection(Collections.COMPANY_CACHE).document(company_id)
+                if is_fresh(ref.get(field_paths=["cache_version"]).to_dict()):
+                    return company_id, "skipped", time.perf_counter() - t0, None
+            limiter.acquire()
+            try:
+                generate_and_cache_guide(company_id)
+            except Exception as e:
+                return company_id, "failed", time.perf_counter() - t0, e
+            return company_id, "generated", time.perf_counter() - t0, None
+
+        with ThreadPoolExecutor(max_workers=max(1, opts["workers"])) as pool:
+            futures = [pool.submit(warm, cid) for cid in company_ids]
+            for future in as_completed(futures):
+                company_id, outcome, elapsed, error = future.result()
+                counts[outcome] += 1
+                line = f"{outcome:<9} {company_id:<20} {elapsed * 1000:>8.0f} ms"
+                if error:
+                    self.stderr.write(f"{line}  {error}")
+                else:
+                    self.stdout.write(line)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {time.perf_counter() - started:.1f}s — "
+            f"{counts['generated']} generated, {counts['skipped']} fresh, {counts['failed']} failed."
+        ))
+        if counts["failed"]:
+            raise CommandError(f"{counts['failed']} guide(s) failed to generate.")
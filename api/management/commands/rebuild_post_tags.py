@@ -0,0 +1,64 @@
+"""
+api/management/commands/rebuild_post_tags.py
+
+Recompute the post_tags materialisation (api/post_tags.py) from every post.
+Run once to backfill, or whenever counts drift.
+
+    python manage.py rebuild_post_tags --dry-run
+    python manage.py rebuild_post_tags
+"""
+
+import time
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+
+from api import post_tags
+from api.firebase import db, Collections
+
+
+MAX_BATCH = 500   # Firestore limit per write batch
+
+
+class Command(BaseCommand):
+    help = "Rebuild per-tag post counts and last-activity timestamps."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Print the counts without writing.")
+
+    def handle(self, *args, **opts):
+        started = time.perf_counter()
+        tags = {}   # key → {"tag", "count", "last_activity"}
+        for snap in db.collection(Collections.POSTS).select(["tags", "created_at"]).stream():
+            data = snap.to_dict() or {}
+            for key, tag in post_tags._clean(data.get("tags")).items():
+                entry = tags.setdefault(key, {"tag": tag, "count": 0, "last_activity": None})
+                entry["count"] += 1
+                created = data.get("created_at")
+                if created and (entry["last_activity"] is None or created > entry["last_activity"]):
+                    entry["last_activity"] = created
+
+        collection = db.collection(Collections.POST_TAGS)
+        stale = [ref for ref in collection.list_documents() if ref.id not in tags]
+
+        if opts["dry_run"]:
+            for entry in sorted(tags.values(), key=lambda e: -e["count"]):
+                self.stdout.write(f"{entry['tag']:<30} {entry['count']:>6}")
+        else:
+            writes = [("set", collection.document(k), v) for k, v in tags.items()]
+            writes += [("delete", ref, None) for ref in stale]
+            for start in range(0, len(writes), MAX_BATCH):
+                batch = db.batch()
+                for op, ref, data in writes[start:start + MAX_BATCH]:
+                    if op == "set":
+                        batch.set(ref, data)
+                    else:
+                        batch.delete(ref)
+                batch.commit()
+            cache.delete(post_tags.CACHE_KEY)
+
+        verb = "would write" if opts["dry_run"] else "wrote"
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {len(tags)} tags, removed {0 if opts['dry_run'] else len(stale)} stale "
+            f"in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,33 @@
+"""
+api/management/commands/rebuild_search_index.py
+
+Rebuild the local FTS5 index behind /api/dev2dev/search/ from Firestore.
+Run on deploy (the index lives in the host's SQLite file) or whenever it
+drifts.
+
+    python manage.py rebuild_search_index
+"""
+
+import time
+
+from django.core.management.base import BaseCommand
+
+from api import search
+from api.firebase import db, Collections, doc_to_dict
+
+
+class Command(BaseCommand):
+    help = "Rebuild the Dev2Dev post search index from Firestore."
+
+    def handle(self, *args, **opts):
+        started = time.perf_counter()
+        posts = (
+            doc_to_dict(doc)
+            for doc in db.collection(Collections.POSTS)
+            .select(["title", "body", "tags", "author_name", "created_at"])
+            .stream()
+        )
+        count = search.rebuild(posts)
+        self.stdout.write(self.style.SUCCESS(
+            f"Indexed {count} posts in {time.perf_counter() - started:.1f}s"
+        ))
@@ -0,0 +1,109 @@
+"""
+api/management/commands/rescore_hot_posts.py
+
+Recompute `hot_score` (api/ranking.py) from current like/comment counts,
+including sharded counter deltas. Run once to backfill posts created before
+the hot feed, then periodically to catch reactions the per-post throttle
+skipped. `--comments` does the same for the comments' `upvote_rank`.
+
+    python manage.py rescore_hot_posts                     # every post
+    python manage.py rescore_hot_posts --days 7            # recent posts only
+    python manage.py rescore_hot_posts --comments          # posts + comment upvote ranks
+    python manage.py rescore_hot_posts --loop --interval 600
+"""
+
+import time
+from datetime import datetime, timezone, timedelta
+
+from django.core.management.base import BaseCommand
+
+from api import counters, ranking
+from api.firebase import db, Collections
+from api.utils import RateLimiter, positive_float
+
+
+MAX_BATCH = 500   # Firestore limit per write batch
+
+
+class Command(BaseCommand):
+    help = "Recompute hot_score for Dev2Dev posts (and comment upvote_rank with --comments)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=0, help="Only posts created in the last N days (0 = all).")
+        parser.add_argument("--rate", type=positive_float, default=100, help="Max score writes per second.")
+        parser.add_argument("--comments", action="store_true", help="Also refresh comment upvote_rank.")
+        parser.add_argument("--dry-run", action="store_true", help="Only count changed scores.")
+        parser.add_argument("--loop", action="store_true", help="Keep rescoring every --interval seconds.")
+        parser.add_argument("--interval", type=int, default=600)
+
+    def handle(self, *args, **opts):
+        limiter = RateLimiter(opts["rate"], burst=MAX_BATCH)
+        while True:
+            self._rescore_once(opts, limiter)
+            if opts["comments"]:
+                self._rerank_comments(opts, limiter)
+            if not opts["loop"]:
+                return
+            time.sleep(opts["interval"])
+
+    def _rescore_once(self, opts, limiter):
+        started  = time.perf_counter()
+        posts    = db.collection(Collections.POSTS)
+        query    = posts.select(ranking.SCORE_FIELDS).order_by("created_at")
+        if opts["days"]:
+            query = query.where("created_at", ">=", datetime.now(timezone.utc) - timedelta(days=opts["days"]))
+
+        def score(ref, post):
+            return "hot_score", ranking.score_of(post)
+
+        seen, changed = self._apply(query, counters.POST_COUNTERS, score, opts, limiter)
+        verb = "would update" if opts["dry_run"] else "updated"
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {seen} posts, {verb} {changed} scores in {time.perf_counter() - started:.1f}s"
+        ))
+
+    def _rerank_comments(self, opts, limiter):
+        started = time.perf_counter()
+        query   = db.collection_group("comments").select(["upvote_count", "upvote_rank"]).order_by("__name__")
+
+        def rank(ref, comment):
+            return "upvote_rank", comment.get("upvote_count", 0)
+
+        seen, changed = self._apply(query, ("upvote_count",), rank, opts, limiter)
+        verb = "would update" if opts["dry_run"] else "updated"
+        self.stdout.write(self.style.SUCCESS(
+            f"Scanned {seen} comments, {verb} {changed} ranks in {time.perf_counter() - started:.1f}s"
+        ))
+
+    @staticmethod
+    def _apply(query, counter_fields, compute, opts, limiter):
+        """Page through `query`, writing compute(ref, doc) → (field, value) where it changed."""
+        cursor = None
+        seen = changed = 0
+        while True:
+            page  = query.start_after(cursor) if cursor else query
+            snaps = list(page.limit(MAX_BATCH).stream())
+            if not snaps:
+                break
+
+            pairs = [(s.reference, s.to_dict() or {}) for s in snaps]
+            counters.apply_many(pairs, counter_fields)
+            updates = []
+            for ref, doc in pairs:
+                field, value = compute(ref, doc)
+                if value != doc.get(field):
+                    updates.append((ref, {field: value}))
+
+            if updates and not opts["dry_run"]:
+                limiter.acquire(len(updates))
+                batch = db.batch()
+                for ref, data in updates:
+                    batch.update(ref, data)
+                batch.commit()
+
+            seen    += len(snaps)
+            changed += len(updates)
+            cursor   = snaps[-1]
+            if len(snaps) < MAX_BATCH:
+                break
+        return seen, changed
@@ -0,0 +1,38 @@
+"""
+api/management/commands/run_author_fanout.py
+
+Resume author-name fan-out jobs (api/author_fanout.py) from their
+checkpoints — e.g. after a deploy killed the worker thread mid-run.
+
+    python manage.py run_author_fanout                 # every unfinished job
+    python manage.py run_author_fanout --uid <uid>
+    python manage.py run_author_fanout --status
+"""
+
+from django.core.management.base import BaseCommand
+
+from api.author_fanout import fanout
+from api.utils import positive_float
+
+
+class Command(BaseCommand):
+    help = "Resume unfinished author_name/author_initials fan-out jobs."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--uid", action="append", help="Only this user (repeatable).")
+        parser.add_argument("--rate", type=positive_float, help="Max document writes per second.")
+        parser.add_argument("--status", action="store_true", help="Only print job status.")
+
+    def handle(self, *args, **opts):
+        uids = opts["uid"] or fanout.unfinished()
+        if not uids:
+            self.stdout.write("No unfinished fan-out jobs.")
+            return
+
+        for uid in uids:
+            status = fanout.status(uid) if opts["status"] else fanout.run(uid, rate=opts["rate"])
+            self.stdout.write(
+                f"{uid:<30} {status.get('status', '?'):<8} "
+                f"updated {status.get('updated', 0)}/{status.get('scanned', 0)} scanned "
+                f"(total {status.get('total') if status.get('total') is not None else '?'})"
+            )
@@ -0,0 +1,139 @@
+"""
+api/management/commands/sweep_expired.py
+
+Delete expired SkillTest sessions and old notifications so collections (and
+their indexes) stay bounded. Pages through matches with a cursor and deletes
+them in batched writes under a rate limit. Unread notifications are taken off
+their owner's unread counter (api/notifications.py) in the same batch, as
+digest_notifications does, so the badge stays right.
+
+    python manage.py sweep_expired --dry-run
+    python manage.py sweep_expired --notification-days 30 --rate 200
+    python manage.py sweep_expired --loop --interval 3600      # simple scheduler
+"""
+
+import time
+from collections import defaultdict
+from datetime import datetime, timezone, timedelta
+
+from django.core.management.base import BaseCommand
+from google.cloud import firestore as gfs
+
+from api.firebase import db, Collections
+from api.notifications import NOTIFICATIONS, state_ref, is_read
+from api.utils import RateLimiter, positive_float
+
+
+MAX_BATCH          = 500   # Firestore limit per write batch
+NOTIFICATION_BATCH = 250   # deletes + one counter write per user must fit one batch
+
+
+def sweep(query, order_field: str, limiter: RateLimiter, dry_run: bool, page_size: int = MAX_BATCH) -> int:
+    """Delete every document matched by `query` (ordered by `order_field`). Returns the count."""
+    query  = query.order_by(order_field).select([order_field])
+    cursor = None
+    total  = 0
+
+    while True:
+        page = query.start_after(cursor) if cursor else query
+        docs = list(page.limit(page_size).stream())
+        if not docs:
+            return total
+
+        if not dry_run:
+            limiter.acquire(len(docs))
+            batch = db.batch()
+            for doc in docs:
+                batch.delete(doc.reference)
+            batch.commit()
+
+        total += len(docs)
+        cursor = docs[-1]
+        if len(docs) < page_size:
+            return total
+
+
+def sweep_notifications(cutoff, limiter: RateLimiter, dry_run: bool, page_size: int = NOTIFICATION_BATCH) -> int:
+    """Like sweep() for notifications older than `cutoff`, keeping unread counters in step."""
+    query      = (db.collection(NOTIFICATIONS).where("created_at", "<", cutoff)
+                  .order_by("created_at").select(["created_at", "uid", "read"]))
+    watermarks = {}   # uid → (read_watermark, counter initialised)
+    cursor     = None
+    total      = 0
+
+    while True:
+        page = query.start_after(cursor) if cursor else query
+        docs = list(page.limit(page_size).stream())
+        if not docs:
+            return total
+
+        if not dry_run:
+            rows = [(doc, doc.to_dict() or {}) for doc in docs]
+            new  = {data["uid"] for _, data in rows if data.get("uid") and data["uid"] not in watermarks}
+            for snap in db.get_all([state_ref(uid) for uid in new]) if new else []:
+                state = snap.to_dict() or {}
+                watermarks[snap.id] = (state.get("read_watermark"), bool(state.get("counted")))
+
+            unread = defaultdict(int)   # uid → unread notifications being deleted
+            for _, data in rows:
+                watermark, counted = watermarks.get(data.get("uid"), (None, False))
+                if counted and not is_read(data, watermark):
+                    unread[data["uid"]] += 1
+
+            limiter.acquire(len(docs) + len(unread))
+            batch = db.batch()
+            for doc in docs:
+                batch.delete(doc.reference)
+            for uid, n in unread.items():
+                batch.set(state_ref(uid), {"unread": gfs.Increment(-n)}, merge=True)
+            batch.commit()
+
+        total += len(docs)
+        cursor = docs[-1]
+        if len(docs) < page_size:
+            return total
+
+
+class Command(BaseCommand):
+    help = "Delete expired active_sessions and notifications older than N days."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--notification-days", type=int, default=60,
+                            help="Delete notifications older than this many days.")
+        parser.add_argument("--rate", type=positive_float, default=100, help="Max deletes per second.")
+        parser.add_argument("--batch-size", type=int, default=MAX_BATCH)
+        parser.add_argument("--dry-run", action="store_true", help="Only count what would be deleted.")
+        parser.add_argument("--loop", action="store_true", help="Keep sweeping every --interval seconds.")
+        parser.add_argument("--interval", type=int, default=3600)
+
+    def handle(self, *args, **opts):
+        batch_size = max(1, min(opts["batch_size"], MAX_BATCH))
+        limiter    = RateLimiter(opts["rate"], burst=batch_size)
+
+        while True:
+            self._sweep_once(opts, limiter, batch_size)
+            if not opts["loop"]:
+                return
+            time.sleep(opts["interval"])
+
+    def _sweep_once(self, opts, limiter, batch_size):
+        now     = datetime.now(timezone.utc)
+        cutoff  = now - timedelta(days=opts["notification_days"])
+        verb    = "would delete" if opts["dry_run"] else "deleted"
+        started = time.perf_counter()
+
+        # expires_at is stored as an ISO-8601 UTC string, which sorts chronologically
+        sessions = sweep(
+            db.collection(Collections.ACTIVE_SESSIONS).where("expires_at", "<", now.isoformat()),
+            "expires_at", limiter, opts["dry_run"], batch_size,
+        )
+        self.stdout.write(f"{Collections.ACTIVE_SESSIONS:<16} {verb} {sessions}")
+
+        notifications = sweep_notifications(
+            cutoff, limiter, opts["dry_run"], min(batch_size, NOTIFICATION_BATCH),
+        )
+        self.stdout.write(f"{NOTIFICATIONS:<16} {verb} {notifications}")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Sweep finished in {time.perf_counter() - started:.1f}s at {now:%Y-%m-%d %H:%M:%S} UTC"
+        ))
@@ -0,0 +1,53 @@
+"""
+api/management/commands/sync_replica.py
+
+Keep the local SQLite read replica (api/replica.py) in step with Firestore.
+
+    python manage.py sync_replica                           # delta sync, all collections
+    python manage.py sync_replica --full                    # re-mirror (picks up deletions)
+
+A delta pass that finds deletions or documents without `updated_at` falls
+back to a full re-mirror on its own, so every writer to a mirrored
+collection should stamp `updated_at`.
+    python manage.py sync_replica --collection study_lessons
+    python manage.py sync_replica --loop --interval 300     # simple scheduler
+"""
+
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from api import replica
+
+
+class Command(BaseCommand):
+    help = "Pull changed documents from Firestore into the local read replica."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--collection", choices=list(replica.SYNC_FIELDS), action="append")
+        parser.add_argument("--full", action="store_true", help="Re-mirror whole collections.")
+        parser.add_argument("--loop", action="store_true", help="Keep syncing every --interval seconds.")
+        parser.add_argument("--interval", type=int, default=300)
+
+    def handle(self, *args, **opts):
+        if not replica.ENABLED:
+            raise CommandError("REPLICA_ENABLED is off.")
+
+        collections = opts["collection"] or list(replica.SYNC_FIELDS)
+        full = opts["full"]
+        while True:
+            for collection in collections:
+                started = time.perf_counter()
+                try:
+                    count = replica.sync(collection, full=full)
+                except Exception as e:
+                    self.stderr.write(f"{collection:<16} failed: {e}")
+                    continue
+                self.stdout.write(
+                    f"{collection:<16} {'full' if full else 'delta'} {count:>6} docs "
+                    f"in {time.perf_counter() - started:.2f}s"
+                )
+            if not opts["loop"]:
+                return
+            full = False   # only the first pass of a loop is a full one
+            time.sleep(opts["interval"])
@@ -0,0 +1,87 @@
+"""
+api/notification_hub.py — In-process pub/sub for live notification streams.
+
+The notification dispatcher publishes each notification here once it is
+committed, stamped with its commit time (the stored created_at), so the SSE
+event id can be compared exactly on replay. Each open SSE connection
+(api/views/notification_views.notification_stream) is a subscriber with its
+own asyncio queue. publish() is safe to call from any thread — delivery is
+handed to the subscriber's event loop.
+
+The hub is per process. A client whose stream lives on another worker
+catches up on reconnect through Last-Event-ID, so run the stream under a
+single ASGI worker (or sticky sessions) for instant delivery everywhere.
+"""
+
+import asyncio
+import threading
+
+from django.conf import settings
+
+
+MAX_STREAMS_PER_USER = getattr(settings, "SSE_MAX_STREAMS_PER_USER", 3)
+QUEUE_SIZE           = 100
+
+CLOSE = object()   # sent to a subscriber that has been replaced by a newer stream
+
+
+class Subscription:
+    def __init__(self, uid: str, loop):
+        self.uid   = uid
+        self.loop  = loop
+        self.queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+
+    def deliver(self, item):
+        try:
+            self.loop.call_soon_threadsafe(self._put, item)
+        except RuntimeError:
+            pass   # loop already closed
+
+    def _put(self, item):
+        try:
+            self.queue.put_nowait(item)
+        except asyncio.QueueFull:
+            pass   # slow client; it re-syncs on reconnect
+
+
+class NotificationHub:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subs: dict = {}   # uid → [Subscription, ...] oldest first
+
+    def subscribe(self, uid: str) -> Subscription:
+        """Register a stream for `uid` on the running loop; the oldest beyond the limit is closed."""
+        sub = Subscription(uid, asyncio.get_running_loop())
+        with self._lock:
+            subs = self._subs.setdefault(uid, [])
+            subs.append(sub)
+            evicted = subs[:-MAX_STREAMS_PER_USER] if len(subs) > MAX_STREAMS_PER_USER else []
+            del subs[:len(evicted)]
+        for old in evicted:
+            old.deliver(CLOSE)
+        return sub
+
+    def unsubscribe(self, sub: Subscription):
+        with self._lock:
+            subs = self._subs.get(sub.uid, [])
+            if sub in subs:
+                subs.remove(sub)
+            if not subs:
+                self._subs.pop(sub.uid, None)
+
+    def listening(self, uid: str) -> bool:
+        with self._lock:
+            return bool(self._subs.get(uid))
+
+    def publish(self, uid: str, payload: dict):
+        with self._lock:
+            subs = list(self._subs.get(uid, ()))
+        for sub in subs:
+            sub.deliver(payload)
+
+    def connections(self) -> int:
+        with self._lock:
+            return sum(len(s) for s in self._subs.values())
+
+
+hub = NotificationHub()
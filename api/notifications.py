@@ -1,28 +1,396 @@
 # api/notifications.py — call this from any view to push a notification
+#
+# push_notification() only enqueues: a background worker drains the queue
+# and writes notifications to Firestore in batches, retrying with backoff,
+# so the calling request never waits on Firestore. The queue is flushed at
+# interpreter exit; dispatcher.metrics() reports depth, throughput and
+# enqueue→commit latency (GET /api/notifications/metrics/).
+# Once committed, every notification is also published to the in-process hub
+# that feeds the live SSE streams (api/notification_hub.py), carrying its
+# committed created_at.
+#
+# Unread state lives in one small document per user:
+#     notification_state/{uid}   {"unread": n, "read_watermark": <ts>, "counted": true}
+# `unread` is incremented in the same batch that writes the notifications and
+# decremented by mark_read(); mark_all_read() is a single write that zeroes it
+# and moves the watermark — anything created at or before the watermark reads
+# as read, so the notification documents themselves are never rewritten.
+#
+# Bursty events coalesce: a notification with a `subject` (e.g. "post:<id>")
+# lands on one document per (uid, type, subject) and COALESCE_WINDOW. The
+# worker holds such notifications for COALESCE_HOLD seconds and folds them
+# into that document in one transaction ("12 people liked your post"), so a
+# burst costs one write per hold period instead of one per event. Old
+# notifications are rolled into weekly digests by
+# `manage.py digest_notifications`.
 
-from api.firebase import db, SERVER_TS
+import atexit
+import hashlib
+import logging
+import queue
+import statistics
+import threading
+import time
+from collections import Counter, deque
+from datetime import datetime
 
-NOTIFICATIONS = "notifications"
+from django.conf import settings
+from google.cloud import firestore as gfs
 
+from api.firebase import db, SERVER_TS, doc_to_dict
+from api.notification_hub import hub
 
-def push_notification(uid: str, title: str, message: str, ntype: str = "general"):
+NOTIFICATIONS      = "notifications"
+NOTIFICATION_STATE = "notification_state"
+
+logger = logging.getLogger(__name__)
+
+MAX_BATCH     = 250    # notifications per batch; each user also gets a counter write (Firestore limit 500)
+LINGER        = 0.05   # seconds to wait for more items before committing a batch
+MAX_RETRIES   = 5
+BACKOFF_START = 0.5
+BACKOFF_MAX   = 10.0
+MAX_ACTORS    = 100    # actor uids kept on a coalesced notification for de-duplication
+
+COALESCE_WINDOW = getattr(settings, "NOTIFICATION_COALESCE_WINDOW", 3600)   # seconds per coalesced document
+COALESCE_HOLD   = getattr(settings, "NOTIFICATION_COALESCE_HOLD", 5)        # seconds to gather a burst
+
+
+class NotificationDispatcher:
+    def __init__(self, max_size: int):
+        self._queue     = queue.Queue(maxsize=max_size)
+        self._lock      = threading.Lock()
+        self._thread    = None
+        self._idle      = threading.Event()
+        self._idle.set()
+        self._flushing  = threading.Event()
+        self._held      = {}                   # coalesced doc path → pending burst (worker thread only)
+        self._latencies = deque(maxlen=1000)   # seconds, enqueue → commit
+        self._stats     = {"enqueued": 0, "written": 0, "failed": 0, "dropped": 0,
+                           "retries": 0, "batches": 0, "coalesced": 0}
+
+    # ── Producer side ────────────────────────────────────────────────────────
+
+    def enqueue(self, doc: dict) -> str:
+        """Queue one notification; returns its document id (None if dropped)."""
+        ref = self._ref_for(doc)
+        try:
+            # Same lock as _mark_idle(), so the worker can't see an empty queue
+            # and mark idle between the clear and the put.
+            with self._lock:
+                self._idle.clear()
+                self._queue.put_nowait((time.monotonic(), ref, doc))
+        except queue.Full:
+            with self._lock:
+                self._stats["dropped"] += 1
+            self._mark_idle()
+            logger.warning("notification queue full; dropped notification for %s", doc.get("uid"))
+            return None
+        with self._lock:
+            self._stats["enqueued"] += 1
+        self._ensure_worker()
+        return ref.id
+
+    @staticmethod
+    def _ref_for(doc: dict):
+        """A fresh document, or the shared one for the doc's coalescing key and window."""
+        if not doc.get("subject"):
+            return db.collection(NOTIFICATIONS).document()
+        window = int(time.time() // COALESCE_WINDOW)
+        key    = f"{doc['uid']}|{doc['type']}|{doc['subject']}|{window}"
+        return db.collection(NOTIFICATIONS).document(hashlib.sha1(key.encode()).hexdigest()[:20])
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._drain_forever, daemon=True,
+                                             name="notification-dispatcher")
+            self._thread.start()
+
+    # ── Worker side ──────────────────────────────────────────────────────────
+
+    def _drain_forever(self):
+        while True:
+            try:
+                first = self._queue.get(timeout=self._wait_seconds())
+            except queue.Empty:
+                self._write_held()
+                self._mark_idle()
+                continue
+            plain = []
+            for item in self._collect(first):
+                if item[2].get("subject"):
+                    self._hold(item)
+                else:
+                    plain.append(item)
+            if plain:
+                results = self._write(plain)
+                if results:
+                    self._publish_batch(plain, results)
+            self._write_held()
+
+    def _collect(self, first) -> list:
+        items    = [first]
+        deadline = time.monotonic() + LINGER
+        while len(items) < MAX_BATCH:
+            remaining = deadline - time.monotonic()
+            try:
+                if remaining > 0:
+                    items.append(self._queue.get(timeout=remaining))
+                else:
+                    items.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return items
+
+    def _hold(self, item):
+        _, ref, doc = item
+        entry = self._held.setdefault(ref.path, {"ref": ref, "since": time.monotonic(), "items": []})
+        entry["doc"] = doc   # latest wins for title/message
+        entry["items"].append(item)
+
+    def _wait_seconds(self) -> float:
+        if not self._held:
+            return 1.0
+        if self._flushing.is_set():
+            return 0.01
+        oldest = min(entry["since"] for entry in self._held.values())
+        return min(max(oldest + COALESCE_HOLD - time.monotonic(), 0.01), 1.0)
+
+    def _write_held(self):
+        now   = time.monotonic()
+        force = self._flushing.is_set()
+        for path, entry in list(self._held.items()):
+            if not force and now - entry["since"] < COALESCE_HOLD:
+                continue
+            del self._held[path]
+            items  = entry["items"]
+            actors = [doc.get("actor") for _, _, doc in items if doc.get("actor")]
+            with self._lock:
+                self._stats["coalesced"] += len(items) - 1
+            written = self._write(items, lambda: _merge_coalesced(db.transaction(), entry["ref"], entry["doc"],
+                                                                   len(items), actors))
+            if written:
+                self._publish_coalesced(entry["ref"], entry["doc"]["uid"])
+
+    def _mark_idle(self):
+        with self._lock:
+            if self._queue.empty() and not self._held:
+                self._idle.set()
+
+    def _write(self, items: list, commit=None):
+        """Commit with retries; returns the commit's result, or None once given up."""
+        delay = BACKOFF_START
+        for attempt in range(MAX_RETRIES + 1):
+            try:
+                if commit:
+                    result = commit()
+                else:
+                    result = self._commit_batch(items)
+                break
+            except Exception as e:
+                if attempt == MAX_RETRIES:
+                    with self._lock:
+                        self._stats["failed"] += len(items)
+                    logger.error("dropping %d notifications after %d retries: %s",
+                                 len(items), MAX_RETRIES, e)
+                    self._done(items)
+                    return None
+                with self._lock:
+                    self._stats["retries"] += 1
+                logger.warning("notification batch failed (attempt %d), retrying in %.1fs: %s",
+                               attempt + 1, delay, e)
+                time.sleep(delay)
+                delay = min(delay * 2, BACKOFF_MAX)
+
+        now = time.monotonic()
+        with self._lock:
+            self._stats["written"] += len(items)
+            self._stats["batches"] += 1
+            self._latencies.extend(now - enqueued for enqueued, _, _ in items)
+        self._done(items)
+        return result
+
+    @staticmethod
+    def _commit_batch(items: list):
+        batch = db.batch()
+        for _, ref, doc in items:
+            batch.set(ref, doc)
+        unread = Counter(doc["uid"] for _, _, doc in items if not doc.get("read"))
+        for uid, n in unread.items():
+            batch.set(state_ref(uid), {"unread": gfs.Increment(n)}, merge=True)
+        return batch.commit()
+
+    # ── Live delivery (after commit) ─────────────────────────────────────────
+
+    @staticmethod
+    def _publish_batch(items: list, results: list):
+        # SERVER_TS resolves to the commit time, which is each write's update_time
+        for (_, ref, doc), result in zip(items, results):
+            if hub.listening(doc["uid"]):
+                hub.publish(doc["uid"], {**doc, "id": ref.id, "created_at": result.update_time})
+
+    @staticmethod
+    def _publish_coalesced(ref, uid: str):
+        if not hub.listening(uid):
+            return
+        try:
+            data = doc_to_dict(ref.get())
+        except Exception as e:
+            logger.warning("could not read back coalesced notification %s: %s", ref.id, e)
+            return
+        if data:
+            data.pop("actors", None)
+            hub.publish(uid, data)
+
+    def _done(self, items: list):
+        for _ in items:
+            self._queue.task_done()
+        self._mark_idle()
+
+    # ── Shutdown / introspection ─────────────────────────────────────────────
+
+    def flush(self, timeout: float = 10.0) -> bool:
+        """Wait until everything queued so far is written (or given up on)."""
+        if self._thread is None:
+            return True
+        self._flushing.set()   # don't wait out coalescing holds
+        try:
+            done = self._idle.wait(timeout)
+        finally:
+            self._flushing.clear()
+        if not done:
+            logger.warning("notification flush timed out with %d queued", self._queue.qsize())
+        return done
+
+    def metrics(self) -> dict:
+        with self._lock:
+            latencies = sorted(self._latencies)
+            stats     = dict(self._stats)
+        stats["queue_depth"] = self._queue.qsize()
+        stats["held"]        = len(self._held)
+        stats["live_streams"] = hub.connections()
+        if latencies:
+            stats["latency_ms"] = {
+                "p50": round(statistics.median(latencies) * 1000, 1),
+                "p95": round(latencies[int(0.95 * (len(latencies) - 1))] * 1000, 1),
+                "max": round(latencies[-1] * 1000, 1),
+            }
+        return stats
+
+
+dispatcher = NotificationDispatcher(getattr(settings, "NOTIFICATION_QUEUE_SIZE", 10_000))
+atexit.register(dispatcher.flush)
+
+
+@gfs.transactional
+def _merge_coalesced(transaction, ref, doc: dict, n: int, actors: list):
+    """Fold `n` notifications (from `actors`, if known) into the coalesced document `ref`."""
+    sref  = state_ref(doc["uid"])
+    old   = ref.get(transaction=transaction).to_dict()
+    state = sref.get(transaction=transaction).to_dict() or {}
+
+    seen  = (old or {}).get("actors", [])
+    new   = [a for a in dict.fromkeys(actors) if a not in seen]
+    added = len(new) if actors else n
+    if old and not added:
+        return False   # e.g. the same user liking again after an unlike
+
+    count = added + (old.get("count", 1) if old else 0)
+    data  = {k: v for k, v in doc.items() if k not in ("summary", "actor")}
+    data.update(count=count, actors=(seen + new)[-MAX_ACTORS:], read=False, created_at=SERVER_TS)
+    if count > 1 and doc.get("summary"):
+        data["message"] = doc["summary"].format(count=count)
+    transaction.set(ref, data)
+    if old is None or is_read(old, state.get("read_watermark")):
+        transaction.set(sref, {"unread": gfs.Increment(1)}, merge=True)
+    return True
+
+
+def push_notification(uid: str, title: str, message: str, ntype: str = "general",
+                      subject: str = None, summary: str = None, actor: str = None):
     """
     Fire-and-forget helper. Call from any view after a meaningful action.
+    Returns the new notification's id immediately; the write happens in the
+    background (see NotificationDispatcher).
+
+    Pass `subject` to coalesce bursts: notifications with the same
+    (uid, type, subject) share one document, whose message becomes
+    `summary.format(count=n)` once there is more than one. `actor` (the uid
+    that caused it) keeps repeat events from one user from inflating n.
 
     Types:
         general     → default grey bell
         test        → quiz/exam events
         profile     → avatar / profile changes
         achievement → badges / milestones
+        like        → reactions on your Dev2Dev posts
+        comment     → replies on your Dev2Dev posts
+        digest      → weekly roll-up (manage.py digest_notifications)
     """
-    try:
-        db.collection(NOTIFICATIONS).add({
-            "uid":        uid,
-            "title":      title,
-            "message":    message,
-            "type":       ntype,
-            "read":       False,
-            "created_at": SERVER_TS,
-        })
-    except Exception:
-        pass  # Never let a notification failure break the main flow
\ No newline at end of file
+    doc = {
+        "uid":        uid,
+        "title":      title,
+        "message":    message,
+        "type":       ntype,
+        "read":       False,
+        "created_at": SERVER_TS,
+    }
+    if subject:
+        doc.update(subject=subject, summary=summary, actor=actor)
+    return dispatcher.enqueue(doc)
+
+
+# ── Unread state ──────────────────────────────────────────────────────────────
+
+def state_ref(uid: str):
+    return db.collection(NOTIFICATION_STATE).document(uid)
+
+
+def is_read(notif: dict, watermark) -> bool:
+    if notif.get("read"):
+        return True
+    created = notif.get("created_at")
+    return bool(watermark and isinstance(created, datetime) and created <= watermark)
+
+
+def _count_unread(uid: str) -> int:
+    query = db.collection(NOTIFICATIONS).where("uid", "==", uid).where("read", "==", False)
+    return query.count().get()[0][0].value
+
+
+def read_state(uid: str) -> dict:
+    """{"unread": n, "read_watermark": ts | None}. One document read."""
+    ref   = state_ref(uid)
+    state = ref.get().to_dict() or {}
+    if not state.get("counted"):
+        # Notifications from before the counter existed: count them once.
+        unread = _count_unread(uid)
+        ref.set({"unread": unread, "counted": True}, merge=True)
+        state.update(unread=unread)
+    return {"unread": max(state.get("unread", 0), 0), "read_watermark": state.get("read_watermark")}
+
+
+@gfs.transactional
+def _mark_read(transaction, ref, uid: str):
+    data = ref.get(transaction=transaction).to_dict()
+    if not data or data.get("uid") != uid:
+        return data
+    state = state_ref(uid).get(transaction=transaction).to_dict() or {}
+    if not is_read(data, state.get("read_watermark")):
+        transaction.update(ref, {"read": True})
+        if state.get("counted"):
+            transaction.set(state_ref(uid), {"unread": gfs.Increment(-1)}, merge=True)
+    return data
+
+
+def mark_read(uid: str, notif_id: str):
+    """Mark one notification read. Returns its data (None if it doesn't exist)."""
+    ref = db.collection(NOTIFICATIONS).document(notif_id)
+    return _mark_read(db.transaction(), ref, uid)
+
+
+def mark_all_read(uid: str):
+    """One write: zero the counter and move the read watermark to now."""
+    state_ref(uid).set({"unread": 0, "counted": True, "read_watermark": SERVER_TS}, merge=True)
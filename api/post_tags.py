@@ -0,0 +1,74 @@
+"""
+api/post_tags.py — Materialised Dev2Dev tag counts.
+
+    post_tags/{key}   {"tag": "System Design", "count": 42, "last_activity": <ts>}
+
+Maintained incrementally when posts are created and deleted, so listing
+popular tags (and tag autocomplete) is one small query instead of a scan of
+every post's `tags` array. The list is cached in Django's cache for
+TAGS_CACHE_SECONDS; `manage.py rebuild_post_tags` recomputes it from posts.
+"""
+
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+from google.cloud import firestore as gfs
+
+from api.firebase import db, SERVER_TS, Collections
+
+
+CACHE_KEY     = "dev2dev:post_tags"
+CACHE_SECONDS = getattr(settings, "TAGS_CACHE_SECONDS", 60)
+LIST_LIMIT    = 500
+MAX_TAG_LEN   = 50
+
+
+def tag_key(tag: str) -> str:
+    """Case-insensitive, path-safe document id for a tag."""
+    return quote(tag.strip().lower(), safe="").replace(".", "%2E")
+
+
+def _clean(tags) -> dict:
+    """{key: display tag} for the distinct, non-empty tags of one post."""
+    out = {}
+    for tag in tags or []:
+        if isinstance(tag, str) and tag.strip() and len(tag.strip()) <= MAX_TAG_LEN:
+            out.setdefault(tag_key(tag), tag.strip())
+    return out
+
+
+def record_post(tags, delta: int, batch=None):
+    """Add `delta` (+1 create / -1 delete) to each tag's count."""
+    tags = _clean(tags)
+    if not tags:
+        return
+    own = batch is None
+    batch = batch or db.batch()
+    ref = db.collection(Collections.POST_TAGS)
+    for key, tag in tags.items():
+        data = {"tag": tag, "count": gfs.Increment(delta)}
+        if delta > 0:
+            data["last_activity"] = SERVER_TS
+        batch.set(ref.document(key), data, merge=True)
+    if own:
+        batch.commit()
+    cache.delete(CACHE_KEY)
+
+
+def list_tags() -> list:
+    """All tags with posts, most used first. Cached."""
+    tags = cache.get(CACHE_KEY)
+    if tags is None:
+        query = (
+            db.collection(Collections.POST_TAGS)
+            .where("count", ">", 0)
+            .order_by("count", direction=gfs.Query.DESCENDING)
+            .limit(LIST_LIMIT)
+        )
+        tags = [
+            {"tag": d.get("tag"), "count": d.get("count"), "last_activity": d.get("last_activity")}
+            for d in (snap.to_dict() for snap in query.stream())
+        ]
+        cache.set(CACHE_KEY, tags, CACHE_SECONDS)
+    return tags
@@ -0,0 +1,191 @@
+"""
+api/prompts.py — Prompt templates for Groq generation.
+
+Static rule text lives in a shared system message that is byte-identical for
+every request, so the provider can reuse its cached prefix. Only the short
+user message (company name, seed) varies. Each template also declares the
+per-section output limits it asks for, which are enforced again after
+parsing, and an output token cap that is sent as max_tokens.
+"""
+
+import logging
+import re
+
+from django.conf import settings
+
+
+logger = logging.getLogger(__name__)
+
+_WORDS = re.compile(r"\w+|[^\w\s]")
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Cheap BPE-ish estimate (Llama tokenizers average ~4 chars/token on
+    English, but punctuation-heavy JSON schemas tokenise denser).
+    """
+    if not text:
+        return 0
+    return max(len(text) // 4, int(len(_WORDS.findall(text)) * 0.75))
+
+
+class PromptTemplate:
+    def __init__(self, name: str, system: str, user: str, max_tokens: int,
+                 list_limits: dict, text_limits: dict, max_prompt_tokens: int = 2000):
+        self.name              = name
+        self.system            = system.strip()
+        self.user              = user.strip()
+        self.max_tokens        = max_tokens
+        self.list_limits       = list_limits
+        self.text_limits       = text_limits
+        self.max_prompt_tokens = max_prompt_tokens
+
+    def render(self, **values) -> list:
+        messages = [
+            {"role": "system", "content": self.system},
+            {"role": "user",   "content": self.user.format(**values)},
+        ]
+        estimate = self.estimate(messages)
+        if estimate > self.max_prompt_tokens:
+            logger.warning("prompt %s is ~%d tokens (budget %d)", self.name, estimate, self.max_prompt_tokens)
+        return messages
+
+    @staticmethod
+    def estimate(messages: list) -> int:
+        # +4 per message for role/formatting overhead
+        return sum(estimate_tokens(m["content"]) + 4 for m in messages)
+
+    def enforce_limits(self, payload: dict) -> dict:
+        """Trim list sections and long strings to the limits the prompt asked for."""
+        for key, limit in self.list_limits.items():
+            if isinstance(payload.get(key), list):
+                payload[key] = payload[key][:limit]
+
+        def clip(obj):
+            for field, limit in self.text_limits.items():
+                value = obj.get(field)
+                if isinstance(value, str) and len(value) > limit:
+                    obj[field] = value[:limit - 1].rstrip() + "…"
+
+        clip(payload)
+        for value in payload.values():
+            if isinstance(value, list):
+                for item in value:
+                    if isinstance(item, dict):
+                        clip(item)
+        return payload
+
+
+# ── Company guide ─────────────────────────────────────────────────────────────
+
+_GUIDE_LIST_LIMITS = {"pyqs": 10, "rounds_detail_list": 6, "tips": 6, "resources": 5, "roles": 5}
+_GUIDE_TEXT_LIMITS = {"tagline": 120, "about": 450, "desc": 300, "q": 300}
+
+_GUIDE_SCHEMA = """
+{
+  "name": "<company>",
+  "tagline": "<witty, company-specific tagline>",
+  "about": "<2–3 sentences on the company's interview culture and what they look for>",
+  "package": "<realistic salary range in LPA for India fresher/SDE-1>",
+  "difficulty": "Easy | Medium | Hard",
+  "rounds": <integer — actual number of rounds>,
+  "roles": ["<actual roles the company hires for>"],
+  "rounds_detail_list": [
+    {"name": "<actual round name>", "type": "OA | Technical | HR | Behavioral | System",
+     "duration": "<real duration>", "desc": "<what happens in this round at the company>"}
+  ],
+  "pyqs": [
+    {"q": "<actual question asked at the company>", "tag": "<topic tag>",
+     "difficulty": "Easy | Medium | Hard", "freq": "High | Medium | Low"}
+  ],
+  "tips": ["<company-specific tip>"],
+  "resources": [{"title": "<resource name>", "type": "Practice | Book | Guide | PYQ | Video"}]
+}
+"""
+
+COMPANY_GUIDE_FULL = PromptTemplate(
+    name="company_guide_full",
+    system="""
+You are a senior placement expert with verified knowledge of companies' actual hiring processes.
+You generate DETAILED, 100% COMPANY-SPECIFIC interview preparation guides.
+
+════════════════════════════════════════
+ABSOLUTE RULES — every single one is mandatory:
+════════════════════════════════════════
+
+1. PYQS MUST BE REAL, COMPANY-SPECIFIC questions:
+   - These must be questions that have ACTUALLY been asked at the company's interviews,
+     sourced from verified platforms like GeeksForGeeks, LeetCode Discuss, Glassdoor,
+     AmbitionBox, or InterviewBit.
+   - Do NOT generate generic DSA questions like "Reverse a linked list" or "Two Sum"
+     unless they are specifically and frequently documented for the company.
+   - For product/FAANG companies (Google, Amazon, Meta, Microsoft, Adobe, Oracle, Goldman Sachs, D.E. Shaw):
+     * Include their specific algorithmic problems with exact problem descriptions
+     * Include system design questions they actually ask (e.g. "Design Google Search", "Design Amazon's recommendation system")
+     * Include behavioral/LP questions unique to their culture
+   - For service companies (TCS, Infosys, Wipro, Capgemini, Accenture, Deloitte):
+     * Include their specific OA test questions (NQT patterns, AMCAT, Cocubes)
+     * Include the specific pseudocode/output-tracing questions they use
+     * Include their specific aptitude question patterns
+   - For fintech/startup companies (Swiggy, Zomato, Paytm, PhonePe):
+     * Include their specific system design questions (e.g. "Design Swiggy's delivery tracking")
+     * Include their product-specific questions
+   - Generate 8-10 PYQs with different tags
+
+2. ROUNDS must reflect the company's ACTUAL interview process:
+   - Use the real round names (e.g. "TCS NQT", "Amazon Bar Raiser", "Google Onsite", "Infosys HackWithInfy")
+   - Use real platform names (HackerRank for Amazon OA, Codility for Microsoft, etc.)
+   - Use real durations and formats
+   - Include the correct number of rounds (at most 6 in rounds_detail_list)
+
+3. TIPS must be company-SPECIFIC (at most 6):
+   - Mention their actual evaluation criteria
+   - Mention their specific culture/values (Amazon Leadership Principles, Google Googleyness, etc.)
+   - Mention their specific interview quirks or known patterns
+
+4. TAGLINE must be witty and specific to the company, not generic.
+
+5. Every field must be accurate and non-generic. If you are uncertain about a detail,
+   use the most commonly reported version from interview experience databases.
+
+6. Length limits: about ≤ 3 sentences, each round desc ≤ 2 sentences, at most 5 resources.
+
+════════════════════════════════════════
+Return ONLY valid JSON matching this exact schema (no extra text, no markdown):
+════════════════════════════════════════
+""" + _GUIDE_SCHEMA,
+    user="Company: {company_name}\nSession seed: {seed}\n\nGenerate the guide for {company_name}.",
+    max_tokens=3500,
+    list_limits=_GUIDE_LIST_LIMITS,
+    text_limits=_GUIDE_TEXT_LIMITS,
+)
+
+COMPANY_GUIDE_COMPACT = PromptTemplate(
+    name="company_guide_compact",
+    system="""
+You are a placement expert. Write a company-specific interview guide as JSON only (no markdown).
+Rules:
+- pyqs: 8-10 questions REALLY asked at this company (GfG, LeetCode Discuss, Glassdoor); no generic DSA unless documented for it. Product cos: DSA + system design + behavioral; service cos: OA/NQT/aptitude/pseudocode patterns; startups: product system design.
+- rounds_detail_list: real round names, platforms, durations; max 6; desc ≤ 2 sentences.
+- tips: max 6, company-specific (values, criteria, quirks). resources: max 5.
+- tagline witty + specific; about ≤ 3 sentences. If unsure, use the most commonly reported version.
+Schema:
+""" + _GUIDE_SCHEMA,
+    user="Company: {company_name}\nSeed: {seed}",
+    max_tokens=2500,
+    list_limits=_GUIDE_LIST_LIMITS,
+    text_limits=_GUIDE_TEXT_LIMITS,
+)
+
+COMPANY_GUIDE_TEMPLATES = {
+    "full":    COMPANY_GUIDE_FULL,
+    "compact": COMPANY_GUIDE_COMPACT,
+}
+
+
+def company_guide_template(name: str = None) -> PromptTemplate:
+    name = name or getattr(settings, "COMPANY_GUIDE_PROMPT", "compact")
+    try:
+        return COMPANY_GUIDE_TEMPLATES[name]
+    except KeyError:
+        raise ValueError(f"Unknown company guide template '{name}'")
@@ -0,0 +1,100 @@
+"""
+api/ranking.py — "Hot" score for the Dev2Dev feed.
+
+    hot_score = log10(max(likes + COMMENT_WEIGHT * comments, 1))
+                + (created_at - EPOCH) / DECAY_SECONDS
+
+The time term grows with the post's creation time rather than shrinking with
+age, so a score never has to change just because time passes: newer posts
+outrank older ones unless the older one has 10× the engagement per
+DECAY_SECONDS of age. That keeps `order_by("hot_score")` stable and indexable.
+
+Scores are refreshed when a post's counters change (throttled per post, see
+maybe_rescore) and by `manage.py rescore_hot_posts`, which also catches up
+counter changes the throttle skipped.
+
+Comments get the same treatment for "top" ordering: `upvote_rank` is a
+plain copy of the (sharded) upvote count that Firestore can order by.
+"""
+
+import logging
+import math
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+
+from api import counters
+
+
+logger = logging.getLogger(__name__)
+
+EPOCH          = 1_700_000_000   # 2023-11-14 UTC; keeps scores small
+DECAY_SECONDS  = 45_000          # 12.5 h per 10× engagement
+COMMENT_WEIGHT = 2
+RESCORE_EVERY  = getattr(settings, "HOT_RESCORE_SECONDS", 60)
+
+SCORE_FIELDS = ["like_count", "comment_count", "created_at", "hot_score"]
+
+_last_rescore: dict = {}   # document path → monotonic time of the last rescore
+_lock = threading.Lock()
+
+
+def hot_score(like_count: int, comment_count: int, created_at) -> float:
+    if not isinstance(created_at, datetime):
+        created_at = datetime.now(timezone.utc)
+    engagement = max(like_count or 0, 0) + COMMENT_WEIGHT * max(comment_count or 0, 0)
+    order = math.log10(max(engagement, 1))
+    return round(order + (created_at.timestamp() - EPOCH) / DECAY_SECONDS, 7)
+
+
+def score_of(post: dict) -> float:
+    """Score for a post dict whose counters already include shard sums."""
+    return hot_score(post.get("like_count", 0), post.get("comment_count", 0), post.get("created_at"))
+
+
+def rescore(post_ref) -> float:
+    snap = post_ref.get(field_paths=SCORE_FIELDS)
+    if not snap.exists:
+        return None
+    post  = counters.apply(post_ref, snap.to_dict() or {}, counters.POST_COUNTERS)
+    score = score_of(post)
+    if score != post.get("hot_score"):
+        post_ref.update({"hot_score": score})
+    return score
+
+
+def _due(ref) -> bool:
+    """True at most once per RESCORE_EVERY seconds per document and process."""
+    now = time.monotonic()
+    with _lock:
+        last = _last_rescore.get(ref.path)
+        if last is not None and now - last < RESCORE_EVERY:
+            return False
+        _last_rescore[ref.path] = now
+        if len(_last_rescore) > 10_000:
+            cutoff = now - RESCORE_EVERY
+            for path in [p for p, t in _last_rescore.items() if t < cutoff]:
+                del _last_rescore[path]
+    return True
+
+
+def maybe_rescore(post_ref):
+    """Throttled rescore() after a post's counters changed. Never raises."""
+    if not _due(post_ref):
+        return
+    try:
+        rescore(post_ref)
+    except Exception as e:
+        logger.warning("hot score update failed for post %s: %s", post_ref.id, e)
+
+
+def maybe_rerank_comment(comment_ref, upvote_count: int):
+    """Throttled upvote_rank refresh after an upvote toggle. Never raises."""
+    if not _due(comment_ref):
+        return
+    try:
+        comment_ref.update({"upvote_rank": upvote_count})
+    except Exception as e:
+        logger.warning("upvote rank update failed for comment %s: %s", comment_ref.id, e)
@@ -0,0 +1,142 @@
+"""
+api/reactions.py — Likes / upvotes as one small document per (target, user).
+
+    posts/{post_id}/reactions/like_{uid}
+    posts/{post_id}/comments/{comment_id}/reactions/like_{uid}
+    posts/{post_id}/comments/{comment_id}/reactions/upvote_{uid}
+
+A toggle is a transaction that creates or deletes the reaction document and
+increments the target's sharded counter (api/counters.py), so concurrent
+toggles never lose updates and never contend on the target document itself.
+
+The same transaction maintains a per-user index on the post, so views learn
+what the caller reacted to from one small read instead of UID arrays:
+
+    posts/{post_id}/reaction_index/{uid}
+        {"post_liked": true, "comment_likes": [cid, ...], "comment_upvotes": [cid, ...]}
+
+Posts and comments created before this still carry `likes` / `upvotes` UID
+arrays. Those arrays are treated as existing reactions and only ever shrink
+(ArrayRemove on un-react); new reactions never touch them.
+`manage.py backfill_reaction_index` copies them into the index. Until that
+has run and REACTION_INDEX_BACKFILLED is set, views also read the arrays
+(legacy_fields / legacy_reacted) so earlier reactions still show.
+"""
+
+from django.conf import settings
+from google.cloud import firestore as gfs
+
+from api import counters
+from api.firebase import db, SERVER_TS
+
+
+REACTIONS      = "reactions"
+REACTION_INDEX = "reaction_index"
+
+LIKE   = "like"
+UPVOTE = "upvote"
+
+# kind → (legacy array field, counter field)
+FIELDS = {
+    LIKE:   ("likes",   "like_count"),
+    UPVOTE: ("upvotes", "upvote_count"),
+}
+
+# kind → reaction_index field for comment reactions
+COMMENT_INDEX_FIELDS = {
+    LIKE:   "comment_likes",
+    UPVOTE: "comment_upvotes",
+}
+
+# Everything except the legacy UID arrays — used with .select() on reads
+POST_FIELDS    = ["title", "body", "tags", "author_uid", "author_name", "author_initials",
+                  "like_count", "comment_count", "hot_score", "created_at"]
+COMMENT_FIELDS = ["body", "author_uid", "author_name", "author_initials",
+                  "like_count", "upvote_count", "upvote_rank", "created_at"]
+
+
+class TargetNotFound(Exception):
+    pass
+
+
+def reaction_ref(target_ref, kind: str, uid: str):
+    return target_ref.collection(REACTIONS).document(f"{kind}_{uid}")
+
+
+def index_ref(post_ref, uid: str):
+    return post_ref.collection(REACTION_INDEX).document(uid)
+
+
+def _index_update(target_ref, kind: str, uid: str, active: bool):
+    """(index doc ref, merge payload) recording `uid`'s reaction on a post or comment."""
+    if target_ref.parent.id == "comments":
+        field = COMMENT_INDEX_FIELDS[kind]
+        op    = gfs.ArrayUnion if active else gfs.ArrayRemove
+        return index_ref(target_ref.parent.parent, uid), {field: op([target_ref.id])}
+    return index_ref(target_ref, uid), {"post_liked": active}
+
+
+@gfs.transactional
+def _toggle(transaction, target_ref, kind: str, uid: str):
+    array_field, count_field = FIELDS[kind]
+    ref = reaction_ref(target_ref, kind, uid)
+
+    # Only the base counter, legacy array and author are read — never the post/comment body.
+    target   = target_ref.get(field_paths=[count_field, array_field, "author_uid"], transaction=transaction)
+    reaction = ref.get(transaction=transaction)
+    if not target.exists:
+        raise TargetNotFound()
+
+    data   = target.to_dict() or {}
+    legacy = uid in (data.get(array_field) or [])
+    base   = data.get(count_field, 0)
+    author = data.get("author_uid")
+
+    if reaction.exists or legacy:
+        if legacy:
+            transaction.update(target_ref, {array_field: gfs.ArrayRemove([uid])})
+        transaction.delete(ref)
+        transaction.set(*_index_update(target_ref, kind, uid, False), merge=True)
+        counters.increment(target_ref, {count_field: -1}, writer=transaction)
+        return False, base, author
+
+    transaction.set(ref, {"uid": uid, "kind": kind, "created_at": SERVER_TS})
+    transaction.set(*_index_update(target_ref, kind, uid, True), merge=True)
+    counters.increment(target_ref, {count_field: 1}, writer=transaction)
+    return True, base, author
+
+
+def toggle_reaction(target_ref, kind: str, uid: str):
+    """Flip `uid`'s reaction on the target. Returns (active, new_count, target's author_uid)."""
+    active, base, author = _toggle(db.transaction(), target_ref, kind, uid)
+    counters.invalidate(target_ref)
+    return active, counters.value(target_ref, FIELDS[kind][1], base), author
+
+
+def reaction_index(post_ref, uid: str) -> dict:
+    """What `uid` reacted to on this post and its comments — one document read."""
+    data = index_ref(post_ref, uid).get().to_dict() or {}
+    return {
+        "post_liked":      bool(data.get("post_liked")),
+        "comment_likes":   set(data.get("comment_likes") or []),
+        "comment_upvotes": set(data.get("comment_upvotes") or []),
+    }
+
+
+def legacy_fields(*kinds) -> list:
+    """Legacy UID-array fields to read alongside POST_FIELDS / COMMENT_FIELDS until the backfill is confirmed."""
+    if getattr(settings, "REACTION_INDEX_BACKFILLED", False):
+        return []
+    return [FIELDS[kind][0] for kind in kinds]
+
+
+def legacy_reacted(doc: dict, kind: str, uid: str) -> bool:
+    """Drop the legacy array from `doc` (never sent to clients); True if `uid` is in it."""
+    return uid in (doc.pop(FIELDS[kind][0], None) or [])
+
+
+def delete_reactions(target_ref):
+    """Remove the reaction and counter-shard subcollections (Firestore does not cascade deletes)."""
+    for name in (REACTIONS, REACTION_INDEX, counters.SHARDS):
+        for snap in target_ref.collection(name).select([]).stream():
+            snap.reference.delete()
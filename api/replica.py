@@ -0,0 +1,300 @@
+"""
+api/replica.py — Local SQLite read replica for read-mostly collections.
+
+study_modules and study_lessons are mirrored as JSON rows in the project's
+local database, so views read them without a Firestore round trip.
+Firestore stays the source of truth:
+
+  * read-through  — a missing or stale row (older than MAX_STALENESS) is
+                    fetched from Firestore and stored; an empty local query
+                    result always falls through to Firestore.
+  * write-through — our own write paths call put() / delete() / clear().
+  * delta sync    — `manage.py sync_replica` pulls documents whose
+                    SYNC_FIELDS timestamp moved past the last watermark.
+                    A delta pass only vouches for the whole collection when
+                    Firestore's document count, the count of documents
+                    carrying the timestamp and the local row count all
+                    agree; otherwise (a deletion, a writer that skipped the
+                    stamp) it falls back to a full re-mirror.
+  * full sync     — `--full` (or the fallback above) re-mirrors the whole
+                    collection and stamps documents that lack the timestamp,
+                    so later delta passes can see them.
+
+A collection synced within MAX_STALENESS is served entirely from SQLite.
+Any SQLite error falls back to Firestore — the replica is only a cache.
+
+Company guides are deliberately not mirrored: they are rewritten and deleted
+at runtime (refresh, regeneration), and a per-host copy would keep serving
+the old guide on every other host. api/guide_cache.py covers their hot path.
+"""
+
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.db import connection, transaction
+from rest_framework.utils.encoders import JSONEncoder
+
+from api.firebase import db, Collections, SERVER_TS, DELETE_FIELD, doc_to_dict
+
+
+logger = logging.getLogger(__name__)
+
+ENABLED       = getattr(settings, "REPLICA_ENABLED", True)
+MAX_STALENESS = getattr(settings, "REPLICA_MAX_STALENESS", 900)
+
+# collection → timestamp field used for delta sync
+SYNC_FIELDS = {
+    Collections.STUDY_MODULES: "updated_at",
+    Collections.STUDY_LESSONS: "updated_at",
+}
+
+DOCS  = "replica_docs"
+STATE = "replica_state"   # key = collection name, or "collection?field=value" for a fetched query
+
+_ready = False
+_ready_lock = threading.Lock()
+
+
+def ensure_tables():
+    global _ready
+    if _ready:
+        return
+    with _ready_lock:
+        if _ready:
+            return
+        with connection.cursor() as cur:
+            cur.execute(f"""
+                CREATE TABLE IF NOT EXISTS {DOCS} (
+                    collection TEXT NOT NULL,
+                    doc_id     TEXT NOT NULL,
+                    data       TEXT NOT NULL,
+                    synced_at  REAL NOT NULL,
+                    PRIMARY KEY (collection, doc_id)
+                )
+            """)
+            cur.execute(f"""
+                CREATE TABLE IF NOT EXISTS {STATE} (
+                    key       TEXT PRIMARY KEY,
+                    synced_at REAL NOT NULL,
+                    watermark TEXT
+                )
+            """)
+            for field in ("subject_id", "module_id"):
+                cur.execute(
+                    f"CREATE INDEX IF NOT EXISTS {DOCS}_{field} "
+                    f"ON {DOCS}(collection, json_extract(data, '$.{field}'))"
+                )
+            # Rows of collections no longer mirrored (company_cache) are never read again
+            marks = ", ".join(["%s"] * len(SYNC_FIELDS))
+            cur.execute(f"DELETE FROM {DOCS} WHERE collection NOT IN ({marks})", list(SYNC_FIELDS))
+        _ready = True
+
+
+# ── Helpers ───────────────────────────────────────────────────────────────────
+
+def _encode(data: dict) -> str:
+    return json.dumps(data, cls=JSONEncoder, ensure_ascii=False, separators=(",", ":"))
+
+
+def _fresh(synced_at) -> bool:
+    return synced_at is not None and time.time() - synced_at < MAX_STALENESS
+
+
+def _state(cur, key: str):
+    cur.execute(f"SELECT synced_at, watermark FROM {STATE} WHERE key = %s", [key])
+    return cur.fetchone() or (None, None)
+
+
+def _mark(cur, key: str, watermark: str = None):
+    cur.execute(f"""
+        INSERT INTO {STATE}(key, synced_at, watermark) VALUES (%s, %s, %s)
+        ON CONFLICT(key) DO UPDATE SET
+            synced_at = excluded.synced_at,
+            watermark = COALESCE(excluded.watermark, {STATE}.watermark)
+    """, [key, time.time(), watermark])
+
+
+def _advance(cur, key: str, watermark: str):
+    """Move a delta watermark without claiming the collection is fresh."""
+    if watermark:
+        cur.execute(f"UPDATE {STATE} SET watermark = %s WHERE key = %s", [watermark, key])
+
+
+def _store(cur, collection: str, docs: list):
+    now = time.time()
+    for doc in docs:
+        data = {k: v for k, v in doc.items() if k != "id"}
+        cur.execute(f"""
+            INSERT INTO {DOCS}(collection, doc_id, data, synced_at) VALUES (%s, %s, %s, %s)
+            ON CONFLICT(collection, doc_id) DO UPDATE SET data = excluded.data, synced_at = excluded.synced_at
+        """, [collection, doc["id"], _encode(data), now])
+
+
+def _write(fn, *args):
+    """Run a replica write; never let SQLite trouble fail the request."""
+    if not ENABLED:
+        return
+    try:
+        ensure_tables()
+        with transaction.atomic(), connection.cursor() as cur:
+            fn(cur, *args)
+    except Exception as e:
+        logger.warning("replica write failed: %s", e)
+
+
+# ── Reads ─────────────────────────────────────────────────────────────────────
+
+def get(collection: str, doc_id: str):
+    """One document as doc_to_dict() would return it, or None."""
+    if ENABLED:
+        try:
+            ensure_tables()
+            with connection.cursor() as cur:
+                cur.execute(
+                    f"SELECT data, synced_at FROM {DOCS} WHERE collection = %s AND doc_id = %s",
+                    [collection, doc_id],
+                )
+                row = cur.fetchone()
+                if row and (_fresh(row[1]) or _fresh(_state(cur, collection)[0])):
+                    return {**json.loads(row[0]), "id": doc_id}
+        except Exception as e:
+            logger.warning("replica read failed, using Firestore: %s", e)
+
+    doc = doc_to_dict(db.collection(collection).document(doc_id).get())
+    if doc:
+        put(collection, doc_id, doc)
+    else:
+        delete(collection, doc_id)
+    return doc
+
+
+def query(collection: str, field: str, value, order_by: str = None, refresh: bool = False) -> list:
+    """Documents where `field` == `value` (optionally ordered), like query_to_list()."""
+    key = f"{collection}?{field}={value}"
+    if ENABLED and not refresh:
+        try:
+            ensure_tables()
+            with connection.cursor() as cur:
+                if _fresh(_state(cur, collection)[0]) or _fresh(_state(cur, key)[0]):
+                    # field names come from code, never from requests; literal
+                    # paths let SQLite use the json_extract expression indexes
+                    order = f"json_extract(data, '$.{order_by}')" if order_by else "doc_id"
+                    cur.execute(f"""
+                        SELECT doc_id, data FROM {DOCS}
+                        WHERE collection = %s AND json_extract(data, '$.{field}') = %s
+                        ORDER BY {order}
+                    """, [collection, value])
+                    rows = cur.fetchall()
+                    if rows:
+                        return [{**json.loads(data), "id": doc_id} for doc_id, data in rows]
+        except Exception as e:
+            logger.warning("replica query failed, using Firestore: %s", e)
+
+    q = db.collection(collection).where(field, "==", value)
+    if order_by:
+        q = q.order_by(order_by)
+    docs = [doc_to_dict(d) for d in q.stream()]
+
+    def store(cur):
+        _store(cur, collection, docs)
+        _mark(cur, key)
+    _write(store)
+    return docs
+
+
+# ── Write-through ─────────────────────────────────────────────────────────────
+
+def put(collection: str, doc_id: str, data: dict):
+    """Mirror a document we just wrote. Server timestamps are stored as 'now'."""
+    now  = datetime.now(timezone.utc)
+    data = {k: (now if v is SERVER_TS else v) for k, v in data.items() if v is not DELETE_FIELD}
+    _write(_store, collection, [{**data, "id": doc_id}])
+
+
+def delete(collection: str, doc_id: str):
+    _write(lambda cur: cur.execute(
+        f"DELETE FROM {DOCS} WHERE collection = %s AND doc_id = %s", [collection, doc_id],
+    ))
+
+
+def clear(collection: str):
+    def run(cur):
+        cur.execute(f"DELETE FROM {DOCS} WHERE collection = %s", [collection])
+        cur.execute(f"DELETE FROM {STATE} WHERE key = %s OR key LIKE %s", [collection, f"{collection}?%"])
+    _write(run)
+
+
+# ── Sync ──────────────────────────────────────────────────────────────────────
+
+def sync(collection: str, full: bool = False, page_size: int = 500) -> int:
+    """Pull changes from Firestore. Returns the number of documents stored."""
+    ensure_tables()
+    field = SYNC_FIELDS[collection]
+    with connection.cursor() as cur:
+        watermark = None if full else _state(cur, collection)[1]
+
+    if watermark is None:
+        return _full_sync(collection, field)
+
+    query  = db.collection(collection).order_by(field)
+    if watermark:
+        query = query.where(field, ">", datetime.fromisoformat(watermark))
+    cursor, total = None, 0
+    while True:
+        page = query.start_after(cursor) if cursor else query
+        snaps = list(page.limit(page_size).stream())
+        docs  = [doc_to_dict(s) for s in snaps]
+        with transaction.atomic(), connection.cursor() as cur:
+            _store(cur, collection, docs)
+            _advance(cur, collection, _max_watermark(docs, field))
+        total += len(docs)
+        if len(snaps) < page_size:
+            break
+        cursor = snaps[-1]
+
+    if not _complete(collection, field):
+        logger.info("replica delta sync of %s cannot see every document, re-mirroring", collection)
+        return total + _full_sync(collection, field)
+    with transaction.atomic(), connection.cursor() as cur:
+        _mark(cur, collection)
+    return total
+
+
+def _full_sync(collection: str, field: str) -> int:
+    snaps = list(db.collection(collection).stream())
+    docs  = [doc_to_dict(s) for s in snaps]
+    _stamp_missing([s.reference for s, d in zip(snaps, docs) if not isinstance(d.get(field), datetime)], field)
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(f"DELETE FROM {DOCS} WHERE collection = %s", [collection])
+        _store(cur, collection, docs)
+        _mark(cur, collection, _max_watermark(docs, field) or "")
+    return len(docs)
+
+
+def _stamp_missing(refs: list, field: str):
+    """Give documents written without the sync timestamp one, so delta passes pick them up."""
+    for i in range(0, len(refs), 500):
+        batch = db.batch()
+        for ref in refs[i:i + 500]:
+            batch.update(ref, {field: SERVER_TS})
+        batch.commit()
+
+
+def _complete(collection: str, field: str) -> bool:
+    """True when the local rows can stand for the whole collection."""
+    col     = db.collection(collection)
+    total   = col.count().get()[0][0].value
+    stamped = col.order_by(field).count().get()[0][0].value   # order_by skips docs without the field
+    with connection.cursor() as cur:
+        cur.execute(f"SELECT COUNT(*) FROM {DOCS} WHERE collection = %s", [collection])
+        local = cur.fetchone()[0]
+    return total == stamped == local
+
+
+def _max_watermark(docs: list, field: str):
+    stamps = [d[field] for d in docs if isinstance(d.get(field), datetime)]
+    return max(stamps).isoformat() if stamps else None
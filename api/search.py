@@ -0,0 +1,162 @@
+"""
+api/search.py — Full-text search over Dev2Dev posts.
+
+Posts are mirrored into an SQLite FTS5 table in the project's local database
+(settings.DATABASES["default"]) and ranked with BM25, title weighted above
+tags above body. Firestore stays the source of truth: the index is updated
+on post create/delete and can be rebuilt at any time with
+
+    python manage.py rebuild_search_index
+
+The index is per-host, so every instance that serves /dev2dev/search/ should
+run the rebuild on deploy.
+"""
+
+import logging
+import re
+import threading
+
+from django.db import connection, transaction
+
+
+logger = logging.getLogger(__name__)
+
+TABLE = "dev2dev_post_fts"
+
+# bm25() weights, in column order: post_id, title, body, tags, author_name, created_at
+_WEIGHTS = "0.0, 10.0, 1.0, 4.0, 0.0, 0.0"
+_TOKEN   = re.compile(r"\w+", re.UNICODE)
+_TAG_SEP = " | "
+
+_ready = False
+_ready_lock = threading.Lock()
+
+
+def ensure_index():
+    global _ready
+    if _ready:
+        return
+    with _ready_lock:
+        if _ready:
+            return
+        with connection.cursor() as cur:
+            cur.execute(f"""
+                CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5(
+                    post_id UNINDEXED, title, body, tags,
+                    author_name UNINDEXED, created_at UNINDEXED,
+                    tokenize = 'porter unicode61'
+                )
+            """)
+        _ready = True
+
+
+def _row(post: dict) -> tuple:
+    created = post.get("created_at")
+    return (
+        post["id"],
+        post.get("title", ""),
+        post.get("body", ""),
+        _TAG_SEP.join(post.get("tags") or []),
+        post.get("author_name", ""),
+        created.isoformat() if hasattr(created, "isoformat") else str(created or ""),
+    )
+
+
+def _match_expr(text: str, tag: str = None) -> str:
+    """User input → safe FTS5 query: every term required, last one as a prefix."""
+    terms = [t.lower() for t in _TOKEN.findall(text)][:12]
+    parts = [f'"{t}"' for t in terms]
+    if parts:
+        parts[-1] += "*"
+    if tag:
+        tag_terms = _TOKEN.findall(tag)
+        if tag_terms:
+            parts.append("tags:(" + " ".join(f'"{t.lower()}"' for t in tag_terms) + ")")
+    return " AND ".join(parts)
+
+
+# ── Writes ────────────────────────────────────────────────────────────────────
+
+def index_post(post: dict):
+    """Insert or replace one post. Never raises — search is best-effort."""
+    try:
+        ensure_index()
+        with transaction.atomic(), connection.cursor() as cur:
+            cur.execute(f"DELETE FROM {TABLE} WHERE post_id = %s", [post["id"]])
+            cur.execute(f"INSERT INTO {TABLE} VALUES (%s, %s, %s, %s, %s, %s)", _row(post))
+    except Exception as e:
+        logger.warning("search index update failed for post %s: %s", post.get("id"), e)
+
+
+def remove_post(post_id: str):
+    try:
+        ensure_index()
+        with connection.cursor() as cur:
+            cur.execute(f"DELETE FROM {TABLE} WHERE post_id = %s", [post_id])
+    except Exception as e:
+        logger.warning("search index delete failed for post %s: %s", post_id, e)
+
+
+def rename_author(post_ids: list, author_name: str):
+    """Refresh the stored author_name after an author fan-out (api/author_fanout.py)."""
+    if not post_ids:
+        return
+    try:
+        ensure_index()
+        with transaction.atomic(), connection.cursor() as cur:
+            cur.executemany(
+                f"UPDATE {TABLE} SET author_name = %s WHERE post_id = %s",
+                [(author_name, pid) for pid in post_ids],
+            )
+    except Exception as e:
+        logger.warning("search index author rename failed: %s", e)
+
+
+def rebuild(posts) -> int:
+    """Replace the whole index with `posts` (an iterable of post dicts)."""
+    ensure_index()
+    count = 0
+    with transaction.atomic(), connection.cursor() as cur:
+        cur.execute(f"DELETE FROM {TABLE}")
+        for post in posts:
+            cur.execute(f"INSERT INTO {TABLE} VALUES (%s, %s, %s, %s, %s, %s)", _row(post))
+            count += 1
+        cur.execute(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')")
+    return count
+
+
+# ── Reads ─────────────────────────────────────────────────────────────────────
+
+def search_posts(text: str, tag: str = None, page: int = 1, page_size: int = 20) -> dict:
+    expr   = _match_expr(text, tag)
+    result = {"results": [], "count": 0, "page": page, "page_size": page_size, "has_next": False}
+    if not expr:
+        return result
+
+    ensure_index()
+    offset = (page - 1) * page_size
+    with connection.cursor() as cur:
+        cur.execute(f"SELECT count(*) FROM {TABLE} WHERE {TABLE} MATCH %s", [expr])
+        total = cur.fetchone()[0]
+        cur.execute(f"""
+            SELECT post_id, title, snippet({TABLE}, 2, '[', ']', '…', 24), tags,
+                   author_name, created_at, bm25({TABLE}, {_WEIGHTS}) AS score
+            FROM {TABLE}
+            WHERE {TABLE} MATCH %s
+            ORDER BY score
+            LIMIT %s OFFSET %s
+        """, [expr, page_size, offset])
+        rows = cur.fetchall()
+
+    result["results"] = [{
+        "id":          post_id,
+        "title":       title,
+        "snippet":     snippet,
+        "tags":        tags.split(_TAG_SEP) if tags else [],
+        "author_name": author_name,
+        "created_at":  created_at,
+        "score":       round(-score, 4),   # bm25() is lower-is-better
+    } for post_id, title, snippet, tags, author_name, created_at, score in rows]
+    result["count"]    = total
+    result["has_next"] = offset + len(rows) < total
+    return result
@@ -0,0 +1,86 @@
+"""
+api/session_tokens.py — Stateless SkillTest sessions.
+
+The answer key and session metadata are sealed into a compact token that
+the client sends back on submit, so no active_sessions document is needed:
+
+    token = base64url( version | nonce(12) | AES-256-GCM(zlib(json(payload))) )
+
+AES-GCM authenticates as well as encrypts, so a tampered or forged token
+fails to open. The key is SKILLTEST_TOKEN_KEY if set, else derived from
+SECRET_KEY with HKDF. Single submission is enforced by claim_once() (a
+short-lived entry in Django's cache) plus the attempt document being
+created with the session id as its id.
+"""
+
+import base64
+import json
+import os
+import time
+import zlib
+
+from cryptography.exceptions import InvalidTag
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+from django.conf import settings
+from django.core.cache import cache
+
+
+_VERSION = b"\x01"
+_AAD     = b"placeprep-skilltest-v1"
+_key     = None
+
+
+def _aead() -> AESGCM:
+    global _key
+    if _key is None:
+        secret = getattr(settings, "SKILLTEST_TOKEN_KEY", "") or settings.SECRET_KEY
+        if not secret:
+            raise RuntimeError("SKILLTEST_TOKEN_KEY or DJANGO_SECRET_KEY must be set for token sessions")
+        _key = HKDF(
+            algorithm=hashes.SHA256(), length=32, salt=None, info=b"placeprep-skilltest-session",
+        ).derive(secret.encode())
+    return AESGCM(_key)
+
+
+def seal(payload: dict, ttl_seconds: int) -> str:
+    payload = {**payload, "exp": int(time.time()) + ttl_seconds}
+    raw     = zlib.compress(json.dumps(payload, separators=(",", ":")).encode(), 9)
+    nonce   = os.urandom(12)
+    blob    = _VERSION + nonce + _aead().encrypt(nonce, raw, _AAD)
+    return base64.urlsafe_b64encode(blob).rstrip(b"=").decode()
+
+
+def unseal(token: str) -> dict:
+    """Return the payload. Raises ValueError if forged/corrupt, TimeoutError if expired."""
+    try:
+        blob = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+    except (ValueError, TypeError):
+        raise ValueError("Malformed session token.")
+    if blob[:1] != _VERSION or len(blob) < 1 + 12 + 16:
+        raise ValueError("Unsupported session token.")
+
+    try:
+        raw = _aead().decrypt(blob[1:13], blob[13:], _AAD)
+    except InvalidTag:
+        raise ValueError("Invalid session token.")
+
+    payload = json.loads(zlib.decompress(raw))
+    if payload.get("exp", 0) < time.time():
+        raise TimeoutError("Session expired.")
+    return payload
+
+
+def claim_once(session_id: str, ttl_seconds: int) -> bool:
+    """True the first time a session id is claimed, False on replays."""
+    return cache.add(_claim_key(session_id), 1, timeout=ttl_seconds)
+
+
+def release_claim(session_id: str):
+    """Undo claim_once() when the submission could not be saved, so it can be retried."""
+    cache.delete(_claim_key(session_id))
+
+
+def _claim_key(session_id: str) -> str:
+    return f"skilltest:submitted:{session_id}"
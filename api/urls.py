@@ -8,10 +8,12 @@ Final URLs:
   /api/auth/token/refresh/
   /api/auth/logout/
   /api/auth/profile/
+  /api/auth/profile/fanout/
 
   /api/placement/popular/
   /api/placement/company/<company_id>/
   /api/placement/company/<company_id>/cache/
+  /api/placement/cache/migrate/
 
   /api/skilltest/topics/
   /api/skilltest/generate/
@@ -20,6 +22,8 @@ Final URLs:
   /api/skilltest/leaderboard/
 
   /api/dev2dev/posts/
+  /api/dev2dev/search/
+  /api/dev2dev/tags/
   /api/dev2dev/posts/<post_id>/
   /api/dev2dev/posts/<post_id>/like/
   /api/dev2dev/posts/<post_id>/comments/
@@ -33,22 +37,26 @@ Final URLs:
 
 from django.urls import path
 from api.views.auth_views import (
-    RegisterView, LoginView, ProfileView,
+    RegisterView, LoginView, ProfileView, ProfileFanoutStatusView,
 )
 from api.views.notification_views import (
     NotificationListView,
     NotificationMarkReadView,
     NotificationMarkAllReadView,
+    NotificationMetricsView,
+    NotificationUnreadCountView,
+    notification_stream,
 )
 from api.views.placement_views import (
     PopularCompaniesView, CompanyGuideView, CompanyCacheRefreshView,
+    CompanyCacheMigrationView,
 )
 from api.views.skilltest_views import (
     TopicsListView, GenerateTestView, SubmitSessionView,
     AttemptHistoryView, LeaderboardView,
 )
 from api.views.dev2dev_views import (
-    PostListCreateView, PostDetailView, PostLikeView,
+    PostListCreateView, PostDetailView, PostLikeView, PostSearchView, TagListView,
     CommentListCreateView, CommentDetailView,
     CommentLikeView, CommentUpvoteView,
 )
@@ -65,11 +73,13 @@ urlpatterns = [
     path("auth/register/",      RegisterView.as_view(),     name="auth-register"),
     path("auth/login/",         LoginView.as_view(),         name="auth-login"),
     path("auth/profile/",       ProfileView.as_view(),       name="auth-profile"),
+    path("auth/profile/fanout/", ProfileFanoutStatusView.as_view(), name="auth-profile-fanout"),
 
     # ── Placement (Gemini-powered company guides) ──────────────────────────────
     path("placement/popular/",                        PopularCompaniesView.as_view(),    name="placement-popular"),
     path("placement/company/<str:company_id>/",       CompanyGuideView.as_view(),        name="placement-company"),
     path("placement/company/<str:company_id>/cache/", CompanyCacheRefreshView.as_view(), name="placement-cache"),
+    path("placement/cache/migrate/",                  CompanyCacheMigrationView.as_view(), name="placement-cache-migrate"),
 
     # ── SkillTest (dynamic Gemini MCQs) ───────────────────────────────────────
     path("skilltest/topics/",              TopicsListView.as_view(),    name="skilltest-topics"),
@@ -80,6 +90,8 @@ urlpatterns = [
 
     # ── Dev2Dev (community Q&A) ───────────────────────────────────────────────
     path("dev2dev/posts/",                                          PostListCreateView.as_view(),   name="dev2dev-posts"),
+    path("dev2dev/search/",                                         PostSearchView.as_view(),       name="dev2dev-search"),
+    path("dev2dev/tags/",                                           TagListView.as_view(),          name="dev2dev-tags"),
     path("dev2dev/posts/<str:post_id>/",                            PostDetailView.as_view(),       name="dev2dev-post-detail"),
     path("dev2dev/posts/<str:post_id>/like/",                       PostLikeView.as_view(),         name="dev2dev-post-like"),
     path("dev2dev/posts/<str:post_id>/comments/",                   CommentListCreateView.as_view(), name="dev2dev-comments"),
@@ -99,4 +111,7 @@ urlpatterns = [
     path("notifications/",                      NotificationListView.as_view(),       name="notifications"),
     path("notifications/<str:notif_id>/read/",  NotificationMarkReadView.as_view(),   name="notification-read"),
     path("notifications/read-all/",             NotificationMarkAllReadView.as_view(), name="notifications-read-all"),
+    path("notifications/unread-count/",         NotificationUnreadCountView.as_view(), name="notifications-unread-count"),
+    path("notifications/metrics/",              NotificationMetricsView.as_view(),    name="notifications-metrics"),
+    path("notifications/stream/",               notification_stream,                  name="notifications-stream"),
 ]
\ No newline at end of file
@@ -1,5 +1,12 @@
 """api/utils.py — Shared response helpers."""
 
+import argparse
+import base64
+import json
+import threading
+import time
+from datetime import datetime
+
 from rest_framework.views import exception_handler
 from rest_framework.response import Response
 from rest_framework.exceptions import AuthenticationFailed
@@ -25,13 +32,17 @@ def custom_exception_handler(exc, context):
 
 # ── Success Helper ────────────────────────────────────────────
 
-def success(data=None, message="OK", status_code=200):
+def envelope(data=None, message="OK") -> dict:
     payload = {"error": False, "message": message}
 
     if data is not None:
         payload["data"] = data
 
-    return Response(payload, status=status_code)
+    return payload
+
+
+def success(data=None, message="OK", status_code=200):
+    return Response(envelope(data, message), status=status_code)
 
 
 # ── Pagination ────────────────────────────────────────────────
@@ -50,6 +61,60 @@ def paginate(items, page=1, page_size=20):
     }
 
 
+# ── Cursor pagination ─────────────────────────────────────────
+# For Firestore queries ordered by `fields` (the last one "__name__" so the
+# order is total). The cursor is an opaque token holding the last item's
+# values for those fields; the next page starts strictly after it.
+
+def encode_cursor(values: list) -> str:
+    tagged = [{"$dt": v.isoformat()} if isinstance(v, datetime) else v for v in values]
+    raw    = json.dumps(tagged, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+
+def decode_cursor(token: str) -> list:
+    """Raises ValueError on anything that isn't a cursor we issued."""
+    try:
+        raw    = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        values = json.loads(raw)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor.") from e
+    if not isinstance(values, list):
+        raise ValueError("Invalid cursor.")
+    return [
+        datetime.fromisoformat(v["$dt"]) if isinstance(v, dict) and "$dt" in v else v
+        for v in values
+    ]
+
+
+def cursor_paginate(query, fields: list, to_dict, cursor: str = None, page_size: int = 20) -> dict:
+    """
+    One page of an ordered query. `to_dict` turns a snapshot into the
+    response item. Raises ValueError for a bad cursor.
+    """
+    if cursor:
+        values = decode_cursor(cursor)
+        if len(values) != len(fields):
+            raise ValueError("Invalid cursor.")
+        query = query.start_after(dict(zip(fields, values)))
+
+    snaps    = list(query.limit(page_size + 1).stream())
+    has_next = len(snaps) > page_size
+    snaps    = snaps[:page_size]
+
+    next_cursor = None
+    if has_next:
+        last = snaps[-1]
+        next_cursor = encode_cursor([last.id if f == "__name__" else last.get(f) for f in fields])
+
+    return {
+        "results":     [to_dict(s) for s in snaps],
+        "page_size":   page_size,
+        "has_next":    has_next,
+        "next_cursor": next_cursor,
+    }
+
+
 # ── Firebase Auth Helpers ─────────────────────────────────────
 
 def get_uid(request) -> str:
@@ -69,4 +134,50 @@ def get_user_info(request) -> dict:
         "uid": getattr(user, "uid", None),
         "name": getattr(user, "name", "Anonymous"),
         "initials": getattr(user, "name", "A")[0].upper() if getattr(user, "name", None) else "??",
-    }
\ No newline at end of file
+    }
+
+# ── Rate Limiting ─────────────────────────────────────────────
+
+def positive_float(value) -> float:
+    """argparse type for --rate options: a number greater than 0."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"{value!r} is not a number")
+    if not number > 0:
+        raise argparse.ArgumentTypeError("must be greater than 0")
+    return number
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket for background jobs. `rate` is operations per
+    second; `burst` lets a few operations through back-to-back.
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        if not float(rate) > 0:
+            raise ValueError(f"RateLimiter rate must be greater than 0, got {rate!r}")
+        self.rate   = float(rate)
+        self.burst  = max(1, burst)
+        self._tokens = float(self.burst)
+        self._last   = time.monotonic()
+        self._lock   = threading.Lock()
+
+    def acquire(self, n: int = 1):
+        """
+        Block until `n` operations are allowed. Requests larger than `burst`
+        go through once the bucket is full and leave it in debt, so the
+        average rate still holds.
+        """
+        needed = min(n, self.burst)
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= needed:
+                    self._tokens -= n
+                    return
+                wait = (needed - self._tokens) / self.rate
+            time.sleep(wait)
@@ -4,6 +4,7 @@ from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
 
+from api.author_fanout import fanout
 from api.firebase import db, firebase_auth, SERVER_TS, Collections, doc_to_dict
 from api.utils import success, get_uid
 
@@ -162,9 +163,25 @@ class ProfileView(APIView):
             update_data["name"] = name
             update_data["initials"] = _make_initials(name)
 
+        user_ref = db.collection(Collections.USERS).document(uid)
+        if "name" in update_data:
+            previous = (user_ref.get(field_paths=["name"]).to_dict() or {}).get("name")
+
         try:
-            db.collection(Collections.USERS).document(uid).update(update_data)
+            user_ref.update(update_data)
         except Exception:
             return Response({"error": True, "detail": "Failed to update profile."}, status=500)
 
-        return success(update_data, message="Profile updated.")
\ No newline at end of file
+        # Posts/comments embed the author's name; rewrite them in the background.
+        if "name" in update_data and update_data["name"] != previous:
+            fanout.start(uid, update_data["name"], update_data["initials"])
+
+        return success(update_data, message="Profile updated.")
+
+
+class ProfileFanoutStatusView(APIView):
+    """GET /api/auth/profile/fanout/ — progress of the author-name update on old posts/comments."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return success(fanout.status(get_uid(request)))
\ No newline at end of file
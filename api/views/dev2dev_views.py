@@ -4,9 +4,17 @@ from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from google.cloud import firestore as gfs
+from datetime import datetime, timezone
 
+from api import counters, post_tags, ranking, search
 from api.firebase import db, SERVER_TS, Collections, doc_to_dict, query_to_list
-from api.utils import success, paginate, get_uid, get_user_info
+from api.utils import success, paginate, cursor_paginate, get_uid, get_user_info
+from api.idempotency import idempotent
+from api.notifications import push_notification
+from api.reactions import (
+    LIKE, UPVOTE, POST_FIELDS, COMMENT_FIELDS, TargetNotFound,
+    toggle_reaction, reaction_index, delete_reactions, legacy_fields, legacy_reacted,
+)
 
 
 # ── Posts ─────────────────────────────────────────────────────────────────────
@@ -15,19 +23,54 @@ class PostListCreateView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request):
-        tag  = request.query_params.get("tag", "All")
+        tag   = request.query_params.get("tag", "All")
+        order = request.query_params.get("order", "new")
+        posts_ref = db.collection(Collections.POSTS)
+
+        if order == "hot":
+            return self._hot(request, posts_ref, tag)
+
         page = int(request.query_params.get("page", 1))
 
-        query = db.collection(Collections.POSTS).order_by("created_at", direction=gfs.Query.DESCENDING)
+        query = (
+            posts_ref
+            .select(POST_FIELDS)   # skip legacy UID lists
+            .order_by("created_at", direction=gfs.Query.DESCENDING)
+        )
         if tag and tag != "All":
             query = query.where("tags", "array_contains", tag)
 
         posts = query_to_list(query)
-        for p in posts:
-            p.pop("likes", None)   # don't leak UID lists
 
         return success(paginate(posts, page=page))
 
+    def _hot(self, request, posts_ref, tag):
+        """?order=hot — precomputed hot_score, indexed order_by + cursor (see api/ranking.py)."""
+        try:
+            page_size = min(max(int(request.query_params.get("page_size", 20)), 1), 50)
+        except ValueError:
+            return Response({"error": True, "detail": "page_size must be a number."}, status=400)
+
+        query = (
+            posts_ref
+            .select(POST_FIELDS)
+            .order_by("hot_score", direction=gfs.Query.DESCENDING)
+            .order_by("__name__", direction=gfs.Query.DESCENDING)
+        )
+        if tag and tag != "All":
+            query = query.where("tags", "array_contains", tag)
+
+        try:
+            result = cursor_paginate(
+                query, ["hot_score", "__name__"], doc_to_dict,
+                cursor=request.query_params.get("cursor"), page_size=page_size,
+            )
+        except ValueError as e:
+            return Response({"error": True, "detail": str(e)}, status=400)
+
+        return success(result)
+
+    @idempotent()
     def post(self, request):
         title = request.data.get("title", "").strip()
         body  = request.data.get("body", "").strip()
@@ -45,19 +88,19 @@ class PostListCreateView(APIView):
             "author_uid":      user["uid"],
             "author_name":     user["name"],
             "author_initials": user["initials"],
-            "likes":           [],
             "like_count":      0,
             "comment_count":   0,
+            "hot_score":       ranking.hot_score(0, 0, None),
             "created_at":      SERVER_TS,
         }
         ref.set(doc)
-        db.collection(Collections.USERS).document(user["uid"]).update({
-        "stats.posts": gfs.Increment(1)
-        })
+        counters.increment(db.collection(Collections.USERS).document(user["uid"]), {"stats.posts": 1})
+        post_tags.record_post(doc["tags"], +1)
 
         # Re-fetch so SERVER_TS becomes real timestamp
         saved = doc_to_dict(ref.get())
         saved.pop("likes", None)
+        search.index_post(saved)
 
         return success(saved, message="Question posted.", status_code=201)
 
@@ -66,13 +109,13 @@ class PostDetailView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, post_id: str):
-        doc = doc_to_dict(db.collection(Collections.POSTS).document(post_id).get())
+        ref = db.collection(Collections.POSTS).document(post_id)
+        doc = doc_to_dict(ref.get(field_paths=POST_FIELDS + legacy_fields(LIKE)))
         if not doc:
             return Response({"error": True, "detail": "Post not found."}, status=404)
         uid = get_uid(request)
-        doc["liked_by_me"] = uid in doc.get("likes", [])
-        doc.pop("likes", None)
-        return success(doc)
+        doc["liked_by_me"] = legacy_reacted(doc, LIKE, uid) or reaction_index(ref, uid)["post_liked"]
+        return success(counters.apply(ref, doc, counters.POST_COUNTERS))
 
     def delete(self, request, post_id: str):
         uid = get_uid(request)
@@ -83,28 +126,73 @@ class PostDetailView(APIView):
         if doc["author_uid"] != uid:
             return Response({"error": True, "detail": "Forbidden."}, status=403)
         for c in ref.collection("comments").stream():
+            delete_reactions(c.reference)
             c.reference.delete()
+        delete_reactions(ref)
         ref.delete()
-        db.collection(Collections.USERS).document(uid).update({"stats.posts": gfs.Increment(-1)})
+        search.remove_post(post_id)
+        post_tags.record_post(doc.get("tags"), -1)
+        counters.increment(db.collection(Collections.USERS).document(uid), {"stats.posts": -1})
         return success(message="Post deleted.")
 
 
+class PostSearchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        q   = request.query_params.get("q", "").strip()
+        tag = request.query_params.get("tag", "").strip()
+        if not q and not tag:
+            return Response({"error": True, "detail": "q is required."}, status=400)
+        try:
+            page      = max(int(request.query_params.get("page", 1)), 1)
+            page_size = min(max(int(request.query_params.get("page_size", 20)), 1), 50)
+        except ValueError:
+            return Response({"error": True, "detail": "page and page_size must be numbers."}, status=400)
+
+        if tag == "All":
+            tag = ""
+        return success(search.search_posts(q, tag=tag or None, page=page, page_size=page_size))
+
+
+class TagListView(APIView):
+    """GET /api/dev2dev/tags/?q=<prefix>&sort=count|recent&limit=50 — tag cloud / autocomplete."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        prefix = request.query_params.get("q", "").strip().lower()
+        sort   = request.query_params.get("sort", "count")
+        try:
+            limit = min(max(int(request.query_params.get("limit", 50)), 1), post_tags.LIST_LIMIT)
+        except ValueError:
+            return Response({"error": True, "detail": "limit must be a number."}, status=400)
+
+        tags = post_tags.list_tags()   # cached, already sorted by count
+        if prefix:
+            tags = [t for t in tags if t["tag"].lower().startswith(prefix)]
+        if sort == "recent":
+            tags = sorted(tags, key=lambda t: t["last_activity"] or datetime.min.replace(tzinfo=timezone.utc),
+                          reverse=True)
+        return success(tags[:limit])
+
+
 class PostLikeView(APIView):
     permission_classes = [IsAuthenticated]
 
     def post(self, request, post_id: str):
         uid = get_uid(request)
         ref = db.collection(Collections.POSTS).document(post_id)
-        doc = doc_to_dict(ref.get())
-        if not doc:
+        try:
+            liked, like_count, author = toggle_reaction(ref, LIKE, uid)
+        except TargetNotFound:
             return Response({"error": True, "detail": "Post not found."}, status=404)
-        likes = doc.get("likes", [])
-        if uid in likes:
-            likes.remove(uid); liked = False
-        else:
-            likes.append(uid); liked = True
-        ref.update({"likes": likes, "like_count": len(likes)})
-        return success({"liked": liked, "like_count": len(likes)})
+        ranking.maybe_rescore(ref)
+        if liked and author and author != uid:
+            push_notification(
+                author, "New likes", "Someone liked your post", "like",
+                subject=f"post:{post_id}", summary="{count} people liked your post", actor=uid,
+            )
+        return success({"liked": liked, "like_count": like_count})
 
 
 # ── Comments ──────────────────────────────────────────────────────────────────
@@ -112,21 +200,59 @@ class PostLikeView(APIView):
 class CommentListCreateView(APIView):
     permission_classes = [IsAuthenticated]
 
+    # ?order= → (cursor fields, direction)
+    ORDERS = {
+        "old": (["created_at", "__name__"], gfs.Query.ASCENDING),
+        "top": (["upvote_rank", "__name__"], gfs.Query.DESCENDING),
+    }
+
     def get(self, request, post_id: str):
-        uid = get_uid(request)
-        if not db.collection(Collections.POSTS).document(post_id).get().exists:
+        """
+        ?order=old|top. Without ?limit/?cursor, returns every comment as a plain
+        list (the original response). With ?limit=1..100 (default 20) and/or
+        ?cursor=<next_cursor>, returns {results, page_size, has_next, next_cursor}.
+        Paged "top" ordering needs upvote_rank on every comment
+        (`manage.py rescore_hot_posts --comments` backfills it).
+        """
+        params = request.query_params
+        order  = params.get("order", "old")
+        if order not in self.ORDERS:
+            return Response({"error": True, "detail": "order must be 'old' or 'top'."}, status=400)
+        paged = "limit" in params or "cursor" in params
+        try:
+            limit = min(max(int(params.get("limit", 20)), 1), 100)
+        except ValueError:
+            return Response({"error": True, "detail": "limit must be a number."}, status=400)
+
+        post_ref = db.collection(Collections.POSTS).document(post_id)
+        if not post_ref.get(field_paths=[]).exists:
             return Response({"error": True, "detail": "Post not found."}, status=404)
 
-        comments = query_to_list(
-            db.collection(Collections.POSTS).document(post_id)
-              .collection("comments").order_by("created_at")
-        )
+        fields, direction = self.ORDERS[order]
+        comments_ref = post_ref.collection("comments")
+        query = comments_ref.select(COMMENT_FIELDS + legacy_fields(LIKE, UPVOTE))
+
+        if paged:
+            for field in fields:
+                query = query.order_by(field, direction=direction)
+            try:
+                result = cursor_paginate(query, fields, doc_to_dict, cursor=params.get("cursor"), page_size=limit)
+            except ValueError as e:
+                return Response({"error": True, "detail": str(e)}, status=400)
+            comments = result["results"]
+        else:
+            # Sorted here rather than by upvote_rank, so comments not yet ranked are kept
+            comments = result = query_to_list(query.order_by("created_at"))
+            if order == "top":
+                comments.sort(key=lambda c: c.get("upvote_rank", c.get("upvote_count", 0)), reverse=True)
+
+        uid   = get_uid(request)
+        index = reaction_index(post_ref, uid)
         for c in comments:
-            c["liked_by_me"]   = uid in c.get("likes", [])
-            c["upvoted_by_me"] = uid in c.get("upvotes", [])
-            c.pop("likes", None)
-            c.pop("upvotes", None)
-        return success(comments)
+            c["liked_by_me"]   = legacy_reacted(c, LIKE, uid) or c["id"] in index["comment_likes"]
+            c["upvoted_by_me"] = legacy_reacted(c, UPVOTE, uid) or c["id"] in index["comment_upvotes"]
+            c.pop("upvote_rank", None)
+        return success(result)
 
     def post(self, request, post_id: str):
         body = request.data.get("body", "").strip()
@@ -134,7 +260,8 @@ class CommentListCreateView(APIView):
             return Response({"error": True, "detail": "body is required."}, status=400)
 
         post_ref = db.collection(Collections.POSTS).document(post_id)
-        if not post_ref.get().exists:
+        post     = post_ref.get(field_paths=["author_uid"])
+        if not post.exists:
             return Response({"error": True, "detail": "Post not found."}, status=404)
 
         user = get_user_info(request)
@@ -144,22 +271,27 @@ class CommentListCreateView(APIView):
             "author_uid":      user["uid"],
             "author_name":     user["name"],
             "author_initials": user["initials"],
-            "likes":           [],
             "like_count":      0,
-            "upvotes":         [],
             "upvote_count":    0,
+            "upvote_rank":     0,
             "created_at":      SERVER_TS,
         }
         ref.set(doc)
-        post_ref.update({"comment_count": gfs.Increment(1)})
-        db.collection(Collections.USERS).document(user["uid"]).update({
-            "stats.comments": gfs.Increment(1)
-        })
+        counters.increment(post_ref, {"comment_count": 1})
+        ranking.maybe_rescore(post_ref)
+        counters.increment(db.collection(Collections.USERS).document(user["uid"]), {"stats.comments": 1})
+        author = (post.to_dict() or {}).get("author_uid")
+        if author and author != user["uid"]:
+            push_notification(
+                author, "New comment", f"{user['name']} commented on your post", "comment",
+                subject=f"post:{post_id}", summary="{count} people commented on your post", actor=user["uid"],
+            )
 
         # Re-fetch so SERVER_TS resolves
         saved = doc_to_dict(ref.get())
         saved.pop("likes", None)
         saved.pop("upvotes", None)
+        saved.pop("upvote_rank", None)
         saved["liked_by_me"] = False
         saved["upvoted_by_me"] = False
 
@@ -178,9 +310,11 @@ class CommentDetailView(APIView):
             return Response({"error": True, "detail": "Comment not found."}, status=404)
         if doc["author_uid"] != uid:
             return Response({"error": True, "detail": "Forbidden."}, status=403)
+        delete_reactions(comment_ref)
         comment_ref.delete()
-        post_ref.update({"comment_count": gfs.Increment(-1)})
-        db.collection(Collections.USERS).document(uid).update({"stats.comments": gfs.Increment(-1)})
+        counters.increment(post_ref, {"comment_count": -1})
+        ranking.maybe_rescore(post_ref)
+        counters.increment(db.collection(Collections.USERS).document(uid), {"stats.comments": -1})
         return success(message="Comment deleted.")
 
 
@@ -190,16 +324,11 @@ class CommentLikeView(APIView):
     def post(self, request, post_id: str, comment_id: str):
         uid = get_uid(request)
         ref = db.collection(Collections.POSTS).document(post_id).collection("comments").document(comment_id)
-        doc = doc_to_dict(ref.get())
-        if not doc:
+        try:
+            liked, like_count, _ = toggle_reaction(ref, LIKE, uid)
+        except TargetNotFound:
             return Response({"error": True, "detail": "Comment not found."}, status=404)
-        likes = doc.get("likes", [])
-        if uid in likes:
-            likes.remove(uid); liked = False
-        else:
-            likes.append(uid); liked = True
-        ref.update({"likes": likes, "like_count": len(likes)})
-        return success({"liked": liked, "like_count": len(likes)})
+        return success({"liked": liked, "like_count": like_count})
 
 
 class CommentUpvoteView(APIView):
@@ -208,13 +337,9 @@ class CommentUpvoteView(APIView):
     def post(self, request, post_id: str, comment_id: str):
         uid = get_uid(request)
         ref = db.collection(Collections.POSTS).document(post_id).collection("comments").document(comment_id)
-        doc = doc_to_dict(ref.get())
-        if not doc:
+        try:
+            upvoted, upvote_count, _ = toggle_reaction(ref, UPVOTE, uid)
+        except TargetNotFound:
             return Response({"error": True, "detail": "Comment not found."}, status=404)
-        upvotes = doc.get("upvotes", [])
-        if uid in upvotes:
-            upvotes.remove(uid); upvoted = False
-        else:
-            upvotes.append(uid); upvoted = True
-        ref.update({"upvotes": upvotes, "upvote_count": len(upvotes)})
-        return success({"upvoted": upvoted, "upvote_count": len(upvotes)})
\ No newline at end of file
+        ranking.maybe_rerank_comment(ref, upvote_count)
+        return success({"upvoted": upvoted, "upvote_count": upvote_count})
\ No newline at end of file
@@ -1,11 +1,24 @@
 # api/views/notification_views.py — Notification views
 
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.handlers.asgi import ASGIRequest
+from django.http import JsonResponse, StreamingHttpResponse
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
-from api.firebase import db, SERVER_TS, Collections, doc_to_dict, query_to_list
+from api.firebase import db, firebase_auth, query_to_list
 from api.utils import success, get_uid
+from api.notifications import dispatcher, push_notification, read_state, is_read, mark_read, mark_all_read
+from api.notification_hub import hub, CLOSE
 
 NOTIFICATIONS = "notifications"
 
@@ -28,10 +41,13 @@ class NotificationListView(APIView):
                 .limit(5)
             )
             notifications = query_to_list(query)
+            state = read_state(uid)
         except Exception as e:
             return Response({"error": True, "detail": f"Failed to fetch notifications: {str(e)}"}, status=500)
 
-        return success({"notifications": notifications})
+        for notif in notifications:
+            notif["read"] = is_read(notif, state["read_watermark"])
+        return success({"notifications": notifications, "unread_count": state["unread"]})
 
     def post(self, request):
         """Internal endpoint to create a notification programmatically."""
@@ -43,17 +59,37 @@ class NotificationListView(APIView):
         if not title or not message:
             return Response({"error": True, "detail": "title and message are required."}, status=400)
 
-        notif = {
-            "uid":        uid,
-            "title":      title,
-            "message":    message,
-            "type":       ntype,
-            "read":       False,
-            "created_at": SERVER_TS,
-        }
+        notif_id = push_notification(uid, title, message, ntype)
+        if not notif_id:
+            return Response({"error": True, "detail": "Notification queue is full, try again."}, status=503)
+        return success({"id": notif_id}, message="Notification created.", status_code=201)
 
-        ref = db.collection(NOTIFICATIONS).add(notif)
-        return success({"id": ref[1].id}, message="Notification created.", status_code=201)
+
+class NotificationUnreadCountView(APIView):
+    """
+    GET /api/notifications/unread-count/  → {"unread": n} for the bell badge (one document read)
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        uid = get_uid(request)
+
+        try:
+            state = read_state(uid)
+        except Exception as e:
+            return Response({"error": True, "detail": f"Failed to fetch unread count: {str(e)}"}, status=500)
+
+        return success({"unread": state["unread"]})
+
+
+class NotificationMetricsView(APIView):
+    """
+    GET /api/notifications/metrics/  → dispatch queue depth, throughput and write latency (this worker)
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return success(dispatcher.metrics())
 
 
 class NotificationMarkReadView(APIView):
@@ -65,23 +101,21 @@ class NotificationMarkReadView(APIView):
     def patch(self, request, notif_id):
         uid = get_uid(request)
 
-        doc_ref = db.collection(NOTIFICATIONS).document(notif_id)
-        doc = doc_ref.get()
+        data = mark_read(uid, notif_id)
 
-        if not doc.exists:
+        if data is None:
             return Response({"error": True, "detail": "Notification not found."}, status=404)
 
-        data = doc.to_dict()
         if data.get("uid") != uid:
             return Response({"error": True, "detail": "Not authorised."}, status=403)
 
-        doc_ref.update({"read": True})
         return success({}, message="Marked as read.")
 
 
 class NotificationMarkAllReadView(APIView):
     """
     PATCH /api/notifications/read-all/  → mark all notifications as read
+    (moves the read watermark — a single write however many are unread)
     """
     permission_classes = [IsAuthenticated]
 
@@ -89,15 +123,109 @@ class NotificationMarkAllReadView(APIView):
         uid = get_uid(request)
 
         try:
-            query = (
-                db.collection(NOTIFICATIONS)
-                .where("uid", "==", uid)
-                .where("read", "==", False)
-                .stream()
-            )
-            for doc in query:
-                doc.reference.update({"read": True})
+            mark_all_read(uid)
         except Exception as e:
             return Response({"error": True, "detail": f"Failed to update: {str(e)}"}, status=500)
 
-        return success({}, message="All notifications marked as read.")
\ No newline at end of file
+        return success({}, message="All notifications marked as read.")
+
+
+# ── Live stream (Server-Sent Events) ──────────────────────────────────────────
+# GET /api/notifications/stream/?token=<Firebase ID token>
+#
+# An async view: serve it through backend/asgi.py so an open stream costs a
+# coroutine instead of a worker thread. New notifications are pushed from the
+# in-process hub; nothing touches Firestore while the stream is idle. A
+# comment line every SSE_HEARTBEAT_SECONDS keeps proxies from closing it, the
+# `retry:` field (jittered) sets the client's reconnect backoff, and streams
+# end after SSE_MAX_STREAM_SECONDS so clients reconnect and rebalance. On
+# reconnect, Last-Event-ID (the last notification's committed created_at)
+# replays what was missed with a single query. Under WSGI the stream would pin
+# a sync worker and be buffered in memory, so it is refused there.
+
+HEARTBEAT_SECONDS  = getattr(settings, "SSE_HEARTBEAT_SECONDS", 20)
+RETRY_MS           = getattr(settings, "SSE_RETRY_MS", 5000)
+MAX_STREAM_SECONDS = getattr(settings, "SSE_MAX_STREAM_SECONDS", 1800)
+REPLAY_LIMIT       = 20
+
+
+def _sse_event(notif: dict) -> str:
+    created = notif.get("created_at")
+    event_id = created.isoformat() if isinstance(created, datetime) else ""
+    return f"id: {event_id}\nevent: notification\ndata: {json.dumps(notif, cls=JSONEncoder)}\n\n"
+
+
+def _missed_since(uid: str, since: datetime) -> list:
+    query = (
+        db.collection(NOTIFICATIONS)
+        .where("uid", "==", uid)
+        .where("created_at", ">", since)
+        .order_by("created_at", direction="DESCENDING")
+        .limit(REPLAY_LIMIT)
+    )
+    return list(reversed(query_to_list(query)))
+
+
+def _parse_since(value: str):
+    """An event id / ?since= timestamp as an aware datetime (naive → UTC), or None."""
+    try:
+        since = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    return since
+
+
+def _stream_token(request) -> str:
+    token = request.GET.get("token", "")
+    if not token:
+        prefix, _, token = request.headers.get("Authorization", "").partition(" ")
+        if prefix.lower() != "bearer":
+            token = ""
+    return token.strip()
+
+
+async def notification_stream(request):
+    if not isinstance(request, ASGIRequest):
+        return JsonResponse({"error": True, "detail": "Live notifications require the ASGI server; poll instead."},
+                            status=503)
+    token = _stream_token(request)
+    if not token:
+        return JsonResponse({"error": True, "detail": "token is required."}, status=401)
+    try:
+        decoded = await sync_to_async(firebase_auth.verify_id_token)(token)
+    except Exception:
+        return JsonResponse({"error": True, "detail": "Invalid or expired Firebase token."}, status=401)
+    uid = decoded.get("uid") or decoded.get("sub")
+
+    since = None
+    last_event_id = request.headers.get("Last-Event-ID") or request.GET.get("since")
+    if last_event_id:
+        since = _parse_since(last_event_id)
+
+    async def events():
+        sub = hub.subscribe(uid)   # before the replay query, so nothing falls in between
+        try:
+            yield f"retry: {RETRY_MS + random.randint(0, RETRY_MS)}\n\n"
+            if since is not None:
+                for notif in await sync_to_async(_missed_since)(uid, since):
+                    yield _sse_event(notif)
+
+            deadline = time.monotonic() + MAX_STREAM_SECONDS
+            while time.monotonic() < deadline:
+                try:
+                    item = await asyncio.wait_for(sub.queue.get(), timeout=HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                if item is CLOSE:
+                    break
+                yield _sse_event(item)
+        finally:
+            hub.unsubscribe(sub)
+
+    response = StreamingHttpResponse(events(), content_type="text/event-stream")
+    response["Cache-Control"]     = "no-cache"
+    response["X-Accel-Buffering"] = "no"   # don't let nginx buffer the stream
+    return response
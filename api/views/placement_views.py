@@ -1,18 +1,30 @@
 """api/views/placement_views.py — Company placement guides powered by Groq."""
 
+import logging
+
+from django.http import HttpResponse
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 
-from api.firebase import db, SERVER_TS, Collections, doc_to_dict
+from api.firebase import (
+    db, SERVER_TS, DELETE_FIELD, PACKED_FIELD, Collections, pack_fields, doc_to_dict,
+)
 from api.groq_ai import generate_company_guide
-from api.utils import success
+from api.guide_migrator import migrator, record_access
+from api.company_resolver import CompanyResolver
+from api.guide_cache import guide_cache
+from api.utils import success, envelope
+
+
+logger = logging.getLogger(__name__)
 
 
 # ── Bump this whenever the prompt quality is improved. ────────────────────────
-# Any cached guide whose cache_version < CURRENT_CACHE_VERSION will be
-# automatically re-generated on the next GET, so stale low-quality guides
-# (e.g. with generic PYQs) are replaced transparently.
+# Any cached guide whose cache_version < CURRENT_CACHE_VERSION keeps being
+# served while api/guide_migrator.py regenerates it in the background (most
+# visited companies first), so stale low-quality guides (e.g. with generic
+# PYQs) are replaced transparently without a synchronous Groq call.
 CURRENT_CACHE_VERSION = 2   # ← increment when prompt changes
 
 
@@ -39,6 +51,14 @@ POPULAR = [
 ]
 
 
+def _cached_company_ids():
+    return [ref.id for ref in db.collection(Collections.COMPANY_CACHE).list_documents()]
+
+
+# Resolves "amazon-india", "Amazon.com", "amazon sde" … to the canonical cache key.
+resolver = CompanyResolver(POPULAR, load_cache_keys=_cached_company_ids)
+
+
 def _id_to_name(company_id: str) -> str:
     for c in POPULAR:
         if c["id"] == company_id:
@@ -46,6 +66,54 @@ def _id_to_name(company_id: str) -> str:
     return company_id.replace("-", " ").title()
 
 
+# Bulky guide sections stored compressed (see api/firebase.pack_fields)
+GUIDE_PACKED_FIELDS = ("about", "rounds_detail_list", "pyqs", "tips", "resources", "roles")
+
+
+def is_fresh(cached) -> bool:
+    return bool(cached) and cached.get("cache_version", 0) >= CURRENT_CACHE_VERSION
+
+
+def _public(guide: dict) -> dict:
+    guide.pop("_cached_at", None)
+    guide.pop("cache_version", None)
+    guide.pop("access_count", None)
+    return guide
+
+
+class GuideStoreError(Exception):
+    """The guide was generated but could not be written to company_cache."""
+
+    def __init__(self, guide: dict):
+        super().__init__("Generated guide could not be cached.")
+        self.guide = guide
+
+
+def generate_and_cache_guide(company_id: str) -> dict:
+    """
+    Generate a guide via Groq and store it with the current version stamp.
+    A failed Firestore write raises GuideStoreError carrying the generated
+    guide, so callers can still serve it (or count the failure).
+    """
+    guide = generate_company_guide(_id_to_name(company_id))
+    guide["_cached_at"]    = SERVER_TS
+    guide["cache_version"] = CURRENT_CACHE_VERSION
+    guide["company_id"]    = company_id
+    # merge keeps bookkeeping fields such as access_count across regenerations;
+    # whichever representation (packed or plain) is not written gets deleted.
+    stored = pack_fields(dict(guide), GUIDE_PACKED_FIELDS)
+    for field in (*GUIDE_PACKED_FIELDS, PACKED_FIELD):
+        stored.setdefault(field, DELETE_FIELD)
+    try:
+        db.collection(Collections.COMPANY_CACHE).document(company_id).set(stored, merge=True)
+    except Exception as e:
+        logger.exception("generated a guide for %s but could not cache it", company_id)
+        raise GuideStoreError(_public(guide)) from e
+    resolver.add(company_id)
+    guide_cache.invalidate(company_id)
+    return _public(guide)
+
+
 class PopularCompaniesView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -57,43 +125,39 @@ class CompanyGuideView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, company_id: str):
-        company_id = company_id.lower().strip()
-
-        # 1. Check Firestore cache — but only use it if cache_version is current.
-        #    Stale guides (old prompt version) are silently re-generated.
-        cache_ref = db.collection(Collections.COMPANY_CACHE).document(company_id)
-        cached    = doc_to_dict(cache_ref.get())
-
-        if cached and cached.get("cache_version", 0) >= CURRENT_CACHE_VERSION:
-            cached.pop("_cached_at", None)
-            cached.pop("cache_version", None)
-            return success(cached)
-
-        # 2. Generate via Groq (stale or missing cache both reach here)
+        company_id = resolver.resolve(company_id)
+        if not company_id:
+            return Response({"error": True, "detail": "Company name is required."}, status=400)
+
+        # 1. In-process LRU of pre-serialised responses (fresh guides only).
+        body = guide_cache.get(company_id, CURRENT_CACHE_VERSION)
+        if body is not None:
+            record_access(company_id)
+            return HttpResponse(body, content_type="application/json")
+
+        # 2. Check the stored guide. Stale guides (old prompt version) are
+        #    still served; the background migrator regenerates them.
+        cached = doc_to_dict(db.collection(Collections.COMPANY_CACHE).document(company_id).get())
+
+        if cached:
+            record_access(company_id)
+            if not is_fresh(cached):
+                migrator.start()
+                return success(_public(cached))
+            stamp = cached.get("_cached_at")
+            body  = guide_cache.put(company_id, CURRENT_CACHE_VERSION, envelope(_public(cached)), stamp)
+            return HttpResponse(body, content_type="application/json")
+
+        # 3. Generate via Groq (cache miss)
         try:
-            guide = generate_company_guide(_id_to_name(company_id))
+            guide = generate_and_cache_guide(company_id)
+        except GuideStoreError as e:
+            return success(e.guide)   # generation worked; only caching failed (logged)
         except ValueError as e:
-            # If we have a stale cached guide, return it rather than erroring
-            if cached:
-                cached.pop("_cached_at", None)
-                cached.pop("cache_version", None)
-                return success(cached)
             return Response({"error": True, "detail": str(e)}, status=502)
         except Exception as e:
-            if cached:
-                cached.pop("_cached_at", None)
-                cached.pop("cache_version", None)
-                return success(cached)
             return Response({"error": True, "detail": f"AI generation failed: {str(e)}"}, status=502)
 
-        # 3. Write to cache with current version stamp
-        guide["_cached_at"]    = SERVER_TS
-        guide["cache_version"] = CURRENT_CACHE_VERSION
-        guide["company_id"]    = company_id
-        cache_ref.set(guide)
-
-        guide.pop("_cached_at", None)
-        guide.pop("cache_version", None)
         return success(guide)
 
 
@@ -102,14 +166,37 @@ class CompanyCacheRefreshView(APIView):
     permission_classes = [IsAuthenticated]
 
     def delete(self, request, company_id: str):
-        company_id = company_id.lower().strip()
+        company_id = resolver.resolve(company_id)
+        if not company_id:
+            return Response({"error": True, "detail": "Company name is required."}, status=400)
         db.collection(Collections.COMPANY_CACHE).document(company_id).delete()
+        guide_cache.invalidate(company_id)
         return success(message=f"Cache cleared for '{company_id}'. Next GET will regenerate.")
 
 
+class CompanyCacheMigrationView(APIView):
+    """
+    GET  /api/placement/cache/migrate/  → progress + ETA of the stale-guide migration
+    POST /api/placement/cache/migrate/  → start it now (it also starts on the first stale hit)
+    """
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        return success(migrator.status())
+
+    def post(self, request):
+        started = migrator.start(force=True)
+        return success(
+            migrator.status(),
+            message="Migration started." if started else "Migration already running.",
+            status_code=202,
+        )
+
+
 class CompanyCacheRefreshAllView(APIView):
     """DELETE /api/placement/cache/refresh-all/ — wipe ALL cached guides.
-       Use this after bumping CURRENT_CACHE_VERSION to force a full refresh."""
+       After bumping CURRENT_CACHE_VERSION prefer POST /api/placement/cache/migrate/,
+       which keeps old guides serving while they are regenerated."""
     permission_classes = [IsAuthenticated]
 
     def delete(self, request):
@@ -118,4 +205,5 @@ class CompanyCacheRefreshAllView(APIView):
         for doc in docs:
             doc.reference.delete()
             count += 1
+        guide_cache.invalidate()
         return success(message=f"Cleared {count} cached company guides. All will regenerate on next visit.")
\ No newline at end of file
@@ -13,19 +13,27 @@ Dynamic Gemini MCQ flow:
        → Backend grades against locked answers
        → Returns full result with explanations
        → Session marked completed — no re-submission
+
+SKILLTEST_SESSION_MODE = "token" skips active_sessions entirely: the answer
+key is sealed into an encrypted `session_token` (api/session_tokens.py) that
+the client echoes back on submit, and grading happens from the token.
 """
 
 import uuid
 from datetime import datetime, timezone, timedelta
 
+from django.conf import settings
 from rest_framework.views import APIView
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from google.api_core.exceptions import AlreadyExists
 from google.cloud import firestore as gfs
 
-from api.firebase import db, SERVER_TS, Collections, doc_to_dict, query_to_list
-from api.groq_ai import generate_mcq_questions
+from api.firebase import db, SERVER_TS, Collections, doc_to_dict, query_to_list, pack_fields
+from api.groq_ai import generate_mcq_questions, worst_case_seconds
+from api import counters, session_tokens
 from api.utils import success, get_uid, get_user_info
+from api.idempotency import idempotent
 
 
 TOPICS = [
@@ -61,6 +69,142 @@ def _strip_answers(questions: list) -> list:
     ]
 
 
+def _token_mode() -> bool:
+    return getattr(settings, "SKILLTEST_SESSION_MODE", "firestore") == "token"
+
+
+def _grade(questions: list, answers: dict) -> dict:
+    total = len(questions)
+    correct = wrong = skipped = 0
+    results = []
+
+    for i, q in enumerate(questions):
+        user_ans    = answers.get(str(i))
+        correct_ans = int(q["answer"])
+
+        if user_ans is None:
+            verdict = "skipped"; skipped += 1
+        elif int(user_ans) == correct_ans:
+            verdict = "correct"; correct += 1
+        else:
+            verdict = "wrong";   wrong += 1
+
+        results.append({
+            "index":          i,
+            "question":       q["question"],
+            "options":        q["options"],
+            "tag":            q.get("tag", ""),
+            "difficulty":     q.get("difficulty", ""),
+            "type":           q.get("type", "conceptual"),
+            "user_answer":    int(user_ans) if user_ans is not None else None,
+            "correct_answer": correct_ans,
+            "explanation":    q.get("explanation", ""),
+            "verdict":        verdict,
+        })
+
+    score_pct = round((correct / total) * 100) if total else 0
+    grade = (
+        "🏆 Excellent"       if score_pct >= 80 else
+        "👍 Good"            if score_pct >= 60 else
+        "💪 Keep Practicing"
+    )
+    return {
+        "total":     total,
+        "correct":   correct,
+        "wrong":     wrong,
+        "skipped":   skipped,
+        "score_pct": score_pct,
+        "grade":     grade,
+        "results":   results,
+    }
+
+
+def _attempt_doc(session_id: str, uid: str, user_name: str, topic: str,
+                 difficulty: str, graded: dict, time_taken: int) -> dict:
+    return {
+        "session_id":         session_id,
+        "user_uid":           uid,
+        "user_name":          user_name,
+        "topic":              topic,
+        "difficulty":         difficulty,
+        "total_questions":    graded["total"],
+        "correct":            graded["correct"],
+        "wrong":              graded["wrong"],
+        "skipped":            graded["skipped"],
+        "score_pct":          graded["score_pct"],
+        "grade":              graded["grade"],
+        "time_taken_seconds": time_taken,
+        "submitted_at":       SERVER_TS,
+    }
+
+
+def _submit_response(attempt_id: str, session_id: str, topic: str, difficulty: str,
+                     graded: dict, time_taken: int) -> dict:
+    return {
+        "attempt_id": attempt_id,
+        "session_id": session_id,
+        "topic":      topic,
+        "difficulty": difficulty,
+        "total":      graded["total"],
+        "correct":    graded["correct"],
+        "wrong":      graded["wrong"],
+        "skipped":    graded["skipped"],
+        "score_pct":  graded["score_pct"],
+        "grade":      graded["grade"],
+        "time_taken": time_taken,
+        "results":    graded["results"],
+    }
+
+
+def _stats_increment(uid: str, graded: dict, writer):
+    counters.increment(db.collection(Collections.USERS).document(uid), {
+        "stats.tests_taken": 1,
+        "stats.total_score": graded["score_pct"],
+    }, writer=writer)
+
+
+class _SubmitRejected(Exception):
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+@gfs.transactional
+def _submit_session(transaction, session_ref, uid: str, user_name: str, answers: dict, time_taken: int):
+    session_doc = doc_to_dict(session_ref.get(transaction=transaction))
+
+    if not session_doc:
+        raise _SubmitRejected(404, "Session not found or expired.")
+    if session_doc["user_uid"] != uid:
+        raise _SubmitRejected(403, "Forbidden.")
+    if session_doc.get("completed"):
+        raise _SubmitRejected(400, "Already submitted.")
+
+    # Check TTL
+    try:
+        exp = datetime.fromisoformat(session_doc["expires_at"])
+        if exp.tzinfo is None:
+            exp = exp.replace(tzinfo=timezone.utc)
+        expired = datetime.now(timezone.utc) > exp
+    except Exception:
+        expired = False
+    if expired:
+        raise _SubmitRejected(410, "Session expired.")
+
+    graded = _grade(session_doc["questions"], answers)
+
+    attempt_ref = db.collection(Collections.TEST_ATTEMPTS).document()
+    transaction.set(attempt_ref, _attempt_doc(
+        session_ref.id, uid, user_name, session_doc["topic"], session_doc["difficulty"],
+        graded, time_taken,
+    ))
+    transaction.update(session_ref, {"completed": True, "attempt_id": attempt_ref.id})
+    _stats_increment(uid, graded, transaction)
+
+    return session_doc, graded, attempt_ref.id
+
+
 # ── Topics ────────────────────────────────────────────────────────────────────
 
 class TopicsListView(APIView):
@@ -75,6 +219,7 @@ class TopicsListView(APIView):
 class GenerateTestView(APIView):
     permission_classes = [IsAuthenticated]
 
+    @idempotent(lock_seconds=lambda: worst_case_seconds("mcq", calls=2))   # first batch + top-up
     def post(self, request):
         topic      = str(request.data.get("topic", "DSA")).strip()
         difficulty = str(request.data.get("difficulty", "Medium")).strip()
@@ -97,9 +242,28 @@ class GenerateTestView(APIView):
         session_id = uuid.uuid4().hex[:20]
         user       = get_user_info(request)
         expires_at = (datetime.now(timezone.utc) + timedelta(hours=SESSION_TTL_HOURS)).isoformat()
+        response   = {
+            "session_id":   session_id,
+            "topic":        topic,
+            "difficulty":   difficulty,
+            "count":        len(questions),
+            "time_minutes": max(5, count),
+            "questions":    _strip_answers(questions),   # ← no answers
+        }
+
+        if _token_mode():
+            # Stateless: answers travel encrypted inside the token, no Firestore write
+            response["session_token"] = session_tokens.seal({
+                "sid":        session_id,
+                "uid":        user["uid"],
+                "topic":      topic,
+                "difficulty": difficulty,
+                "questions":  questions,
+            }, ttl_seconds=SESSION_TTL_HOURS * 3600)
+            return success(response, status_code=201)
 
         # Save session — includes full questions WITH answers (never sent to client)
-        db.collection(Collections.ACTIVE_SESSIONS).document(session_id).set({
+        db.collection(Collections.ACTIVE_SESSIONS).document(session_id).set(pack_fields({
             "session_id":   session_id,
             "user_uid":     user["uid"],
             "user_name":    user["name"],
@@ -111,16 +275,9 @@ class GenerateTestView(APIView):
             "created_at":   SERVER_TS,
             "expires_at":   expires_at,
             "completed":    False,
-        })
+        }, ["questions"]))
 
-        return success({
-            "session_id":   session_id,
-            "topic":        topic,
-            "difficulty":   difficulty,
-            "count":        len(questions),
-            "time_minutes": max(5, count),
-            "questions":    _strip_answers(questions),   # ← no answers
-        }, status_code=201)
+        return success(response, status_code=201)
 
 
 # ── Submit ────────────────────────────────────────────────────────────────────
@@ -135,106 +292,75 @@ class SubmitSessionView(APIView):
         if not isinstance(answers, dict):
             return Response({"error": True, "detail": "'answers' must be an object."}, status=400)
 
+        token = request.data.get("session_token")
+        if token:
+            return self._submit_token(request, session_id, token, answers, time_taken)
+
+        uid  = get_uid(request)
+        user = get_user_info(request)
         session_ref = db.collection(Collections.ACTIVE_SESSIONS).document(session_id)
-        session_doc = doc_to_dict(session_ref.get())
 
-        if not session_doc:
-            return Response({"error": True, "detail": "Session not found or expired."}, status=404)
+        # One transaction: read + completed check + attempt/session/stats writes
+        # commit together, so two racing submits can never both be graded.
+        try:
+            session_doc, graded, attempt_id = _submit_session(
+                db.transaction(), session_ref, uid, user["name"], answers, time_taken,
+            )
+        except _SubmitRejected as e:
+            return Response({"error": True, "detail": e.detail}, status=e.status)
+
+        return success(_submit_response(
+            attempt_id, session_id, session_doc["topic"], session_doc["difficulty"],
+            graded, time_taken,
+        ))
+
+    def _submit_token(self, request, session_id, token, answers, time_taken):
+        try:
+            session = session_tokens.unseal(str(token))
+        except TimeoutError as e:
+            return Response({"error": True, "detail": str(e)}, status=410)
+        except ValueError as e:
+            return Response({"error": True, "detail": str(e)}, status=400)
 
         uid = get_uid(request)
-        if session_doc["user_uid"] != uid:
+        if session["sid"] != session_id:
+            return Response({"error": True, "detail": "Token does not match session."}, status=400)
+        if session["uid"] != uid:
             return Response({"error": True, "detail": "Forbidden."}, status=403)
 
-        if session_doc.get("completed"):
-            return Response({"error": True, "detail": "Already submitted."}, status=400)
-
-        # Check TTL
         try:
-            exp = datetime.fromisoformat(session_doc["expires_at"])
-            if exp.tzinfo is None:
-                exp = exp.replace(tzinfo=timezone.utc)
-            if datetime.now(timezone.utc) > exp:
-                return Response({"error": True, "detail": "Session expired."}, status=410)
-        except Exception:
-            pass
-
-        # Grade
-        questions = session_doc["questions"]
-        total = len(questions)
-        correct = wrong = skipped = 0
-        results = []
-
-        for i, q in enumerate(questions):
-            user_ans    = answers.get(str(i))
-            correct_ans = int(q["answer"])
-
-            if user_ans is None:
-                verdict = "skipped"; skipped += 1
-            elif int(user_ans) == correct_ans:
-                verdict = "correct"; correct += 1
-            else:
-                verdict = "wrong";   wrong += 1
-
-            results.append({
-                "index":          i,
-                "question":       q["question"],
-                "options":        q["options"],
-                "tag":            q.get("tag", ""),
-                "difficulty":     q.get("difficulty", ""),
-                "type":           q.get("type", "conceptual"),
-                "user_answer":    int(user_ans) if user_ans is not None else None,
-                "correct_answer": correct_ans,
-                "explanation":    q.get("explanation", ""),
-                "verdict":        verdict,
-            })
-
-        score_pct = round((correct / total) * 100) if total else 0
-        grade = (
-            "🏆 Excellent"       if score_pct >= 80 else
-            "👍 Good"            if score_pct >= 60 else
-            "💪 Keep Practicing"
-        )
+            graded = _grade(session["questions"], answers)
+        except (TypeError, ValueError):
+            return Response({"error": True, "detail": "Answers must be option indexes."}, status=400)
         user = get_user_info(request)
 
-        # Save attempt
-        attempt_ref = db.collection(Collections.TEST_ATTEMPTS).document()
-        attempt_ref.set({
-            "session_id":         session_id,
-            "user_uid":           uid,
-            "user_name":          user["name"],
-            "topic":              session_doc["topic"],
-            "difficulty":         session_doc["difficulty"],
-            "total_questions":    total,
-            "correct":            correct,
-            "wrong":              wrong,
-            "skipped":            skipped,
-            "score_pct":          score_pct,
-            "grade":              grade,
-            "time_taken_seconds": time_taken,
-            "submitted_at":       SERVER_TS,
-        })
-
-        # Mark session complete + update user stats
-        session_ref.update({"completed": True, "attempt_id": attempt_ref.id})
-        db.collection(Collections.USERS).document(uid).update({
-            "stats.tests_taken": gfs.Increment(1),
-            "stats.total_score": gfs.Increment(score_pct),
-        })
+        # The session id doubles as the attempt id: create() fails on a replay
+        # that reached a different worker than the first submission. Attempt +
+        # stats go out as one atomic batch commit.
+        attempt_ref = db.collection(Collections.TEST_ATTEMPTS).document(session_id)
+        batch = db.batch()
+        batch.create(attempt_ref, _attempt_doc(
+            session_id, uid, user["name"], session["topic"], session["difficulty"],
+            graded, time_taken,
+        ))
+        _stats_increment(uid, graded, batch)
+
+        # The claim is only a cheap same-cache fast path; create() above is the
+        # real single-use guarantee, so a failed save gives the claim back.
+        if not session_tokens.claim_once(session_id, ttl_seconds=SESSION_TTL_HOURS * 3600):
+            return Response({"error": True, "detail": "Already submitted."}, status=400)
+        try:
+            batch.commit()
+        except AlreadyExists:
+            return Response({"error": True, "detail": "Already submitted."}, status=400)
+        except Exception:
+            session_tokens.release_claim(session_id)
+            raise
 
-        return success({
-            "attempt_id": attempt_ref.id,
-            "session_id": session_id,
-            "topic":      session_doc["topic"],
-            "difficulty": session_doc["difficulty"],
-            "total":      total,
-            "correct":    correct,
-            "wrong":      wrong,
-            "skipped":    skipped,
-            "score_pct":  score_pct,
-            "grade":      grade,
-            "time_taken": time_taken,
-            "results":    results,
-        })
+        return success(_submit_response(
+            attempt_ref.id, session_id, session["topic"], session["difficulty"],
+            graded, time_taken,
+        ))
 
 
 # ── Attempt History ───────────────────────────────────────────────────────────
@@ -3,7 +3,8 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from rest_framework.exceptions import ValidationError
 
-from api.firebase import db, Collections, SERVER_TS, doc_to_dict
+from api import counters, replica
+from api.firebase import db, Collections, SERVER_TS, pack_fields
 from api.groq_ai import generate_study_module_lessons
 from api.utils import success, get_uid
 
@@ -16,18 +17,8 @@ class StudyModulesView(APIView):
     permission_classes = [AllowAny]
 
     def get(self, request, subject_id):
-        modules = (
-            db.collection(Collections.STUDY_MODULES)
-            .where("subject_id", "==", subject_id)
-            .stream()
-        )
-
-        data = []
-        for doc in modules:
-            item = doc.to_dict()
-            item["id"] = doc.id
-            data.append(item)
-
+        # Served from the local replica (api/replica.py), Firestore on miss
+        data = replica.query(Collections.STUDY_MODULES, "subject_id", subject_id)
         return success(data)
 
 
@@ -40,23 +31,13 @@ class StudyModuleDetailView(APIView):
 
     def get(self, request, subject_id, module_id):
 
-        module_ref = db.collection(Collections.STUDY_MODULES).document(module_id)
-        module_doc = module_ref.get()
+        module_data = replica.get(Collections.STUDY_MODULES, module_id)
 
-        if not module_doc.exists:
+        if not module_data:
             return Response({"error": True, "detail": "Module not found."}, status=404)
 
-        module_data = module_doc.to_dict()
-
         # 🔎 Fetch existing lessons
-        lessons_query = (
-            db.collection(Collections.STUDY_LESSONS)
-            .where("module_id", "==", module_id)
-            .order_by("order")
-            .stream()
-        )
-
-        lessons = [doc.to_dict() for doc in lessons_query]
+        lessons = replica.query(Collections.STUDY_LESSONS, "module_id", module_id, order_by="order")
 
         # 🔥 If no lessons → generate using AI
         if not lessons:
@@ -71,7 +52,7 @@ class StudyModuleDetailView(APIView):
 
             # Store lessons
             for lesson in generated:
-                db.collection(Collections.STUDY_LESSONS).add({
+                db.collection(Collections.STUDY_LESSONS).add(pack_fields({
                     "subject_id": subject_id,
                     "module_id": module_id,
                     "title": lesson["title"],
@@ -79,17 +60,14 @@ class StudyModuleDetailView(APIView):
                     "content": lesson["content"],
                     "order": lesson["order"],
                     "created_at": SERVER_TS,
+                    "updated_at": SERVER_TS,
                     "ai_generated": True,
-                })
-
-            # Re-fetch
-            lessons_query = (
-                db.collection(Collections.STUDY_LESSONS)
-                .where("module_id", "==", module_id)
-                .order_by("order")
-                .stream()
+                }, ["content"]))
+
+            # Re-fetch from Firestore (also writes them through to the replica)
+            lessons = replica.query(
+                Collections.STUDY_LESSONS, "module_id", module_id, order_by="order", refresh=True,
             )
-            lessons = [doc.to_dict() for doc in lessons_query]
 
         return success({
             "module": module_data,
@@ -133,14 +111,12 @@ class MarkLessonCompleteView(APIView):
         })
 
         # 🔥 If module fully completed → increment modules_done
-        module_doc = db.collection(Collections.STUDY_MODULES).document(module_id).get()
-        if module_doc.exists:
-            lesson_count = module_doc.to_dict()["lesson_count"]
+        module_data = replica.get(Collections.STUDY_MODULES, module_id)
+        if module_data:
+            lesson_count = module_data["lesson_count"]
 
             if len(completed) >= lesson_count:
                 user_ref = db.collection(Collections.USERS).document(uid)
-                user_ref.update({
-                    "stats.modules_done": firestore.Increment(1)
-                })
+                counters.increment(user_ref, {"stats.modules_done": 1})
 
         return success({"completed_lessons": list(completed)})
\ No newline at end of file
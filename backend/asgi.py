@@ -3,6 +3,19 @@ ASGI config for backend project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+The app must be served through this module for live notifications: the SSE
+endpoint (/api/notifications/stream/) is an async view, so each open stream
+is a coroutine rather than a blocked worker thread, and it answers 503 when
+running under WSGI. Deploy start command (replaces `gunicorn backend.wsgi`):
+
+    gunicorn backend.asgi:application -k uvicorn.workers.UvicornWorker
+
+or, locally, `uvicorn backend.asgi:application --reload`.
+
+The notification hub is per process; with several workers, clients on other
+workers pick up notifications on reconnect (Last-Event-ID) instead of
+instantly — use one worker or sticky sessions for the stream route.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -7,9 +7,11 @@ AI: Groq
 """
 
 import os
+import json
 from pathlib import Path
 from datetime import timedelta
 from dotenv import load_dotenv
+from corsheaders.defaults import default_headers
 
 load_dotenv()
 
@@ -128,6 +130,8 @@ CORS_ALLOWED_ORIGINS = os.environ.get(
 
 CORS_ALLOW_CREDENTIALS = True
 
+CORS_ALLOW_HEADERS = (*default_headers, "idempotency-key")
+
 CSRF_TRUSTED_ORIGINS = os.environ.get(
     "CSRF_TRUSTED_ORIGINS",
     "https://place-prepp.vercel.app"
@@ -151,12 +155,123 @@ FIREBASE_CREDENTIALS_PATH = os.getenv(
 FIREBASE_PROJECT_ID = os.getenv("FIREBASE_PROJECT_ID", "")
 # (Firebase JSON handled in api/firebase.py via FIREBASE_CREDENTIALS_JSON)
 
+# Transparent compression of large AI-generated fields (api/firebase.pack_fields).
+# Reads always understand packed and unpacked documents; older releases do not.
+# Opt in only once every running instance has this reader deployed (and no
+# rollback to an older release is planned): ship first, then set
+# FIRESTORE_COMPRESSION=True. Turning it off again is always safe.
+FIRESTORE_COMPRESSION           = os.getenv("FIRESTORE_COMPRESSION", "False") == "True"
+FIRESTORE_COMPRESSION_CODEC     = os.getenv("FIRESTORE_COMPRESSION_CODEC", "zstd")   # falls back to zlib
+FIRESTORE_COMPRESSION_MIN_BYTES = int(os.getenv("FIRESTORE_COMPRESSION_MIN_BYTES", "2048"))
+
 # ─────────────────────────────────────────────
 # GROQ
 # ─────────────────────────────────────────────
 
 GROQ_API_KEY = os.environ.get("GROQ_API_KEY")
 
+# Per-task model routing overrides (defaults live in api/groq_ai.DEFAULT_ROUTES).
+# JSON, e.g. {"classification": [{"model": "llama-3.1-8b-instant", "max_tokens": 4, "timeout": 5}]}
+GROQ_MODEL_ROUTES = json.loads(os.environ.get("GROQ_MODEL_ROUTES", "{}"))
+
+# Company guide prompt template: "compact" (default) or "full" (see api/prompts.py)
+COMPANY_GUIDE_PROMPT = os.environ.get("COMPANY_GUIDE_PROMPT", "compact")
+
+# Stale guides regenerated per second by the background migrator (api/guide_migrator.py)
+COMPANY_GUIDE_MIGRATION_RATE = float(os.environ.get("COMPANY_GUIDE_MIGRATION_RATE", "0.2"))
+
+# In-process LRU of serialised guide responses (api/guide_cache.py)
+COMPANY_GUIDE_LRU_SIZE = int(os.environ.get("COMPANY_GUIDE_LRU_SIZE", "64"))
+COMPANY_GUIDE_LRU_TTL  = int(os.environ.get("COMPANY_GUIDE_LRU_TTL", "600"))
+# Seconds before a cached guide is re-checked against its own document
+COMPANY_GUIDE_LRU_VALIDATE = int(os.environ.get("COMPANY_GUIDE_LRU_VALIDATE", "5"))
+
+# ─────────────────────────────────────────────
+# LOGGING
+# ─────────────────────────────────────────────
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "api": {
+            "handlers": ["console"],
+            "level": os.environ.get("API_LOG_LEVEL", "INFO"),
+        },
+    },
+}
+
+# ─────────────────────────────────────────────
+# SKILLTEST
+# ─────────────────────────────────────────────
+
+# "firestore" stores sessions in active_sessions; "token" seals them into an
+# encrypted client-held token (api/session_tokens.py). Submit accepts both.
+# Token replays are rejected via Django's cache and, across workers, by the
+# attempt document id being the session id.
+SKILLTEST_SESSION_MODE = os.environ.get("SKILLTEST_SESSION_MODE", "firestore")
+SKILLTEST_TOKEN_KEY    = os.environ.get("SKILLTEST_TOKEN_KEY", "")
+
+# ─────────────────────────────────────────────
+# IDEMPOTENCY (api/idempotency.py)
+# ─────────────────────────────────────────────
+# Stored in Django's cache — point CACHES at a shared backend (e.g. Redis)
+# when running more than one worker process.
+
+IDEMPOTENCY_TTL_SECONDS  = int(os.environ.get("IDEMPOTENCY_TTL_SECONDS", "600"))
+IDEMPOTENCY_WAIT_SECONDS = int(os.environ.get("IDEMPOTENCY_WAIT_SECONDS", "60"))
+# Default worst-case handler run time; views calling Groq derive theirs from the routes
+IDEMPOTENCY_LOCK_SECONDS = int(os.environ.get("IDEMPOTENCY_LOCK_SECONDS", "60"))
+
+# ─────────────────────────────────────────────
+# SHARDED COUNTERS (api/counters.py)
+# ─────────────────────────────────────────────
+# Only ever increase COUNTER_SHARDS; run `manage.py compact_counters` first
+# if it has to go down.
+
+COUNTER_SHARDS    = int(os.environ.get("COUNTER_SHARDS", "8"))
+COUNTER_CACHE_TTL = float(os.environ.get("COUNTER_CACHE_TTL", "5"))
+
+# Minimum seconds between hot_score refreshes of one post (api/ranking.py)
+HOT_RESCORE_SECONDS = int(os.environ.get("HOT_RESCORE_SECONDS", "60"))
+
+# Max post/comment rewrites per second when a user's name changes (api/author_fanout.py)
+AUTHOR_FANOUT_RATE = float(os.environ.get("AUTHOR_FANOUT_RATE", "50"))
+
+# How long GET /api/dev2dev/tags/ serves the cached tag list (api/post_tags.py)
+TAGS_CACHE_SECONDS = int(os.environ.get("TAGS_CACHE_SECONDS", "60"))
+
+# Set once `manage.py backfill_reaction_index` has run and been checked: views
+# then stop reading the legacy likes/upvotes arrays (api/reactions.py).
+REACTION_INDEX_BACKFILLED = os.environ.get("REACTION_INDEX_BACKFILLED", "False") == "True"
+
+# Max notifications buffered per process before push_notification drops (api/notifications.py)
+NOTIFICATION_QUEUE_SIZE = int(os.environ.get("NOTIFICATION_QUEUE_SIZE", "10000"))
+NOTIFICATION_COALESCE_WINDOW = int(os.environ.get("NOTIFICATION_COALESCE_WINDOW", "3600"))
+NOTIFICATION_COALESCE_HOLD   = int(os.environ.get("NOTIFICATION_COALESCE_HOLD", "5"))
+
+# ─────────────────────────────────────────────
+# LIVE NOTIFICATIONS (SSE, served via backend/asgi.py)
+# ─────────────────────────────────────────────
+
+SSE_HEARTBEAT_SECONDS    = int(os.environ.get("SSE_HEARTBEAT_SECONDS", "20"))
+SSE_RETRY_MS             = int(os.environ.get("SSE_RETRY_MS", "5000"))
+SSE_MAX_STREAM_SECONDS   = int(os.environ.get("SSE_MAX_STREAM_SECONDS", "1800"))
+SSE_MAX_STREAMS_PER_USER = int(os.environ.get("SSE_MAX_STREAMS_PER_USER", "3"))
+
+# ─────────────────────────────────────────────
+# LOCAL READ REPLICA (api/replica.py)
+# ─────────────────────────────────────────────
+# study_modules and study_lessons are mirrored into the SQLite
+# database above. Run `manage.py sync_replica --loop` alongside the web
+# process to keep it fresh.
+
+REPLICA_ENABLED       = os.environ.get("REPLICA_ENABLED", "True") == "True"
+REPLICA_MAX_STALENESS = int(os.environ.get("REPLICA_MAX_STALENESS", "900"))
+
 # ─────────────────────────────────────────────
 # INTERNATIONALIZATION
 # ─────────────────────────────────────────────
@@ -120,6 +120,7 @@ def seed():
                 "difficulty":   mod["difficulty"],
                 "lesson_count": mod["lesson_count"],
                 "created_at":   SERVER_TS,
+                "updated_at":   SERVER_TS,   # lets sync_replica's delta pass see the change
             }, merge=True)
             print(f"   ✅ {doc_id} — {mod['title']}")
             total += 1